@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+"""Measure the recall and latency of the nearest-neighbour index against exact blocked cosine search.
+
+The embeddings are read from a file saved with ``--output`` or drawn at random around Gaussian clusters. Usage::
+
+    python benchmarks/neighbor_recall.py (--embeddings FILE | --random NODES) [--queries 1000] [--top-k 10]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+
+def random_embeddings(num_nodes, dimensions, num_clusters, random_state):
+    from bionev.embedding import EmbeddingMatrix
+
+    rng = np.random.RandomState(random_state)
+    centers = rng.randn(num_clusters, dimensions)
+    matrix = centers[rng.randint(num_clusters, size=num_nodes)] + 0.7 * rng.randn(num_nodes, dimensions)
+    return EmbeddingMatrix([str(i) for i in range(num_nodes)], matrix.astype(np.float32))
+
+
+def collect(results):
+    return [set(row) - {None} for _, neighbor_ids, _ in results for row in neighbor_ids.tolist()]
+
+
+def main():
+    from bionev.embedding import load_embeddings
+    from bionev.neighbors import build_index, exact_neighbors
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--embeddings')
+    source.add_argument('--random', type=int, metavar='NODES')
+    parser.add_argument('--dimensions', type=int, default=64)
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--n-lists', type=int, default=None)
+    parser.add_argument('--n-probe', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.embeddings:
+        embeddings = load_embeddings(args.embeddings)
+    else:
+        embeddings = random_embeddings(args.random, args.dimensions, max(1, args.random // 200), args.seed)
+    rng = np.random.RandomState(args.seed)
+    queries = [embeddings.nodes[i] for i in rng.choice(len(embeddings), min(args.queries, len(embeddings)),
+                                                       replace=False)]
+
+    start = time.perf_counter()
+    exact = collect(exact_neighbors(embeddings, queries, k=args.top_k))
+    exact_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    index = build_index(embeddings, n_lists=args.n_lists, random_state=args.seed)
+    print('%d nodes, %d queries, index of %d lists built in %.2f s'
+          % (len(embeddings), len(queries), index.n_lists, time.perf_counter() - start))
+
+    print('%-8s %10s %12s' % ('n_probe', 'recall@%d' % args.top_k, 'ms / query'))
+    print('%-8s %10.4f %12.4f' % ('exact', 1.0, 1000 * exact_seconds / len(queries)))
+    for n_probe in args.n_probe:
+        start = time.perf_counter()
+        found = collect(index.neighbors(queries, k=args.top_k, n_probe=n_probe))
+        seconds = time.perf_counter() - start
+        recall = np.mean([len(f & e) / max(len(e), 1) for f, e in zip(found, exact)])
+        print('%-8d %10.4f %12.4f' % (n_probe, recall, 1000 * seconds / len(queries)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+
+"""Measure the cold-start time of the ``bionev`` CLI for each embedding method.
+
+Each measurement runs in a fresh interpreter: it imports ``bionev.cli`` (what ``bionev --help`` pays) and then the
+backend of the method, as ``embedding_training`` does when it dispatches. Usage::
+
+    python benchmarks/startup_time.py [--repeat 5] [METHOD ...]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+SNIPPET = '''
+import time
+start = time.perf_counter()
+import bionev.cli
+from bionev.embed_train import import_method
+{load}
+print(time.perf_counter() - start)
+'''
+
+
+def time_startup(load, repeat):
+    timings = []
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, '-c', SNIPPET.format(load=load)],
+                              stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+        if proc.returncode != 0:
+            return None, proc.stderr.strip().splitlines()[-1]
+        timings.append(float(proc.stdout.strip().splitlines()[-1]))
+    return statistics.median(timings), None
+
+
+def main():
+    from bionev.embed_train import METHOD_MODULES
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('methods', nargs='*', default=list(METHOD_MODULES))
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print('%-12s %10s' % ('method', 'median (s)'))
+    for method, load in [('--help', '')] + [(m, 'import_method(%r)' % m) for m in args.methods]:
+        seconds, error = time_startup(load, args.repeat)
+        if seconds is None:
+            print('%-12s %10s  (%s)' % (method, 'n/a', error))
+        else:
+            print('%-12s %10.3f' % (method, seconds))
+
+
+if __name__ == '__main__':
+    main()
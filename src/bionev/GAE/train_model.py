@@ -6,6 +6,7 @@ import numpy as np
 import scipy.sparse as sp
 import tensorflow as tf
 
+import bionev.embedding as ebd
 from bionev.GAE.model import GCNModelAE, GCNModelVAE
 from bionev.GAE.optimizer import OptimizerAE, OptimizerVAE
 from bionev.GAE.preprocessing import construct_feed_dict, preprocess_graph, sparse_to_tuple
@@ -31,11 +32,7 @@ class gae_model:
         emb = self.sess.run(self.model.z_mean, feed_dict=self.feed_dict)
         print(emb.shape)
         # drug_names = [x.strip() for x in open('/data/group_shared/biomedical_graph/drug_list.txt').readlines()]
-        fout = open(output, 'w')
-        fout.write("{} {}\n".format(emb.shape[0], emb.shape[1]))
-        for idx in range(emb.shape[0]):
-            fout.write("{} {}\n".format(idx, ' '.join([str(x) for x in emb[idx, :]])))
-        fout.close()
+        ebd.save_embeddings(output, ebd.EmbeddingMatrix([str(idx) for idx in range(emb.shape[0])], emb))
 
     def train(self, adj):
         # Store original adjacency matrix (without diagonal entries) for later
@@ -1,34 +1,46 @@
 # -*- coding: utf-8 -*-
 
 import numpy
+import scipy.sparse as sp
 from sklearn.metrics import f1_score
 from sklearn.multiclass import OneVsRestClassifier
 from sklearn.preprocessing import MultiLabelBinarizer
 
+import bionev.embedding as ebd
+
 
 class TopKRanker(OneVsRestClassifier):
     def predict(self, X, top_k_list):
-        probs = numpy.asarray(super(TopKRanker, self).predict_proba(X))
-        all_labels = []
-        for i, k in enumerate(top_k_list):
-            probs_ = probs[i, :]
-            labels = self.classes_[probs_.argsort()[-k:]].tolist()
-            probs_[:] = 0
-            probs_[labels] = 1
-            all_labels.append(probs_)
-        return numpy.asarray(all_labels)
+        """ Sparse label indicator matrix with the ``top_k_list[i]`` most probable labels of row ``i`` set """
+        if hasattr(self.estimator, 'predict_proba'):
+            probs = numpy.asarray(super(TopKRanker, self).predict_proba(X))
+        else:
+            # only the order of the labels matters, e.g. for LinearSVC
+            probs = numpy.asarray(self.decision_function(X))
+        top_k = numpy.minimum(numpy.asarray(top_k_list, dtype=numpy.int64), probs.shape[1])
+        max_k = int(top_k.max()) if len(top_k) else 0
+        if max_k == 0:
+            return sp.csr_matrix(probs.shape, dtype=numpy.int64)
+        # the max_k most probable labels of every row, best first; a row keeps its first top_k[i] of them
+        best = numpy.argpartition(-probs, max_k - 1, axis=1)[:, :max_k]
+        order = numpy.argsort(-numpy.take_along_axis(probs, best, axis=1), axis=1, kind='stable')
+        best = numpy.take_along_axis(best, order, axis=1)
+        keep = numpy.arange(max_k) < top_k[:, None]
+        rows = numpy.nonzero(keep)[0]
+        return sp.csr_matrix((numpy.ones(len(rows), dtype=numpy.int64), (rows, best[keep])), shape=probs.shape)
 
 
 class Classifier(object):
 
-    def __init__(self, vectors, clf):
-        self.embeddings = vectors
-        self.clf = TopKRanker(clf)
+    def __init__(self, vectors, clf, n_jobs=None):
+        """ ``n_jobs`` fits the one-vs-rest estimators of the labels in parallel """
+        self.embeddings = ebd.as_embedding_matrix(vectors)
+        self.clf = TopKRanker(clf, n_jobs=n_jobs)
         self.binarizer = MultiLabelBinarizer(sparse_output=True)
 
     def train(self, X, Y, Y_all):
         self.binarizer.fit(Y_all)
-        X_train = [self.embeddings[x] for x in X]
+        X_train = self.embeddings.take(X)
         Y = self.binarizer.transform(Y)
         self.clf.fit(X_train, Y)
 
@@ -47,35 +59,23 @@ class Classifier(object):
         # print('-------------------')
 
     def predict(self, x, top_k_list):
-        X_ = numpy.asarray([self.embeddings[x] for x in x])
+        X_ = self.embeddings.take(x)
         return self.clf.predict(X_, top_k_list=top_k_list)
 
     def split_train_evaluate(self, x, y, train_precent):
         training_size = int(train_precent * len(x))
         shuffle_indices = numpy.random.permutation(numpy.arange(len(x)))
-        x_train = [x[shuffle_indices[i]] for i in range(training_size)]
-        y_train = [y[shuffle_indices[i]] for i in range(training_size)]
-        x_test = [x[shuffle_indices[i]] for i in range(training_size, len(x))]
-        y_test = [y[shuffle_indices[i]] for i in range(training_size, len(x))]
+        x_train = [x[i] for i in shuffle_indices[:training_size]]
+        y_train = [y[i] for i in shuffle_indices[:training_size]]
+        x_test = [x[i] for i in shuffle_indices[training_size:]]
+        y_test = [y[i] for i in shuffle_indices[training_size:]]
 
         self.train(x_train, y_train, y)
         return self.evaluate(x_test, y_test)
 
 
 def load_embeddings(filename):
-    fin = open(filename, 'r')
-    node_num, size = [int(x) for x in fin.readline().strip().split()]
-    vectors = {}
-    while 1:
-        l = fin.readline()
-        if l == '':
-            break
-        vec = l.strip().split(' ')
-        assert len(vec) == size + 1
-        vectors[vec[0]] = [float(x) for x in vec[1:]]
-    fin.close()
-    assert len(vectors) == node_num
-    return vectors
+    return ebd.load_embeddings(filename)
 
 
 def read_node_label(filename):
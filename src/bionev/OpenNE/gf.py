@@ -3,6 +3,8 @@
 import numpy as np
 import tensorflow as tf
 
+import bionev.embedding as ebd
+
 __author__ = "Wang Binlu"
 __email__ = "wblmail@whu.edu.cn"
 
@@ -11,7 +13,7 @@ class GraphFactorization(object):
     def __init__(self, graph, rep_size=128, epoch=120, learning_rate=0.003, weight_decay=1.):
         self.g = graph
 
-        self.node_size = graph.G.number_of_nodes()
+        self.node_size = graph.node_size
         self.rep_size = rep_size
         self.max_iter = epoch
         self.lr = learning_rate
@@ -28,12 +30,7 @@ class GraphFactorization(object):
             self.vectors[look_back[i]] = embedding
 
     def getAdj(self):
-        node_size = self.g.node_size
-        look_up = self.g.look_up_dict
-        adj = np.zeros((node_size, node_size))
-        for edge in self.g.G.edges():
-            adj[look_up[edge[0]]][look_up[edge[1]]] = self.g.G[edge[0]][edge[1]]['weight']
-        return adj
+        return self.g.adjacency_matrix().toarray().astype(np.float64)
 
     def get_train(self):
 
@@ -65,9 +62,4 @@ class GraphFactorization(object):
         return self.sess.run(_embeddings)
 
     def save_embeddings(self, filename):
-        fout = open(filename, 'w')
-        node_num = len(self.vectors)
-        fout.write("{} {}\n".format(node_num, self.rep_size))
-        for node, vec in self.vectors.items():
-            fout.write("{} {}\n".format(node, ' '.join([str(x) for x in vec])))
-        fout.close()
+        ebd.save_embeddings(filename, self.vectors)
@@ -5,83 +5,166 @@
 import networkx as nx
 
 import numpy as np
+import scipy.sparse as sp
+
+from bionev.edgelist import load_csr, read_edgelist
 
 __author__ = "Zhang Zhengyan"
 __email__ = "zhangzhengyan14@mails.tsinghua.edu.cn"
 
 
 class Graph(object):
+    """ Directed weighted graph stored in compressed sparse row (CSR) form.
+
+        Node ``i`` has the out-neighbours ``indices[indptr[i]:indptr[i + 1]]``
+        (sorted ascending) with the matching ``weights``. An undirected graph
+        stores every edge in both directions. ``look_up_dict`` maps a node id
+        to its row and ``look_back_list`` maps a row back to the node id.
+        A networkx view of the same graph is only built when ``G`` is accessed.
+    """
+
     def __init__(self):
-        self.G = None
+        self.indptr = np.zeros(1, dtype=np.int32)
+        self.indices = np.zeros(0, dtype=np.int32)
+        self.weights = np.zeros(0, dtype=np.float32)
         self.look_up_dict = {}
         self.look_back_list = []
         self.node_size = 0
-
-    def encode_node(self):
+        self._G = None
+        self._edge_keys = None
+
+    @property
+    def G(self):
+        """ networkx view of the graph, built on first access """
+        if self._G is None:
+            G = nx.DiGraph()
+            G.add_nodes_from(self.look_back_list, status='')
+            look_back = self.look_back_list
+            src, dst, weights = self.edge_arrays()
+            G.add_weighted_edges_from(
+                (look_back[u], look_back[v], w) for u, v, w in zip(src.tolist(), dst.tolist(), weights.tolist()))
+            self._G = G
+        return self._G
+
+    def encode_node(self, nodes):
         look_up = self.look_up_dict
         look_back = self.look_back_list
-        for node in self.G.nodes():
+        for node in nodes:
             look_up[node] = self.node_size
             look_back.append(node)
             self.node_size += 1
-            self.G.nodes[node]['status'] = ''
+
+    def build(self, nodes, src, dst, weights=None, directed=False):
+        """ Build the CSR arrays from parallel arrays of row indices
+            :param nodes: node ids, in row order
+            :param src: source rows of the edges
+            :param dst: target rows of the edges
+            :param weights: edge weights, 1.0 for every edge if None
+            :param directed: if False, every edge is also added in the reverse direction
+        """
+        self.look_up_dict = {}
+        self.look_back_list = []
+        self.node_size = 0
+        self._G = None
+        self._edge_keys = None
+        self.encode_node(nodes)
+
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int64)
+        if weights is None:
+            weights = np.ones(len(src), dtype=np.float32)
+        else:
+            weights = np.asarray(weights, dtype=np.float32)
+        if not directed:
+            # interleave each edge with its reverse so a later duplicate still overrides an earlier one
+            src, dst = np.stack([src, dst], axis=1).ravel(), np.stack([dst, src], axis=1).ravel()
+            weights = np.repeat(weights, 2)
+
+        # keep the last occurrence of a repeated edge, like repeated assignment on a networkx graph
+        n = self.node_size
+        keys = src[::-1] * n + dst[::-1]
+        keys, first = np.unique(keys, return_index=True)
+        weights = weights[::-1][first]
+
+        self.indices = (keys % n).astype(np.int32)
+        self.weights = weights
+        self.indptr = np.zeros(n + 1, dtype=np.int32)
+        np.cumsum(np.bincount(keys // n, minlength=n), out=self.indptr[1:])
+        self._edge_keys = keys
 
     def read_g(self, g):
-        self.G = nx.DiGraph()
-        self.G.add_edges_from(g.edges())
-        for i, j in self.G.edges():
-            self.G[i][j]['weight'] = 1.0
-        self.encode_node()
+        nodes = list(dict.fromkeys(node for edge in g.edges() for node in edge))
+        look_up = {node: i for i, node in enumerate(nodes)}
+        src = [look_up[u] for u, _ in g.edges()]
+        dst = [look_up[v] for _, v in g.edges()]
+        self.build(nodes, src, dst, directed=True)
 
     def read_adjlist(self, filename):
         """ Read graph from adjacency file in which the edge must be unweighted
             the format of each line: v1 n1 n2 n3 ... nk
             :param filename: the filename of input file
         """
-        self.G = nx.read_adjlist(filename, create_using=nx.DiGraph())
-        for i, j in self.G.edges():
-            self.G[i][j]['weight'] = 1.0
-        self.encode_node()
+        G = nx.read_adjlist(filename, create_using=nx.DiGraph())
+        nodes = list(G.nodes())
+        look_up = {node: i for i, node in enumerate(nodes)}
+        src = [look_up[u] for u, _ in G.edges()]
+        dst = [look_up[v] for _, v in G.edges()]
+        self.build(nodes, src, dst, directed=True)
 
     def read_edgelist(self, filename, weighted=False, directed=False):
-        self.G = nx.DiGraph()
-
-        if directed:
-            def read_unweighted(l):
-                src, dst = l.split()
-                self.G.add_edge(src, dst)
-                self.G[src][dst]['weight'] = 1.0
-
-            def read_weighted(l):
-                src, dst, w = l.split()
-                self.G.add_edge(src, dst)
-                self.G[src][dst]['weight'] = float(w)
-        else:
-            def read_unweighted(l):
-                src, dst = l.split()
-                self.G.add_edge(src, dst)
-                self.G.add_edge(dst, src)
-                self.G[src][dst]['weight'] = 1.0
-                self.G[dst][src]['weight'] = 1.0
-
-            def read_weighted(l):
-                src, dst, w = l.split()
-                # print(src, dst, float(w))
-                self.G.add_edge(src, dst)
-                self.G.add_edge(dst, src)
-                self.G[src][dst]['weight'] = float(w)
-                self.G[dst][src]['weight'] = float(w)
-        fin = open(filename, 'r')
-        func = read_unweighted
-        if weighted:
-            func = read_weighted
-        while 1:
-            l = fin.readline()
-            if l == '':
-                break
-            func(l)
-        fin.close()
-        self.encode_node()
+        self.read_edges(read_edgelist(filename, weighted=weighted), directed=directed)
+
+    def read_csr(self, csr_dir):
+        """ Read a memory-mapped graph built by :func:`bionev.edgelist.build_csr` """
+        nodes, self.indptr, self.indices, self.weights = load_csr(csr_dir)
+        self.look_up_dict = {}
+        self.look_back_list = []
+        self.node_size = 0
+        self._G = None
+        self._edge_keys = None
+        self.encode_node(nodes)
+
+    def read_edges(self, edges, directed=False):
+        """ Read graph from a parsed :class:`bionev.edgelist.EdgeList` """
+        self.build(edges.nodes, edges.src, edges.dst, edges.weights, directed=directed)
+
+    def number_of_nodes(self):
+        return self.node_size
+
+    def number_of_edges(self):
+        """ Number of directed edges, i.e. an undirected edge counts twice """
+        return len(self.indices)
+
+    def neighbors(self, node):
+        return self.indices[self.indptr[node]:self.indptr[node + 1]]
+
+    def neighbor_weights(self, node):
+        return self.weights[self.indptr[node]:self.indptr[node + 1]]
+
+    def degree(self):
+        return np.diff(self.indptr)
+
+    def edge_arrays(self):
+        """ Source rows, target rows and weights of all edges, in CSR order """
+        src = np.repeat(np.arange(self.node_size, dtype=np.int32), self.degree())
+        return src, self.indices, self.weights
+
+    def has_edges(self, src, dst):
+        """ Vectorized edge membership test for parallel arrays of rows """
+        if self._edge_keys is None:
+            src_, dst_, _ = self.edge_arrays()
+            self._edge_keys = src_.astype(np.int64) * self.node_size + dst_
+        keys = np.asarray(src, dtype=np.int64) * self.node_size + np.asarray(dst, dtype=np.int64)
+        if len(self._edge_keys) == 0:
+            return np.zeros(keys.shape, dtype=bool)
+        pos = np.searchsorted(self._edge_keys, keys)
+        pos[pos == len(self._edge_keys)] = 0
+        return self._edge_keys[pos] == keys
+
+    def adjacency_matrix(self):
+        """ Weighted adjacency matrix as a scipy CSR matrix """
+        n = self.node_size
+        return sp.csr_matrix((self.weights, self.indices, self.indptr), shape=(n, n))
 
     def read_node_label(self, filename):
         fin = open(filename, 'r')
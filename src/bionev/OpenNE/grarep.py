@@ -5,6 +5,8 @@ from scipy.sparse.linalg import svds
 from sklearn.preprocessing import normalize
 import joblib
 
+import bionev.embedding as ebd
+
 
 class GraRep(object):
 
@@ -16,17 +18,12 @@ class GraRep(object):
         self.train()
 
     def getAdjMat(self):
-        graph = self.g.G
         node_size = self.g.node_size
-        look_up = self.g.look_up_dict
+        src, dst, weights = self.g.edge_arrays()
+        weights = np.where(weights > 0.0, weights, 0.001)
         adj = np.zeros((node_size, node_size))
-        for edge in graph.edges():
-            if graph[edge[0]][edge[1]]['weight'] > 0.0:
-                adj[look_up[edge[0]]][look_up[edge[1]]] = graph[edge[0]][edge[1]]['weight']
-                adj[look_up[edge[1]]][look_up[edge[0]]] = graph[edge[0]][edge[1]]['weight']
-            else:
-                adj[look_up[edge[0]]][look_up[edge[1]]] = 0.001
-                adj[look_up[edge[1]]][look_up[edge[0]]] = 0.001
+        adj[src, dst] = weights
+        adj[dst, src] = weights
         # ScaleSimMat
         # print('finish getAdjMat')
         return np.matrix(adj)
@@ -59,12 +56,7 @@ class GraRep(object):
         return self.vectors
 
     def save_embeddings(self, filename):
-        fout = open(filename, 'w')
-        node_num = len(self.vectors.keys())
-        fout.write("{} {}\n".format(node_num, self.Kstep * self.dim))
-        for node, vec in self.vectors.items():
-            fout.write("{} {}\n".format(node, ' '.join([str(x) for x in vec])))
-        fout.close()
+        ebd.save_embeddings(filename, self.vectors)
 
     def train(self):
         self.adj = self.getAdjMat()
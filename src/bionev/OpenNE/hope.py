@@ -1,10 +1,11 @@
 # -*- coding: utf-8 -*-
 
-import networkx as nx
 import numpy as np
 import scipy.sparse.linalg as lg
 import joblib
 
+import bionev.embedding as ebd
+
 __author__ = "Alan WANG"
 __email__ = "alan1995wang@outlook.com"
 
@@ -15,22 +16,20 @@ class HOPE(object):
           d: representation vector dimension
         '''
         self._d = d
-        self._graph = graph.G
         self.g = graph
         self._node_num = graph.node_size
         self.learn_embedding()
 
     def learn_embedding(self):
 
-        graph = self.g.G
-        A = nx.to_numpy_matrix(graph)
+        A = np.asmatrix(self.g.adjacency_matrix().toarray().astype(np.float64))
 
         # self._beta = 0.0728
 
         # M_g = np.eye(graph.number_of_nodes()) - self._beta * A
         # M_l = self._beta * A
 
-        M_g = np.eye(graph.number_of_nodes())
+        M_g = np.eye(self._node_num)
         M_l = np.dot(A, A)
 
         S = np.dot(np.linalg.inv(M_g), M_l)
@@ -54,13 +53,7 @@ class HOPE(object):
         return self.vectors
 
     def save_embeddings(self, filename):
-        fout = open(filename, 'w')
-        node_num = len(self.vectors.keys())
-        fout.write("{} {}\n".format(node_num, self._d))
-        for node, vec in self.vectors.items():
-            fout.write("{} {}\n".format(node,
-                                        ' '.join([str(x) for x in vec])))
-        fout.close()
+        ebd.save_embeddings(filename, self.vectors)
 
     def save_model(self, path):
         joblib.dump(self, path)
@@ -1,9 +1,11 @@
 # -*- coding: utf-8 -*-
 
-import networkx as nx
 import numpy as np
+import scipy.sparse as sp
 from scipy.sparse.linalg import eigsh
 
+import bionev.embedding as ebd
+
 __author__ = "Wang Binlu"
 __email__ = "wblmail@whu.edu.cn"
 
@@ -11,9 +13,9 @@ __email__ = "wblmail@whu.edu.cn"
 class LaplacianEigenmaps(object):
     def __init__(self, graph, rep_size=128):
         self.g = graph
-        self.node_size = self.g.G.number_of_nodes()
+        self.node_size = self.g.node_size
         self.rep_size = rep_size
-        self.adj_mat = nx.to_numpy_array(self.g.G)
+        self.adj_mat = self.g.adjacency_matrix()
         self.vectors = {}
         self.embeddings = self.get_train()
         look_back = self.g.look_back_list
@@ -22,12 +24,7 @@ class LaplacianEigenmaps(object):
             self.vectors[look_back[i]] = embedding
 
     def getAdj(self):
-        node_size = self.g.node_size
-        look_up = self.g.look_up_dict
-        adj = np.zeros((node_size, node_size))
-        for edge in self.g.G.edges():
-            adj[look_up[edge[0]]][look_up[edge[1]]] = self.g.G[edge[0]][edge[1]]['weight']
-        return adj
+        return self.g.adjacency_matrix().toarray().astype(np.float64)
 
     def getLap(self):
         # degree_mat = np.diagflat(np.sum(self.adj_mat, axis=1))
@@ -40,9 +37,15 @@ class LaplacianEigenmaps(object):
         # # eye = np.eye(self.node_size)
         #
         # norm_lap_mat = np.matmul(np.matmul(deg_trans, L), deg_trans)
-        G = self.g.G.to_undirected()
+        adj = self.adj_mat.astype(np.float64)
+        adj = adj.maximum(adj.T)
         print('begin norm_lap_mat')
-        norm_lap_mat = nx.normalized_laplacian_matrix(G)
+        degrees = np.asarray(adj.sum(axis=1)).ravel()
+        with np.errstate(divide='ignore'):
+            deg_trans = 1.0 / np.sqrt(degrees)
+        deg_trans[np.isinf(deg_trans)] = 0
+        deg_trans = sp.diags(deg_trans)
+        norm_lap_mat = deg_trans @ (sp.diags(degrees) - adj) @ deg_trans
         print('finish norm_lap_mat')
         return norm_lap_mat
 
@@ -61,9 +64,4 @@ class LaplacianEigenmaps(object):
         return vec
 
     def save_embeddings(self, filename):
-        fout = open(filename, 'w')
-        node_num = len(self.vectors)
-        fout.write("{} {}\n".format(node_num, self.rep_size))
-        for node, vec in self.vectors.items():
-            fout.write("{} {}\n".format(node, ' '.join([str(x) for x in vec])))
-        fout.close()
+        ebd.save_embeddings(filename, self.vectors)
@@ -9,6 +9,7 @@ from sklearn.linear_model import LogisticRegression
 import joblib
 
 from bionev.OpenNE.classify import Classifier, read_node_label
+import bionev.embedding as ebd
 
 
 class _LINE(object):
@@ -17,7 +18,7 @@ class _LINE(object):
         self.cur_epoch = 0
         self.order = order
         self.g = graph
-        self.node_size = graph.G.number_of_nodes()
+        self.node_size = graph.node_size
         self.rep_size = rep_size
         self.batch_size = batch_size
         self.negative_ratio = negative_ratio
@@ -78,15 +79,11 @@ class _LINE(object):
         self.cur_epoch += 1
 
     def batch_iter(self):
-        look_up = self.g.look_up_dict
-
         table_size = 1e8
-        numNodes = self.node_size
 
-        edges = [(look_up[x[0]], look_up[x[1]]) for x in self.g.G.edges()]
+        edge_src, edge_dst, _ = self.g.edge_arrays()
 
-        data_size = self.g.G.number_of_edges()
-        edge_set = set([x[0] * numNodes + x[1] for x in edges])
+        data_size = self.g.number_of_edges()
         shuffle_indices = np.random.permutation(np.arange(data_size))
 
         # positive or negative mod
@@ -106,8 +103,8 @@ class _LINE(object):
                 for i in range(start_index, end_index):
                     if not random.random() < self.edge_prob[shuffle_indices[i]]:
                         shuffle_indices[i] = self.edge_alias[shuffle_indices[i]]
-                    cur_h = edges[shuffle_indices[i]][0]
-                    cur_t = edges[shuffle_indices[i]][1]
+                    cur_h = edge_src[shuffle_indices[i]]
+                    cur_t = edge_dst[shuffle_indices[i]]
                     h.append(cur_h)
                     t.append(cur_t)
             else:
@@ -130,12 +127,9 @@ class _LINE(object):
         numNodes = self.node_size
 
         print("Pre-procesing for non-uniform negative sampling!")
-        node_degree = np.zeros(numNodes)  # out degree
-
-        look_up = self.g.look_up_dict
-        for edge in self.g.G.edges():
-            node_degree[look_up[edge[0]]
-            ] += self.g.G[edge[0]][edge[1]]["weight"]
+        edge_src, _, edge_weights = self.g.edge_arrays()
+        edge_weights = edge_weights.astype(np.float64)
+        node_degree = np.bincount(edge_src, weights=edge_weights, minlength=numNodes)  # out degree
 
         norm = sum([math.pow(node_degree[i], power) for i in range(numNodes)])
 
@@ -149,16 +143,14 @@ class _LINE(object):
                 self.sampling_table[i] = j
                 i += 1
 
-        data_size = self.g.G.number_of_edges()
+        data_size = self.g.number_of_edges()
         self.edge_alias = np.zeros(data_size, dtype=np.int32)
         self.edge_prob = np.zeros(data_size, dtype=np.float32)
         large_block = np.zeros(data_size, dtype=np.int32)
         small_block = np.zeros(data_size, dtype=np.int32)
 
-        total_sum = sum([self.g.G[edge[0]][edge[1]]["weight"]
-                         for edge in self.g.G.edges()])
-        norm_prob = [self.g.G[edge[0]][edge[1]]["weight"] *
-                     data_size / total_sum for edge in self.g.G.edges()]
+        total_sum = edge_weights.sum()
+        norm_prob = (edge_weights * data_size / total_sum).tolist()
         num_small_block = 0
         num_large_block = 0
         cur_small_block = 0
@@ -272,13 +264,7 @@ class LINE(object):
         return self.vectors
 
     def save_embeddings(self, filename):
-        fout = open(filename, 'w')
-        node_num = len(self.vectors.keys())
-        fout.write("{} {}\n".format(node_num, self.rep_size))
-        for node, vec in self.vectors.items():
-            fout.write("{} {}\n".format(node,
-                                        ' '.join([str(x) for x in vec])))
-        fout.close()
+        ebd.save_embeddings(filename, self.vectors)
 
     def save_model(self, path):
         joblib.dump(self, path)
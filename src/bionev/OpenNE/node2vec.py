@@ -1,12 +1,10 @@
 # -*- coding: utf-8 -*-
-import json
-
 from gensim.models import Word2Vec
 
 from bionev.OpenNE import walker
 import bionev.OpenNE.graph as og
+import bionev.embedding as ebd
 
-from ast import literal_eval
 import joblib
 
 class Node2vec(object):
@@ -44,22 +42,20 @@ class Node2vec(object):
         self.size = kwargs["size"]
         print("Learning representation...")
         self.word2vec = Word2Vec(**kwargs)
-        for word in graph.G.nodes():
+        for word in graph.look_back_list:
             self.vectors[word] = self.word2vec.wv[word]
 
     def update_model(self, graph, alias_edges_path=None):
         self.walker.update = True
-        self.walker.G = graph.G
         print("Preprocess transition probs...")
+        self.walker.set_graph(graph)
         if alias_edges_path is not None:
-            with open(alias_edges_path, 'r') as f:
-                obj = json.load(f)
-                self.walker.alias_edges = {literal_eval(k): literal_eval(v) for k, v in obj.items()}
+            self.walker.alias_edges.update(walker.load_alias_edges(alias_edges_path, graph.look_up_dict))
         self.walker.preprocess_transition_probs()
         sentences = self.walker.simulate_walks(
             num_walks=self.num_paths, walk_length=self.path_length, vectors=self.vectors)
         self.word2vec.build_vocab(sentences=sentences, update=True)
-        for word in graph.G.nodes():
+        for word in graph.look_back_list:
             if word in self.vectors.keys():
                 continue
             self.vectors[word] = self.word2vec.wv[word]
@@ -69,16 +65,9 @@ class Node2vec(object):
 
     def save_model(self, model_path, alias_edges_path=None):
         if alias_edges_path is not None:
-            with open(alias_edges_path, 'w') as f:
-                json.dump({str(k): v.tolist() for k, v in self.walker.alias_edges.items()}, f)
+            walker.save_alias_edges(alias_edges_path, self.walker)
             self.walker.alias_edges.clear()
         joblib.dump(self, model_path)
 
     def save_embeddings(self, filename):
-        fout = open(filename, 'w')
-        node_num = len(self.vectors.keys())
-        fout.write("{} {}\n".format(node_num, self.size))
-        for node, vec in self.vectors.items():
-            fout.write("{} {}\n".format(node,
-                                        ' '.join([str(x) for x in vec])))
-        fout.close()
+        ebd.save_embeddings(filename, self.vectors)
@@ -4,6 +4,8 @@ import numpy as np
 import tensorflow as tf
 import joblib
 
+import bionev.embedding as ebd
+
 __author__ = "Wang Binlu"
 __email__ = "wblmail@whu.edu.cn"
 
@@ -34,7 +36,7 @@ class SDNE(object):
         """
         self.g = graph
 
-        self.node_size = self.g.G.number_of_nodes()
+        self.node_size = self.g.node_size
         self.dim = encoder_layer_list[-1]
 
         self.encoder_layer_list = [self.node_size]
@@ -65,12 +67,7 @@ class SDNE(object):
             self.vectors[look_back[i]] = embedding
 
     def getAdj(self):
-        node_size = self.g.node_size
-        look_up = self.g.look_up_dict
-        adj = np.zeros((node_size, node_size))
-        for edge in self.g.G.edges():
-            adj[look_up[edge[0]]][look_up[edge[1]]] = self.g.G[edge[0]][edge[1]]['weight']
-        return adj
+        return self.g.adjacency_matrix().toarray().astype(np.float64)
 
     def train(self):
         adj_mat = self.adj_mat
@@ -152,12 +149,7 @@ class SDNE(object):
         return self.vectors
 
     def save_embeddings(self, filename):
-        fout = open(filename, 'w')
-        node_num = len(self.vectors)
-        fout.write("{} {}\n".format(node_num, self.dim))
-        for node, vec in self.vectors.items():
-            fout.write("{} {}\n".format(node, ' '.join([str(x) for x in vec])))
-        fout.close()
+        ebd.save_embeddings(filename, self.vectors)
 
 
 class SDNE2(object):
@@ -166,7 +158,7 @@ class SDNE2(object):
 
         self.g = graph
 
-        self.node_size = self.g.G.number_of_nodes()
+        self.node_size = self.g.node_size
         self.rep_size = encoder_layer_list[-1]
 
         self.encoder_layer_list = [self.node_size] + encoder_layer_list
@@ -195,12 +187,7 @@ class SDNE2(object):
             self.vectors[look_back[i]] = embedding
 
     def getAdj(self):
-        node_size = self.g.node_size
-        look_up = self.g.look_up_dict
-        adj = np.zeros((node_size, node_size))
-        for edge in self.g.G.edges():
-            adj[look_up[edge[0]]][look_up[edge[1]]] = self.g.G[edge[0]][edge[1]]['weight']
-        return adj
+        return self.g.adjacency_matrix().toarray().astype(np.float64)
 
     def model(self, node, layer_collector, scope_name):
         fc = node
@@ -306,12 +293,7 @@ class SDNE2(object):
         return self.vectors
 
     def save_embeddings(self, filename):
-        fout = open(filename, 'w')
-        node_num = len(self.vectors)
-        fout.write("{} {}\n".format(node_num, self.rep_size))
-        for node, vec in self.vectors.items():
-            fout.write("{} {}\n".format(node, ' '.join([str(x) for x in vec])))
-        fout.close()
+        ebd.save_embeddings(filename, self.vectors)
 
     def save_model(self, path):
         joblib.dump(self, path)
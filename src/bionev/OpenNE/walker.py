@@ -1,9 +1,12 @@
 # -*- coding: utf-8 -*-
 
+import json
 import random
 
 import numpy as np
 
+ALIAS_EDGES_VERSION = 2
+
 
 def deepwalk_walk_wrapper(class_instance, walk_length, start_node):
     class_instance.deepwalk_walk(walk_length, start_node)
@@ -11,7 +14,7 @@ def deepwalk_walk_wrapper(class_instance, walk_length, start_node):
 
 class BasicWalker:
     def __init__(self, G, workers):
-        self.G = G.G
+        self.g = G
         self.node_size = G.node_size
         self.look_up_dict = G.look_up_dict
 
@@ -19,24 +22,27 @@ class BasicWalker:
         '''
         Simulate a random walk starting from start node.
         '''
+        indptr = self.g.indptr
+        indices = self.g.indices
 
         walk = [start_node]
 
         while len(walk) < walk_length:
             cur = walk[-1]
-            cur_nbrs = list(self.G.neighbors(cur))
-            if len(cur_nbrs) > 0:
-                walk.append(random.choice(cur_nbrs))
+            start, end = indptr[cur], indptr[cur + 1]
+            if end > start:
+                walk.append(int(indices[random.randrange(start, end)]))
             else:
                 break
-        return walk
+        look_back = self.g.look_back_list
+        return [look_back[node] for node in walk]
 
     def simulate_walks(self, num_walks, walk_length):
         '''
         Repeatedly simulate random walks from each node.
         '''
         walks = []
-        nodes = list(self.G.nodes())
+        nodes = list(range(self.node_size))
         print('Begin random walks...')
         for walk_iter in range(num_walks):
             # pool = multiprocessing.Pool(processes = 4)
@@ -55,7 +61,7 @@ class BasicWalker:
 
 class Walker:
     def __init__(self, G, p, q, update, workers):
-        self.G = G.G
+        self.g = G
         self.p = p
         self.q = q
         self.node_size = G.node_size
@@ -64,43 +70,60 @@ class Walker:
         self.alias_nodes = {}
         self.alias_edges = {}
 
+    def set_graph(self, G):
+        '''
+        Switch to a new graph, keeping the alias tables of the nodes and edges it shares with the old one.
+        '''
+        look_up = G.look_up_dict
+        remap = {i: look_up[node] for i, node in enumerate(self.g.look_back_list) if node in look_up}
+        self.alias_nodes = {remap[node]: alias for node, alias in self.alias_nodes.items() if node in remap}
+        self.alias_edges = {(remap[src], remap[dst]): alias for (src, dst), alias in self.alias_edges.items()
+                            if src in remap and dst in remap}
+        self.g = G
+        self.node_size = G.node_size
+        self.look_up_dict = G.look_up_dict
+
     def node2vec_walk(self, walk_length, start_node):
         '''
         Simulate a random walk starting from start node.
         '''
+        indptr = self.g.indptr
+        indices = self.g.indices
 
         walk = [start_node]
 
         while len(walk) < walk_length:
             cur = walk[-1]
-            cur_nbrs = list(self.G.neighbors(cur))
-            if len(cur_nbrs) > 0:
+            start = indptr[cur]
+            if indptr[cur + 1] > start:
                 if len(walk) == 1:
                     walk.append(
-                        cur_nbrs[alias_draw(self.alias_nodes[cur][0], self.alias_nodes[cur][1])])
+                        int(indices[start + alias_draw(self.alias_nodes[cur][0], self.alias_nodes[cur][1])]))
                 else:
                     prev = walk[-2]
                     pos = (prev, cur)
-                    next = cur_nbrs[alias_draw(self.alias_edges[pos][0],
-                                               self.alias_edges[pos][1])]
+                    next = int(indices[start + alias_draw(self.alias_edges[pos][0],
+                                                          self.alias_edges[pos][1])])
                     walk.append(next)
             else:
                 break
 
-        return walk
+        look_back = self.g.look_back_list
+        return [look_back[node] for node in walk]
 
     def simulate_walks(self, num_walks, walk_length, vectors):
         '''
         Repeatedly simulate random walks from each node.
         '''
         walks = []
-        nodes = list(self.G.nodes())
+        nodes = list(range(self.node_size))
+        look_back = self.g.look_back_list
         print('Begin random walk...')
         for walk_iter in range(num_walks):
             # print(str(walk_iter+1), '/', str(num_walks))
             random.shuffle(nodes)
             for node in nodes:
-                if self.update and node in vectors.keys():
+                if self.update and look_back[node] in vectors:
                     continue
                 walks.append(self.node2vec_walk(
                     walk_length=walk_length, start_node=node))
@@ -111,19 +134,14 @@ class Walker:
         '''
         Get the alias edge setup lists for a given edge.
         '''
-
-        unnormalized_probs = []
-        for dst_nbr in self.G.neighbors(dst):
-            if dst_nbr == src:
-                unnormalized_probs.append(self.G[dst][dst_nbr]['weight'] / self.p)
-            elif self.G.has_edge(dst_nbr, src):
-                unnormalized_probs.append(self.G[dst][dst_nbr]['weight'])
-            else:
-                unnormalized_probs.append(self.G[dst][dst_nbr]['weight'] / self.q)
-        norm_const = sum(unnormalized_probs)
+        dst_nbrs = self.g.neighbors(dst)
+        weights = self.g.neighbor_weights(dst).astype(np.float64)
+        returns = self.g.has_edges(dst_nbrs, np.full(len(dst_nbrs), src))
+        unnormalized_probs = np.where(dst_nbrs == src, weights / self.p,
+                                      np.where(returns, weights, weights / self.q))
+        norm_const = unnormalized_probs.sum()
         if norm_const > 0.0:
-            normalized_probs = [
-                float(u_prob) / norm_const for u_prob in unnormalized_probs]
+            normalized_probs = unnormalized_probs / norm_const
         else:
             normalized_probs = unnormalized_probs
 
@@ -133,29 +151,57 @@ class Walker:
         '''
         Preprocessing of transition probabilities for guiding the random walks.
         '''
-        for node in self.G.nodes():
-            if self.update and node in self.alias_nodes.keys():
+        for node in range(self.node_size):
+            if self.update and node in self.alias_nodes:
                 continue
-            unnormalized_probs = [self.G[node][nbr]['weight']
-                                  for nbr in self.G.neighbors(node)]
-            norm_const = sum(unnormalized_probs)
+            unnormalized_probs = self.g.neighbor_weights(node).astype(np.float64)
+            norm_const = unnormalized_probs.sum()
             if norm_const > 0.0:
-                normalized_probs = [
-                    float(u_prob) / norm_const for u_prob in unnormalized_probs]
+                normalized_probs = unnormalized_probs / norm_const
             else:
                 normalized_probs = unnormalized_probs
             self.alias_nodes[node] = alias_setup(normalized_probs)
 
-        triads = {}
-
-        for edge in self.G.edges():
-            if self.update and edge in self.alias_edges.keys():
+        src, dst, _ = self.g.edge_arrays()
+        for edge in zip(src.tolist(), dst.tolist()):
+            if self.update and edge in self.alias_edges:
                 continue
             self.alias_edges[edge] = self.get_alias_edge(edge[0], edge[1])
 
         return
 
 
+def save_alias_edges(filename, walker):
+    '''
+    Save the alias tables of the edges of a walker, keyed by node ids so that they do not depend on the row order
+    of its graph.
+    '''
+    look_back = walker.g.look_back_list
+    with open(filename, 'w') as f:
+        json.dump({
+            'version': ALIAS_EDGES_VERSION,
+            'alias_edges': [[look_back[src], look_back[dst], J.tolist(), q.tolist()]
+                            for (src, dst), (J, q) in walker.alias_edges.items()],
+        }, f)
+
+
+def load_alias_edges(filename, look_up_dict):
+    '''
+    Load alias tables saved by save_alias_edges, keyed by the rows of the nodes in look_up_dict. The edges with a
+    node missing from it are dropped.
+    '''
+    with open(filename, 'r') as f:
+        obj = json.load(f)
+    if not isinstance(obj, dict) or obj.get('version') != ALIAS_EDGES_VERSION:
+        raise ValueError('%s does not hold alias tables of version %d, save the model again'
+                         % (filename, ALIAS_EDGES_VERSION))
+    return {
+        (look_up_dict[src], look_up_dict[dst]): (np.array(J, dtype=np.int32), np.array(q, dtype=np.float32))
+        for src, dst, J, q in obj['alias_edges']
+        if src in look_up_dict and dst in look_up_dict
+    }
+
+
 def alias_setup(probs):
     '''
     Compute utility lists for non-uniform sampling from discrete distributions.
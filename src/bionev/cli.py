@@ -6,21 +6,25 @@ import json
 import os
 import random
 import time
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import click
-import networkx as nx
 
-from bionev.embed_train import embedding_training
-from bionev.pipeline import create_prediction_model, do_link_prediction, do_node_classification
-from bionev.utils import read_node_labels, split_train_test_graph, train_test_graph, read_graph
+import bionev.edgelist
+from bionev.embed_train import CSR_METHODS, embedding_training
+from bionev.edgelist import build_csr, read_edgelist
+from bionev.ranking import RANKING_CLASSIFIERS, RANKING_OPERATORS
+from bionev.utils import link_prediction_split, load_embedding, read_node_labels, train_test_graph
 
 
 @click.command()
 @click.option('--input', required=True, help='Input graph file. Only accepted edgelist format.')
 @click.option('--output', help='Output graph embedding file', default=None)
-@click.option('--task', type=click.Choice(['none', 'link-prediction', 'node-classification']), default=None,
+@click.option('--task', type=click.Choice(['none', 'link-prediction', 'node-classification']), multiple=True,
               help='Choose to evaluate the embedding quality based on a specific prediction task. '
-                   'None represents no evaluation, and only run for training embedding.')
+                   'None represents no evaluation, and only run for training embedding. '
+                   'Give it several times to evaluate one embedding on several tasks, concurrently; '
+                   'with link-prediction among them, the embedding is learned on its training edges.')
 @click.option('--testingratio', default=0.2, type=float, help='Testing set ratio for prediction tasks.'
                                                               'In link prediction, it splits all the known edges; '
                                                               'in node classification, it splits all the labeled nodes.')
@@ -39,9 +43,19 @@ from bionev.utils import read_node_labels, split_train_test_graph, train_test_gr
                                                    'and it controls how fast the walk explores.')
 @click.option('--q', default=1.0, type=float, help='q is a hyper-parameter for node2vec, '
                                                    'and it controls how fast the walk leaves the neighborhood of starting node.')
-@click.option('--method', required=True, type=click.Choice(['Laplacian', 'GF', 'SVD', 'HOPE', 'GraRep', 'DeepWalk',
+@click.option('--method', type=click.Choice(['Laplacian', 'GF', 'SVD', 'HOPE', 'GraRep', 'DeepWalk',
                                                             'node2vec', 'struc2vec', 'LINE', 'SDNE', 'GAE']),
-              help='The embedding learning method')
+              help='The embedding learning method. Required unless --embedding-input is given.')
+@click.option('--embedding-input', default=None,
+              help='Evaluate the embeddings of this file instead of learning them: a text file or a binary .npy '
+                   'file, saved with --output, which is memory-mapped. For link prediction they must have been '
+                   'learned without the testing edges, e.g. on --training-edgelist, or by an earlier run with the '
+                   'same --seed and --testingratio.')
+@click.option('--csr-dir', default=None,
+              help='Build the graph the embedding is learned on (--input, or --training-edgelist for link '
+                   'prediction) in this directory as memory-mapped CSR arrays, streaming the edge list, and '
+                   'train on it. For graphs that do not fit in memory; only for the %s methods.'
+                   % ', '.join(CSR_METHODS))
 @click.option('--label-file', default='', help='The label file for node classification')
 @click.option('--negative-ratio', default=5, type=int, help='the negative ratio of LINE')
 @click.option('--weighted', type=bool, default=False, help='Treat graph as weighted')
@@ -70,10 +84,51 @@ from bionev.utils import read_node_labels, split_train_test_graph, train_test_gr
 @click.option('--gae_model_selection', default='gcn_ae', type=str,
               help='gae model selection: gcn_ae or gcn_vae')
 @click.option('--eval-result-file', help='save evaluation performance')
-@click.option('--seed', default=random.randint(1, 10000000), type=int, help='seed value')
+@click.option('--seed', default=None, type=int, help='seed value. A random one is used if not given')
+@click.option('--cache-split', default=True, type=bool,
+              help='Reuse the link prediction split (training/testing and negative edges) of an earlier run '
+                   'with the same input, testing ratio and seed. Only used when --seed is given.')
+@click.option('--graph-cache/--no-graph-cache', default=True,
+              help='Keep the parsed input graph, and the link prediction split with --cache-split, in a '
+                   '.bionev-cache directory next to the input file. It is skipped when that directory is not '
+                   'writable.')
 @click.option('--training-edgelist', default=None, help='input training edgelist')
 @click.option('--testing-edgelist', default=None, help='input testing edgelist')
 @click.option('--model-path', default=None, help='save classifier model. Input filepath and name')
+@click.option('--classifier', 'classifiers', multiple=True, type=click.Choice(['LR', 'EN', 'ENCV', 'RF', 'SVM']),
+              help='Classifier used for the prediction task, LR by default. Give it several times to compare '
+                   'classifiers on the same features; they are then fitted in parallel.')
+@click.option('--svm-features', default=None, type=int,
+              help='Approximate the RBF kernel of the SVM link classifier with this many Nystroem features and '
+                   'train a linear model on them, which scales to large training sets. By default the exact SVM '
+                   'is trained.')
+@click.option('--eval-workers', default=1, type=int,
+              help='Number of parallel processes used to fit the classifiers when comparing them, to '
+                   'cross-validate the ENCV classifier, to fit the per-label classifiers of multi-label node '
+                   'classification, and to compute the ranking metrics. Not used with several --task, which '
+                   'already run in a process each.')
+@click.option('--bootstrap', default=0, type=int,
+              help='Report 95%% confidence intervals of the link prediction metrics, from this many bootstrap '
+                   'resamples of the testing edges')
+@click.option('--quick-eval', default=None, type=click.FloatRange(0, 1, min_open=True),
+              help='Only evaluate this fraction of the positive and of the negative testing edges, with '
+                   'confidence intervals from 200 bootstrap resamples unless --bootstrap is given. '
+                   'Meant for quickly screening hyper-parameters.')
+@click.option('--ranking-metrics', is_flag=True,
+              help='Also rank every testing edge among all the candidate links of its nodes and report the '
+                   'filtered MRR and Hits@1/10/100. Only for the LR, EN and ENCV classifiers and the hadamard, '
+                   'average and concat edge operators.')
+@click.option('--chunk-size', default=None, type=int,
+              help='Train the link classifier incrementally on chunks of this many edges, so that the whole '
+                   'feature matrix never has to fit in memory. Only for the LR and EN classifiers.')
+@click.option('--spill-dir', default=None,
+              help='With --chunk-size, compute the edge features once into a memory-mapped file in this '
+                   'directory instead of at every epoch.')
+@click.option('--streaming-epochs', default=5, type=click.IntRange(1),
+              help='With --chunk-size, the number of passes over the training edges.')
+@click.option('--edge-operator', default='hadamard',
+              type=click.Choice(['hadamard', 'average', 'l1', 'l2', 'concat']),
+              help='How the embeddings of two nodes are combined into the features of a link')
 def main(
     input,
     output,
@@ -88,6 +143,8 @@ def main(
     p,
     q,
     method,
+    embedding_input,
+    csr_dir,
     label_file,
     negative_ratio,
     weighted,
@@ -111,216 +168,443 @@ def main(
     gae_model_selection,
     eval_result_file,
     seed,
+    cache_split,
+    graph_cache,
     training_edgelist,
     testing_edgelist,
     model_path,
+    classifiers,
+    svm_features,
+    eval_workers,
+    ranking_metrics,
+    bootstrap,
+    quick_eval,
+    edge_operator,
+    chunk_size,
+    spill_dir,
+    streaming_epochs,
 ):
+    """Learn node embeddings and evaluate them on one or more prediction tasks."""
+    # imported here so that `bionev --help` does not pay for importing scikit-learn
+    from bionev.pipeline import (
+        compare_link_classifiers, compare_node_classifiers, create_prediction_model, do_link_prediction,
+        do_node_classification,
+    )
+
+    tasks = list(dict.fromkeys(task)) or ['none']
+    if 'none' in tasks and len(tasks) > 1:
+        raise click.UsageError("--task none cannot be combined with other tasks")
+    if 'node-classification' in tasks and not label_file:
+        raise ValueError("No input label file. Exit.")
+    if method is None and embedding_input is None:
+        raise click.UsageError('--method is required unless --embedding-input is given')
+    if csr_dir is not None:
+        if method not in CSR_METHODS:
+            raise click.UsageError('--csr-dir only works with the %s methods' % ', '.join(CSR_METHODS))
+        if 'link-prediction' in tasks and training_edgelist is None:
+            raise click.UsageError('--csr-dir with --task link-prediction needs --training-edgelist and '
+                                   '--testing-edgelist, the training graph of a random split is built in memory')
+    if len(classifiers) > 1:
+        # comparing classifiers only reports the five metrics of each, without saving a model
+        single_options = [
+            option
+            for option, value in [
+                ('--bootstrap', bootstrap), ('--quick-eval', quick_eval), ('--ranking-metrics', ranking_metrics),
+                ('--chunk-size', chunk_size), ('--spill-dir', spill_dir), ('--model-path', model_path),
+            ]
+            if value
+        ]
+        if single_options:
+            raise click.UsageError('%s cannot be combined with several --classifier' % ', '.join(single_options))
+        if tasks == ['none']:
+            raise click.UsageError('--task none trains a single classifier, give one --classifier')
+    if ranking_metrics:
+        # checked before the embedding is learned, rather than after the classifier has been fitted
+        if (classifiers[0] if classifiers else 'LR') not in RANKING_CLASSIFIERS:
+            raise click.UsageError('--ranking-metrics only works with the %s classifiers'
+                                   % ', '.join(RANKING_CLASSIFIERS))
+        if edge_operator not in RANKING_OPERATORS:
+            raise click.UsageError('--ranking-metrics only works with the %s edge operators'
+                                   % ', '.join(RANKING_OPERATORS))
+
+    bionev.edgelist.GRAPH_CACHE = graph_cache
+    cache_split = cache_split and seed is not None and graph_cache
+    if seed is None:
+        seed = random.randint(1, 10000000)
     np.random.seed(seed)
     random.seed(seed)
 
     print('#' * 70)
-    print('Embedding Method: %s, Evaluation Task: %s' % (method, task))
+    print('Embedding Method: %s, Evaluation Task: %s' % (method or embedding_input, ', '.join(tasks)))
     print('#' * 70)
-    if task == 'link-prediction':
-        input_graph = read_graph(input, weighted=weighted)
+    training_kwargs = dict(
+        method=method,
+        OPT1=opt1,
+        OPT2=opt2,
+        OPT3=opt3,
+        until_layer=until_layer,
+        workers=workers,
+        number_walks=number_walks,
+        walk_length=walk_length,
+        dimensions=dimensions,
+        window_size=window_size,
+        learning_rate=lr,
+        epochs=epochs,
+        hidden=hidden,
+        weight_decay=weight_decay,
+        dropout=dropout,
+        gae_model_selection=gae_model_selection,
+        kstep=kstep,
+        weighted=weighted,
+        p=p,
+        q=q,
+        order=order,
+        encoder_list=encoder_list,
+        alpha=alpha,
+        beta=beta,
+        nu1=nu1,
+        nu2=nu2,
+        batch_size=bs,
+    )
+
+    if tasks == ['none']:
+        time1 = time.time()
+        if embedding_input is not None:
+            embeddings = load_embedding(embedding_input)
+        else:
+            model = embedding_training(train_graph_filename=_training_graph_file(input, csr_dir, weighted),
+                                       **training_kwargs)
+            if output is not None:
+                model.save_embeddings(output)
+            embeddings = _model_embeddings(model, method)
+        original_graph = read_edgelist(input)
+        create_prediction_model(
+            embeddings=embeddings,
+            original_graph=original_graph,
+            save_model=model_path,
+            classifier_type=classifiers[0] if classifiers else None,
+            edge_operator=edge_operator,
+            chunk_size=chunk_size,
+            spill_dir=spill_dir,
+            streaming_epochs=streaming_epochs,
+            svm_features=svm_features,
+        )
+        embed_train_time = time.time() - time1
+        print('Embedding Learning Time: %.2f s' % embed_train_time)
+        return
+
+    # with link prediction among the tasks, the embedding is learned on its training edges only, and the other
+    # tasks reuse it
+    time1 = time.time()
+    if 'link-prediction' in tasks:
+        input_edges = read_edgelist(input, weighted=weighted)
+        train_neg_edges = test_neg_edges = None
         if None not in (training_edgelist, testing_edgelist):
-            g_train, testing_pos_edges, train_graph_filename = train_test_graph(
+            train_edges, testing_pos_edges = train_test_graph(
                 training_edgelist,
                 testing_edgelist,
                 weighted=weighted,
             )
         else:
-            g_train, testing_pos_edges, train_graph_filename = split_train_test_graph(
-                input_graph=input_graph,
-                weighted=weighted,
+            train_edges, testing_pos_edges, train_neg_edges, test_neg_edges = link_prediction_split(
+                input,
                 testing_ratio=testingratio,
+                seed=seed,
+                weighted=weighted,
+                cache=cache_split,
             )
         time1 = time.time()
-        model = embedding_training(
-            method=method,
-            train_graph_filename=train_graph_filename,
-            OPT1=opt1,
-            OPT2=opt2,
-            OPT3=opt3,
-            until_layer=until_layer,
-            workers=workers,
-            number_walks=number_walks,
-            walk_length=walk_length,
-            dimensions=dimensions,
-            window_size=window_size,
-            learning_rate=lr,
-            epochs=epochs,
-            hidden=hidden,
-            weight_decay=weight_decay,
-            dropout=dropout,
-            gae_model_selection=gae_model_selection,
-            kstep=kstep,
-            weighted=weighted,
-            p=p,
-            q=q,
-            order=order,
-            encoder_list=encoder_list,
-            alpha=alpha,
-            beta=beta,
-            nu1=nu1,
-            nu2=nu2,
-            batch_size=bs,
-        )
+    if embedding_input is not None:
+        embeddings = load_embedding(embedding_input)
+        embed_train_time = time.time() - time1
+        print('Embedding Loading Time: %.2f s' % embed_train_time)
+    else:
+        if csr_dir is not None:
+            model = embedding_training(
+                train_graph_filename=_training_graph_file(
+                    training_edgelist if 'link-prediction' in tasks else input, csr_dir, weighted),
+                **training_kwargs)
+        elif 'link-prediction' in tasks:
+            model = embedding_training(train_graph=train_edges, **training_kwargs)
+        else:
+            model = embedding_training(train_graph_filename=input, **training_kwargs)
         embed_train_time = time.time() - time1
         print('Embedding Learning Time: %.2f s' % embed_train_time)
         if output is not None:
             model.save_embeddings(output)
-        time1 = time.time()
-        print('Begin evaluation...')
-        if method == 'LINE':
-            embeddings = model.get_embeddings_train()
-        else:
-            embeddings = model.get_embeddings()
-        result = do_link_prediction(
+        embeddings = _model_embeddings(model, method)
+    print('Begin evaluation...')
+
+    # with several tasks, each already runs in a process of its own, which does not start another pool
+    task_workers = eval_workers if len(tasks) == 1 else 1
+    evaluations = {}
+    if 'link-prediction' in tasks:
+        link_kwargs = dict(
             embeddings=embeddings,
-            original_graph=input_graph,
-            train_graph=g_train,
+            original_graph=input_edges,
+            train_graph=train_edges,
             test_pos_edges=testing_pos_edges,
-            save_model=model_path
+            train_neg_edges=train_neg_edges,
+            test_neg_edges=test_neg_edges,
+            edge_operator=edge_operator,
+            svm_features=svm_features,
         )
-        eval_time = time.time() - time1
-        print('Prediction Task Time: %.2f s' % eval_time)
-        if None in (training_edgelist, testing_edgelist):
-            os.remove(train_graph_filename)
-
-    elif task == 'node-classification':
-        if not label_file:
-            raise ValueError("No input label file. Exit.")
-        node_list, labels = read_node_labels(label_file)
-        train_graph_filename = input
-        time1 = time.time()
-        model = embedding_training(
-            method=method,
-            train_graph_filename=train_graph_filename,
-            OPT1=opt1,
-            OPT2=opt2,
-            OPT3=opt3,
-            until_layer=until_layer,
-            workers=workers,
-            number_walks=number_walks,
-            walk_length=walk_length,
-            dimensions=dimensions,
-            window_size=window_size,
-            learning_rate=lr,
-            epochs=epochs,
-            hidden=hidden,
-            weight_decay=weight_decay,
-            dropout=dropout,
-            gae_model_selection=gae_model_selection,
-            kstep=kstep,
-            weighted=weighted,
-            p=p,
-            q=q,
-            order=order,
-            encoder_list=encoder_list,
-            alpha=alpha,
-            beta=beta,
-            nu1=nu1,
-            nu2=nu2,
-            batch_size=bs)
-        embed_train_time = time.time() - time1
-        print('Embedding Learning Time: %.2f s' % embed_train_time)
-        if output is not None:
-            model.save_embeddings(output)
-        time1 = time.time()
-        print('Begin evaluation...')
-        if method == 'LINE':
-            embeddings = model.get_embeddings_train()
+        if len(classifiers) > 1:
+            evaluations['link-prediction'] = compare_link_classifiers, dict(
+                link_kwargs,
+                classifier_types=classifiers,
+                workers=task_workers,
+            )
         else:
-            embeddings = model.get_embeddings()
-        result = do_node_classification(
+            evaluations['link-prediction'] = do_link_prediction, dict(
+                link_kwargs,
+                save_model=_task_model_path(model_path, 'link-prediction', tasks),
+                classifier_type=classifiers[0] if classifiers else None,
+                chunk_size=chunk_size,
+                spill_dir=spill_dir,
+                streaming_epochs=streaming_epochs,
+                ranking=ranking_metrics,
+                workers=task_workers,
+                bootstrap=bootstrap,
+                quick_eval=quick_eval,
+                random_state=seed,
+            )
+    if 'node-classification' in tasks:
+        node_list, labels = read_node_labels(label_file)
+        node_kwargs = dict(
             embeddings=embeddings,
             node_list=node_list,
             labels=labels,
             testing_ratio=testingratio,
-            save_model=model_path
-        )
-        eval_time = time.time() - time1
-        print('Prediction Task Time: %.2f s' % eval_time)
-    else:
-        train_graph_filename = input
-        time1 = time.time()
-        model = embedding_training(
-            method=method,
-            train_graph_filename=train_graph_filename,
-            OPT1=opt1,
-            OPT2=opt2,
-            OPT3=opt3,
-            until_layer=until_layer,
-            workers=workers,
-            number_walks=number_walks,
-            walk_length=walk_length,
-            dimensions=dimensions,
-            window_size=window_size,
-            learning_rate=lr,
-            epochs=epochs,
-            hidden=hidden,
-            weight_decay=weight_decay,
-            dropout=dropout,
-            gae_model_selection=gae_model_selection,
-            kstep=kstep,
-            weighted=weighted,
-            p=p,
-            q=q,
-            order=order,
-            encoder_list=encoder_list,
-            alpha=alpha,
-            beta=beta,
-            nu1=nu1,
-            nu2=nu2,
-            batch_size=bs
-        )
-        if output is not None:
-            model.save_embeddings(output)
-        original_graph = nx.read_edgelist(input)
-        if method == 'LINE':
-            embeddings = model.get_embeddings_train()
-        else:
-            embeddings = model.get_embeddings()
-        create_prediction_model(
-            embeddings=embeddings,
-            original_graph=original_graph,
-            save_model=model_path
+            workers=task_workers,
         )
-        embed_train_time = time.time() - time1
-        print('Embedding Learning Time: %.2f s' % embed_train_time)
-
-    if eval_result_file and result:
-        _results = dict(
-            input=input,
-            task=task,
-            method=method,
-            dimension=dimensions,
-            user=getpass.getuser(),
-            date=datetime.datetime.now().strftime('%Y-%m-%d-%H%M%S'),
-        )
-
-        if task == 'link-prediction':
-            auc_roc, auc_pr, accuracy, f1, mcc = result
-            _results['results'] = dict(
-                auc_roc=auc_roc,
-                auc_pr=auc_pr,
-                accuracy=accuracy,
-                f1=f1,
-                mcc=mcc,
+        if len(classifiers) > 1:
+            evaluations['node-classification'] = compare_node_classifiers, dict(
+                node_kwargs,
+                classifier_types=classifiers,
             )
         else:
-            accuracy, f1_micro, f1_macro, mcc = result
-            _results['results'] = dict(
-                accuracy=accuracy,
-                f1_micro=f1_micro,
-                f1_macro=f1_macro,
-                mcc=mcc
+            evaluations['node-classification'] = do_node_classification, dict(
+                node_kwargs,
+                save_model=_task_model_path(model_path, 'node-classification', tasks),
+                classifier_type=classifiers[0] if classifiers else None,
             )
 
+    results = _run_evaluations(evaluations, seed)
+    for task_name, (result, eval_time) in results.items():
+        print('Prediction Task Time (%s): %.2f s' % (task_name, eval_time))
+
+    if eval_result_file:
         with open(eval_result_file, 'a+') as wf:
-            print(json.dumps(_results, sort_keys=True), file=wf)
+            for task_name, (result, eval_time) in results.items():
+                if not result:
+                    continue
+                _results = dict(
+                    input=input,
+                    task=task_name,
+                    method=method,
+                    dimension=dimensions if embedding_input is None else embeddings.dimensions,
+                    user=getpass.getuser(),
+                    date=datetime.datetime.now().strftime('%Y-%m-%d-%H%M%S'),
+                    embedding_time=embed_train_time,
+                    evaluation_time=eval_time,
+                )
+                if embedding_input is not None:
+                    _results['embedding_input'] = embedding_input
+                if task_name == 'link-prediction':
+                    metrics = ['auc_roc', 'auc_pr', 'accuracy', 'f1', 'mcc']
+                    if ranking_metrics:
+                        metrics += ['mrr', 'hits@1', 'hits@10', 'hits@100']
+                    if bootstrap or quick_eval:
+                        metrics += [
+                            '%s_%s' % (metric, bound)
+                            for metric in ['auc_roc', 'auc_pr', 'accuracy', 'f1', 'mcc']
+                            for bound in ['low', 'high']
+                        ]
+                else:
+                    metrics = ['accuracy', 'f1_micro', 'f1_macro', 'mcc']
+                if isinstance(result, dict):
+                    _results['results'] = {
+                        classifier: dict(zip(metrics, scores))
+                        for classifier, scores in result.items()
+                    }
+                else:
+                    _results['results'] = dict(zip(metrics, result))
+                print(json.dumps(_results, sort_keys=True), file=wf)
+
+
+def _training_graph_file(edgelist, csr_dir, weighted):
+    """The edge list to learn the embedding on, or the CSR directory it is first built in if ``csr_dir`` is set."""
+    if csr_dir is None:
+        return edgelist
+    time1 = time.time()
+    build_csr(edgelist, csr_dir, weighted=weighted)
+    print('Built the CSR graph of %s in %s in %.2f s' % (edgelist, csr_dir, time.time() - time1))
+    return csr_dir
+
+
+def _model_embeddings(model, method):
+    if method == 'LINE':
+        return model.get_embeddings_train()
+    return model.get_embeddings()
+
+
+def _task_model_path(model_path, task, tasks):
+    """With several tasks, each saves its classifier under its own name: ``model.pkl`` -> ``model.<task>.pkl``."""
+    if model_path is None or len(tasks) == 1:
+        return model_path
+    root, ext = os.path.splitext(model_path)
+    return '%s.%s%s' % (root, task, ext)
+
+
+def _evaluate(evaluate, seed, kwargs):
+    """Run one evaluation from a freshly seeded random state, returning its result and duration."""
+    np.random.seed(seed)
+    random.seed(seed)
+    time1 = time.time()
+    result = evaluate(**kwargs)
+    return result, time.time() - time1
+
+
+def _run_evaluations(evaluations, seed):
+    """Run the evaluations of a dict of task -> (function, kwargs), concurrently in processes if several.
+
+    Each evaluation starts from the same seed, so its results do not depend on the other tasks.
+
+    :return: a dict of task -> (result, seconds)
+    """
+    if len(evaluations) == 1:
+        return {task: _evaluate(evaluate, seed, kwargs) for task, (evaluate, kwargs) in evaluations.items()}
+    with ProcessPoolExecutor(max_workers=len(evaluations)) as executor:
+        futures = {
+            task: executor.submit(_evaluate, evaluate, seed, kwargs)
+            for task, (evaluate, kwargs) in evaluations.items()
+        }
+        return {task: future.result() for task, future in futures.items()}
+
+
+class _DefaultCommandGroup(click.Group):
+    """Runs the ``run`` command unless a subcommand is named, so that ``bionev --input ...`` keeps working."""
+
+    def parse_args(self, ctx, args):
+        if args and args[0] not in self.commands and args[0] not in ctx.help_option_names:
+            args = ['run'] + args
+        return super().parse_args(ctx, args)
+
+
+@click.group(cls=_DefaultCommandGroup)
+def more_main():
+    """Biomedical Network Embedding Evaluation.
+
+    Without a command, the options are those of 'bionev run'.
+    """
+
+
+more_main.add_command(main, name='run')
+
+
+@more_main.command()
+@click.option('--model', 'model_path', required=True, help='Classifier saved with --model-path')
+@click.option('--embeddings', required=True, help='Embeddings saved with --output, preferably as .npy')
+@click.option('--pairs', required=True, help='Candidate node pairs to score, one "u v" per line (may be compressed)')
+@click.option('--output', required=True, help='Output file of "u v score" lines')
+@click.option('--edge-operator', default='hadamard',
+              type=click.Choice(['hadamard', 'average', 'l1', 'l2', 'concat']),
+              help='How the embeddings of two nodes are combined, as when the classifier was trained')
+@click.option('--workers', default=1, type=int, help='Number of parallel processes')
+@click.option('--chunk-size', default=1 << 24, type=int, help='Bytes of the pair file scored at once per process')
+def score(model_path, embeddings, pairs, output, edge_operator, workers, chunk_size):
+    """Score candidate links with a saved link prediction model."""
+    from bionev.scoring import score_file
+
+    time1 = time.time()
+    num_pairs = score_file(model_path, embeddings, pairs, output, operator=edge_operator, workers=workers,
+                           chunk_size=chunk_size)
+    print('Scored %d pairs in %.2f s' % (num_pairs, time.time() - time1))
+
+
+@more_main.command()
+@click.option('--model', 'model_path', required=True, help='Linear (LR, EN or ENCV) classifier saved with --model-path')
+@click.option('--embeddings', required=True, help='Embeddings saved with --output')
+@click.option('--known-edges', default=None, help='Edgelist of the known links, which are never returned')
+@click.option('--queries', default=None, help='File with the node ids to rank links for, one per line. '
+                                              'All nodes by default.')
+@click.option('--candidates', default=None, help='File with the node ids that can be linked to, one per line. '
+                                                 'All nodes by default.')
+@click.option('--top-k', default=10, type=int, help='Number of links returned per query node')
+@click.option('--output', required=True, help='Output file of "query target score" lines, best first')
+@click.option('--edge-operator', default='hadamard', type=click.Choice(RANKING_OPERATORS),
+              help='How the embeddings of two nodes are combined, as when the classifier was trained')
+@click.option('--block-size', default=1024, type=int, help='Number of query nodes scored at once')
+def rank(model_path, embeddings, known_edges, queries, candidates, top_k, output, edge_operator, block_size):
+    """Rank the most likely new links of each query node."""
+    import joblib
+    from bionev.embedding import load_embeddings
+    from bionev.ranking import LinkRanker
+
+    time1 = time.time()
+    ranker = LinkRanker(
+        load_embeddings(embeddings),
+        joblib.load(model_path),
+        operator=edge_operator,
+        known_edges=known_edges,
+        candidates=_read_node_ids(candidates),
+    )
+    with open(output, 'w') as out:
+        for query_ids, targets, scores in ranker.top_k(_read_node_ids(queries), k=top_k, block_size=block_size):
+            for query, row_targets, row_scores in zip(query_ids, targets.tolist(), scores.tolist()):
+                for target, score in zip(row_targets, row_scores):
+                    if target is not None:
+                        print('%s\t%s\t%.6g' % (query, target, score), file=out)
+    print('Ranked links in %.2f s' % (time.time() - time1))
+
+
+@more_main.command()
+@click.option('--embeddings', default=None, help='Embeddings saved with --output. Needed unless --index exists.')
+@click.option('--index', 'index_dir', default=None,
+              help='Directory of the nearest-neighbour index. It is built from --embeddings if it does not exist.')
+@click.option('--queries', default=None, help='File with the node ids to query, one per line. All nodes by default.')
+@click.option('--top-k', default=10, type=int, help='Number of neighbours returned per query node')
+@click.option('--n-lists', default=None, type=int, help='Number of index lists, about sqrt(#nodes) by default')
+@click.option('--n-probe', default=8, type=int, help='Number of index lists scanned per query')
+@click.option('--exact', is_flag=True, help='Scan every embedding instead of using an index')
+@click.option('--output', required=True, help='Output file of "query neighbour similarity" lines, best first')
+def neighbors(embeddings, index_dir, queries, top_k, n_lists, n_probe, exact, output):
+    """Find the most cosine-similar nodes of each query node."""
+    from bionev.embedding import load_embeddings
+    from bionev.neighbors import build_index, exact_neighbors, load_index
+
+    time1 = time.time()
+    if exact or (index_dir is None or not os.path.exists(index_dir)):
+        if embeddings is None:
+            raise click.UsageError('--embeddings is needed without an existing --index')
+        embeddings = load_embeddings(embeddings)
+    if exact:
+        results = exact_neighbors(embeddings, _read_node_ids(queries), k=top_k)
+    else:
+        if index_dir is not None and os.path.exists(index_dir):
+            index = load_index(index_dir)
+        else:
+            index = build_index(embeddings, n_lists=n_lists)
+            print('Built an index of %d lists in %.2f s' % (index.n_lists, time.time() - time1))
+            if index_dir is not None:
+                index.save(index_dir)
+        results = index.neighbors(_read_node_ids(queries), k=top_k, n_probe=n_probe)
+    with open(output, 'w') as out:
+        for query_ids, neighbor_ids, similarities in results:
+            for query, row_neighbors, row_similarities in zip(query_ids, neighbor_ids.tolist(), similarities.tolist()):
+                for neighbor, similarity in zip(row_neighbors, row_similarities):
+                    if neighbor is not None:
+                        print('%s\t%s\t%.6g' % (query, neighbor, similarity), file=out)
+    print('Found neighbours in %.2f s' % (time.time() - time1))
+
+
+def _read_node_ids(filename):
+    if filename is None:
+        return None
+    with open(filename) as f:
+        return f.read().split()
 
 
 if __name__ == "__main__":
-    main()
+    more_main()
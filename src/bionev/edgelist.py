@@ -0,0 +1,525 @@
+# -*- coding: utf-8 -*-
+
+"""Bulk edge list parsing shared by all graph loaders."""
+
+import hashlib
+import json
+import os
+import queue
+import shutil
+import threading
+from collections import namedtuple
+
+import networkx as nx
+import numpy as np
+
+EdgeList = namedtuple('EdgeList', ['nodes', 'src', 'dst', 'weights'])
+EdgeList.__doc__ = """Parsed edge list.
+
+``nodes`` lists the node ids (str) in order of first appearance, ``src`` and ``dst`` are integer indices
+into ``nodes`` and ``weights`` is a float array, or None for an unweighted edge list.
+"""
+
+CACHE_SUFFIX = '.bionev-cache'
+CACHE_VERSION = 3
+CACHE_ARRAYS = ('nodes', 'src', 'dst', 'weights')
+# whether read_edgelist uses the sidecar cache by default; the CLI turns it off with --no-graph-cache
+GRAPH_CACHE = True
+
+
+def read_edgelist(filename, weighted=False, cache=None):
+    """Load an edge list, going through its binary sidecar cache when ``cache`` is set.
+
+    The first load parses the text file and writes the cache; later loads memory-map the cached arrays.
+    ``cache`` defaults to :data:`GRAPH_CACHE`. When the directory of the file is not writable, an existing
+    cache is still read but the file is parsed directly otherwise.
+    """
+    if cache is None:
+        cache = GRAPH_CACHE
+    if not cache:
+        return parse_edgelist(filename, weighted=weighted)
+    edges = load_graph_cache(filename)
+    if edges is None:
+        if not _cache_writable(filename):
+            return parse_edgelist(filename, weighted=weighted)
+        edges = parse_edgelist(filename, weighted=None)
+        save_graph_cache(filename, edges)
+    if not weighted:
+        return edges._replace(weights=None)
+    if edges.weights is None:
+        raise ValueError('%s has no weight column' % filename)
+    return edges
+
+
+def parse_edgelist(filename, weighted=False, chunk_size=1 << 26):
+    """Parse a whitespace separated, optionally compressed, edge list file in a single pass.
+
+    The file is tokenized in chunks of about ``chunk_size`` bytes. A compressed file is decompressed in a
+    background thread while the previous chunk is being parsed.
+    """
+    with open_edgelist(filename) as f:
+        chunks = iter_chunks(f, chunk_size)
+        if compression(filename) is not None:
+            chunks = prefetch(chunks)
+        return merge_edgelists((parse_edgelist_bytes(chunk, weighted=weighted) for chunk in chunks),
+                               weighted=weighted)
+
+
+def merge_edgelists(parts, weighted=False):
+    """Concatenate :class:`EdgeList` parts, re-interning their node ids in order of first appearance."""
+    index = {}
+    src, dst, weights = [], [], []
+    for part in parts:
+        codes = np.fromiter((index.setdefault(node, len(index)) for node in part.nodes),
+                            dtype=np.int64, count=len(part.nodes))
+        src.append(codes[part.src])
+        dst.append(codes[part.dst])
+        weights.append(part.weights)
+    if not src:
+        return EdgeList([], np.zeros(0, np.int64), np.zeros(0, np.int64),
+                        np.zeros(0, np.float64) if weighted else None)
+    if any(w is None for w in weights):
+        weights = None
+    else:
+        weights = np.concatenate(weights)
+    return EdgeList(list(index), np.concatenate(src), np.concatenate(dst), weights)
+
+
+COMPRESSION_MAGIC = [
+    (b'\x1f\x8b', 'gzip'),
+    (b'BZh', 'bz2'),
+    (b'\xfd7zXZ\x00', 'xz'),
+    (b'\x28\xb5\x2f\xfd', 'zstd'),
+]
+
+
+def compression(filename):
+    """Compression format of a file (``gzip``, ``bz2``, ``xz`` or ``zstd``) from its magic bytes, or None."""
+    with open(filename, 'rb') as f:
+        head = f.read(6)
+    for magic, name in COMPRESSION_MAGIC:
+        if head.startswith(magic) and (name != 'bz2' or head[3:4].isdigit()):
+            return name
+    return None
+
+
+def open_edgelist(filename):
+    """Open an edge list for reading bytes, decompressing it on the fly if it is compressed."""
+    kind = compression(filename)
+    if kind == 'gzip':
+        import gzip
+        return gzip.open(filename, 'rb')
+    if kind == 'bz2':
+        import bz2
+        return bz2.open(filename, 'rb')
+    if kind == 'xz':
+        import lzma
+        return lzma.open(filename, 'rb')
+    if kind == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError('Reading zstd compressed edge lists requires the zstandard package')
+        return zstandard.ZstdDecompressor().stream_reader(open(filename, 'rb'), closefd=True)
+    return open(filename, 'rb')
+
+
+def prefetch(iterable, depth=2):
+    """Produce the items of ``iterable`` in a background thread, up to ``depth`` items ahead of the consumer."""
+    items = queue.Queue(maxsize=depth)
+    done = object()
+
+    def produce():
+        try:
+            for item in iterable:
+                items.put((item, None))
+        except Exception as e:
+            items.put((None, e))
+        items.put((done, None))
+
+    threading.Thread(target=produce, daemon=True).start()
+    while True:
+        item, error = items.get()
+        if error is not None:
+            raise error
+        if item is done:
+            return
+        yield item
+
+
+def parse_edgelist_bytes(data, weighted=False):
+    """Tokenize the whole edge list at once and intern the node ids with numpy.
+
+    Lines are ``src dst`` or ``src dst weight``; columns after those are ignored, so are comments
+    starting with ``#``. A line holding a single node id adds that node without any edge.
+    With ``weighted=None`` the weights are read only if every line has a numeric third column.
+    """
+    if b'#' in data:
+        data = b'\n'.join(line.split(b'#', 1)[0] for line in data.splitlines())
+    ncols = _count_columns(data)
+    if ncols < 2 or (weighted and ncols < 3):
+        return _parse_ragged(data, weighted=weighted)
+    tokens = np.array(data.split()).reshape(-1, ncols)
+    weights = None
+    if weighted or (weighted is None and ncols > 2):
+        try:
+            weights = tokens[:, 2].astype(np.float64)
+        except ValueError:
+            if weighted:
+                raise
+    nodes, codes = intern_nodes(tokens[:, :2].ravel())
+    return EdgeList(nodes, codes[0::2], codes[1::2], weights)
+
+
+def _count_columns(data):
+    """Number of columns of the non-empty lines, or -1 if they do not all have the same number."""
+    counts = {len(line.split()) for line in data.splitlines()}
+    counts.discard(0)
+    if len(counts) > 1:
+        return -1
+    return counts.pop() if counts else 0
+
+
+def _parse_ragged(data, weighted=False):
+    """Slow path for edge lists whose lines do not all have the same number of columns."""
+    tokens = []
+    edge_mask = []
+    weights = []
+    for line in data.splitlines():
+        vec = line.split()
+        if len(vec) == 1:
+            tokens.append(vec[0])
+            edge_mask.append(False)
+        elif len(vec) > 1:
+            tokens.extend(vec[:2])
+            edge_mask.extend([True, True])
+            weights.append(vec[2] if len(vec) > 2 else None)
+    if weighted is False:
+        weights = None
+    else:
+        try:
+            weights = np.array([float(w) for w in weights], dtype=np.float64)
+        except (TypeError, ValueError):
+            if weighted:
+                raise
+            weights = None
+    nodes, codes = intern_nodes(np.array(tokens, dtype=bytes))
+    codes = codes[np.array(edge_mask, dtype=bool)]
+    return EdgeList(nodes, codes[0::2], codes[1::2], weights)
+
+
+def intern_nodes(tokens):
+    """Map an array of byte string node ids to int64 codes numbered by first appearance."""
+    uniq, first, inverse = np.unique(tokens, return_index=True, return_inverse=True)
+    order = np.argsort(first, kind='stable')
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    nodes = np.char.decode(uniq[order], 'utf-8').tolist() if len(uniq) else []
+    return nodes, rank[inverse.ravel()]
+
+
+def from_networkx(graph, weighted=False):
+    """Convert a networkx graph to an :class:`EdgeList`, reading the ``weight`` edge attribute if weighted."""
+    nodes = list(graph.nodes())
+    look_up = {node: i for i, node in enumerate(nodes)}
+    m = graph.number_of_edges()
+    src = np.fromiter((look_up[u] for u, _ in graph.edges()), dtype=np.int64, count=m)
+    dst = np.fromiter((look_up[v] for _, v in graph.edges()), dtype=np.int64, count=m)
+    weights = None
+    if weighted:
+        weights = np.fromiter((w for _, _, w in graph.edges(data='weight', default=1.0)), dtype=np.float64, count=m)
+    return EdgeList(nodes, src, dst, weights)
+
+
+def load_edges(graph, weighted=False):
+    """Get an :class:`EdgeList` from an edge list filename, a networkx graph or an :class:`EdgeList`."""
+    if isinstance(graph, EdgeList):
+        return graph if weighted else graph._replace(weights=None)
+    if isinstance(graph, nx.Graph):
+        return from_networkx(graph, weighted=weighted)
+    return read_edgelist(graph, weighted=weighted)
+
+
+def to_networkx(edges, create_using=None):
+    """Build a networkx graph from an :class:`EdgeList`, with a ``weight`` attribute if it is weighted."""
+    graph = nx.Graph() if create_using is None else create_using
+    graph.add_nodes_from(edges.nodes)
+    nodes = edges.nodes
+    pairs = ((nodes[u], nodes[v]) for u, v in zip(edges.src.tolist(), edges.dst.tolist()))
+    if edges.weights is None:
+        graph.add_edges_from(pairs)
+    else:
+        graph.add_weighted_edges_from((u, v, w) for (u, v), w in zip(pairs, edges.weights.tolist()))
+    return graph
+
+
+def unique_edges(edges, directed=False):
+    """Drop repeated edges, keeping the weight of the last occurrence like a networkx graph does.
+
+    Unless ``directed``, ``u v`` and ``v u`` are the same edge. The remaining edges keep their file order.
+    """
+    n = len(edges.nodes)
+    src = np.asarray(edges.src, dtype=np.int64)
+    dst = np.asarray(edges.dst, dtype=np.int64)
+    if directed:
+        keys = src * n + dst
+    else:
+        keys = np.minimum(src, dst) * n + np.maximum(src, dst)
+    _, last = np.unique(keys[::-1], return_index=True)
+    keep = np.sort(len(keys) - 1 - last)
+    weights = None if edges.weights is None else edges.weights[keep]
+    return EdgeList(edges.nodes, edges.src[keep], edges.dst[keep], weights)
+
+
+def _cache_dir(filename):
+    return filename + CACHE_SUFFIX
+
+
+def _cache_writable(filename):
+    """Whether the graph cache of ``filename`` can be (re)written, i.e. the directory of the file is writable."""
+    return os.access(os.path.dirname(os.path.abspath(filename)), os.W_OK)
+
+
+def _hash_file(filename, chunk_size=1 << 20):
+    digest = hashlib.sha1()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _fingerprint(filename, content_hash=None):
+    stat = os.stat(filename)
+    return dict(
+        version=CACHE_VERSION,
+        path=os.path.abspath(filename),
+        size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+        sha1=content_hash or _hash_file(filename),
+    )
+
+
+def load_graph_cache(filename):
+    """Open the cached edge list of ``filename`` memory-mapped, or return None if it is missing or stale.
+
+    A cache whose path, size and mtime all match is used as is. If only the path or mtime changed
+    (the file was moved, copied or touched) the content hash decides.
+    """
+    cache_dir = _cache_dir(filename)
+    try:
+        with open(os.path.join(cache_dir, 'fingerprint.json')) as f:
+            cached = json.load(f)
+        stat = os.stat(filename)
+    except (OSError, ValueError):
+        return None
+    if cached.get('version') != CACHE_VERSION or cached.get('size') != stat.st_size:
+        return None
+    if (cached.get('path'), cached.get('mtime_ns')) != (os.path.abspath(filename), stat.st_mtime_ns):
+        if cached.get('sha1') != _hash_file(filename):
+            return None
+
+    arrays = {}
+    for name in CACHE_ARRAYS:
+        path = os.path.join(cache_dir, name + '.npy')
+        if name == 'weights' and not os.path.exists(path):
+            arrays[name] = None
+            continue
+        try:
+            arrays[name] = np.load(path, mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+    return EdgeList(arrays['nodes'].tolist(), arrays['src'], arrays['dst'], arrays['weights'])
+
+
+def save_graph_cache(filename, edges):
+    """Write ``edges`` to the sidecar cache of ``filename`` as memory-mappable ``.npy`` arrays.
+
+    The edges keep their file order, so a seeded split of a cached graph matches that of the parsed one.
+    Failing to write the cache (e.g. a read-only data directory) is not an error.
+    """
+    arrays = dict(
+        nodes=np.array(edges.nodes, dtype=str),
+        src=np.asarray(edges.src, dtype=np.int32),
+        dst=np.asarray(edges.dst, dtype=np.int32),
+    )
+    if edges.weights is not None:
+        arrays['weights'] = np.asarray(edges.weights, dtype=np.float64)
+    if not _cache_writable(filename):
+        return
+    try:
+        fingerprint = _fingerprint(filename)
+    except OSError:
+        return
+    save_arrays(_cache_dir(filename), arrays, fingerprint)
+
+
+def save_arrays(directory, arrays, fingerprint):
+    """Replace ``directory`` by one holding ``arrays`` as ``.npy`` files and ``fingerprint`` as JSON.
+
+    The files are written to a temporary directory first, so readers never see a partial cache. Failing to
+    write (e.g. a read-only data directory) is not an error.
+    """
+    tmp_dir = '%s.tmp-%d' % (directory, os.getpid())
+    try:
+        os.makedirs(tmp_dir)
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_dir, name + '.npy'), array)
+        with open(os.path.join(tmp_dir, 'fingerprint.json'), 'w') as f:
+            json.dump(fingerprint, f)
+        if os.path.isdir(directory):
+            shutil.rmtree(directory)
+        os.rename(tmp_dir, directory)
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def content_hash(filename):
+    """SHA-1 of ``filename``, read from its graph cache when that is up to date."""
+    try:
+        with open(os.path.join(_cache_dir(filename), 'fingerprint.json')) as f:
+            cached = json.load(f)
+        stat = os.stat(filename)
+        if (cached.get('path'), cached.get('size'), cached.get('mtime_ns')) == \
+                (os.path.abspath(filename), stat.st_size, stat.st_mtime_ns):
+            return cached['sha1']
+    except (OSError, ValueError, KeyError):
+        pass
+    return _hash_file(filename)
+
+
+def iter_chunks(f, chunk_size=1 << 26):
+    """Read a binary file in chunks of about ``chunk_size`` bytes that end on a line boundary."""
+    remainder = b''
+    while True:
+        data = f.read(chunk_size)
+        if not data:
+            break
+        data = remainder + data
+        cut = data.rfind(b'\n') + 1
+        if cut == 0:
+            remainder = data
+            continue
+        remainder = data[cut:]
+        yield data[:cut]
+    if remainder:
+        yield remainder
+
+
+def build_csr(filename, csr_dir, weighted=False, directed=False, chunk_size=1 << 26):
+    """Build the CSR graph of an edge list on disk, for graphs that do not fit in memory.
+
+    The (optionally compressed) edge list is streamed in chunks of ``chunk_size`` bytes, read ahead in a
+    background thread. The first pass interns the node ids and spills
+    the edges to temporary files, the second scatters them into memory-mapped ``.npy`` arrays in ``csr_dir``,
+    which are then sorted and de-duplicated one block of rows at a time. Besides one chunk, only the node index
+    and the per-node ``indptr`` are held in memory. Open the result with :func:`load_csr`.
+    """
+    if not os.path.isdir(csr_dir):
+        os.makedirs(csr_dir)
+    tmp = {name: os.path.join(csr_dir, name + '.tmp') for name in ('src', 'dst', 'weights')}
+
+    # pass 1: intern node ids, count degrees and spill the edges as int32 / float32 arrays
+    index = {}
+    degree = np.zeros(1024, dtype=np.int64)
+    num_edges = 0
+    with open_edgelist(filename) as f, open(tmp['src'], 'wb') as fsrc, open(tmp['dst'], 'wb') as fdst, \
+            open(tmp['weights'], 'wb') as fweights:
+        for chunk in prefetch(iter_chunks(f, chunk_size)):
+            edges = parse_edgelist_bytes(chunk, weighted=weighted)
+            codes = np.fromiter((index.setdefault(node, len(index)) for node in edges.nodes),
+                                dtype=np.int64, count=len(edges.nodes))
+            src, dst = codes[edges.src], codes[edges.dst]
+            if len(index) > len(degree):
+                degree = np.concatenate([degree, np.zeros(max(len(index), 2 * len(degree)) - len(degree), np.int64)])
+            degree += np.bincount(src, minlength=len(degree))
+            if not directed:
+                degree += np.bincount(dst, minlength=len(degree))
+            fsrc.write(src.astype(np.int32).tobytes())
+            fdst.write(dst.astype(np.int32).tobytes())
+            if weighted:
+                fweights.write(edges.weights.astype(np.float32).tobytes())
+            num_edges += len(src)
+
+    # pass 2: scatter every edge (and its reverse) into its row
+    n = len(index)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(degree[:n], out=indptr[1:])
+    nnz = int(indptr[-1])
+    fill = indptr[:-1].copy()
+    indices = np.lib.format.open_memmap(os.path.join(csr_dir, 'indices.npy'), mode='w+', dtype=np.int32,
+                                        shape=(nnz,))
+    weights = np.lib.format.open_memmap(os.path.join(csr_dir, 'weights.npy'), mode='w+', dtype=np.float32,
+                                        shape=(nnz,))
+    batch = max(chunk_size // 16, 1)
+    for start in range(0, num_edges, batch):
+        count = min(batch, num_edges - start)
+        src = np.fromfile(tmp['src'], dtype=np.int32, count=count, offset=4 * start)
+        dst = np.fromfile(tmp['dst'], dtype=np.int32, count=count, offset=4 * start)
+        if weighted:
+            w = np.fromfile(tmp['weights'], dtype=np.float32, count=count, offset=4 * start)
+        else:
+            w = np.ones(count, dtype=np.float32)
+        if not directed:
+            # interleaved, so that a later duplicate of an edge still overrides an earlier one
+            src, dst = np.stack([src, dst], axis=1).ravel(), np.stack([dst, src], axis=1).ravel()
+            w = np.repeat(w, 2)
+        order = np.argsort(src, kind='stable')
+        src, dst, w = src[order], dst[order], w[order]
+        group_start = np.searchsorted(src, src)
+        pos = fill[src] + np.arange(len(src)) - group_start
+        indices[pos] = dst
+        weights[pos] = w
+        fill += np.bincount(src, minlength=n)
+    for name in ('src', 'dst', 'weights'):
+        os.remove(tmp[name])
+
+    # sort each row and drop repeated edges (keeping the last one), compacting the arrays in place
+    row_nnz = np.zeros(n, dtype=np.int64)
+    write = 0
+    row = 0
+    while row < n:
+        end = max(int(np.searchsorted(indptr, indptr[row] + batch, side='right')) - 1, row + 1)
+        lo, hi = int(indptr[row]), int(indptr[end])
+        rows = np.repeat(np.arange(row, end), np.diff(indptr[row:end + 1]))
+        cols = np.array(indices[lo:hi])
+        w = np.array(weights[lo:hi])
+        order = np.lexsort((cols, rows))
+        rows, cols, w = rows[order], cols[order], w[order]
+        keep = np.ones(len(rows), dtype=bool)
+        keep[:-1] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+        kept = int(keep.sum())
+        indices[write:write + kept] = cols[keep]
+        weights[write:write + kept] = w[keep]
+        row_nnz[row:end] = np.bincount(rows[keep] - row, minlength=end - row)
+        write += kept
+        row = end
+    np.cumsum(row_nnz, out=indptr[1:])
+
+    indices.flush()
+    weights.flush()
+    del indices, weights
+    if write < nnz:
+        for name in ('indices', 'weights'):
+            _truncate_npy(os.path.join(csr_dir, name + '.npy'), write, batch)
+    np.save(os.path.join(csr_dir, 'indptr.npy'), indptr)
+    np.save(os.path.join(csr_dir, 'nodes.npy'), np.array(list(index), dtype=str))
+
+
+def _truncate_npy(path, length, batch):
+    """Shrink a 1-d ``.npy`` array to its first ``length`` items, copying them in batches."""
+    old = np.load(path, mmap_mode='r')
+    new = np.lib.format.open_memmap(path + '.tmp', mode='w+', dtype=old.dtype, shape=(length,))
+    for start in range(0, length, batch):
+        stop = min(start + batch, length)
+        new[start:stop] = old[start:stop]
+    new.flush()
+    del old, new
+    os.replace(path + '.tmp', path)
+
+
+def load_csr(csr_dir, mmap_mode='r'):
+    """Open a CSR graph written by :func:`build_csr`; returns ``nodes, indptr, indices, weights``."""
+    arrays = [np.load(os.path.join(csr_dir, name + '.npy'), mmap_mode=mmap_mode)
+              for name in ('indptr', 'indices', 'weights')]
+    nodes = np.load(os.path.join(csr_dir, 'nodes.npy')).tolist()
+    return [nodes] + arrays
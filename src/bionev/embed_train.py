@@ -1,23 +1,45 @@
 # -*- coding: utf-8 -*-
 
 import ast
+import importlib
 import logging
 import os
 
-from gensim.models import Word2Vec
-from gensim.models.word2vec import LineSentence
-
-from bionev.GAE.train_model import gae_model
-from bionev.OpenNE import gf, grarep, hope, lap, line, node2vec, sdne
-from bionev.SVD.model import SVD_embedding
-from bionev.struc2vec import struc2vec
 from bionev.utils import *
 
+# The backend of each method is only imported when the method is trained, so that e.g. an SVD run
+# does not pay for importing TensorFlow, gensim and fastdtw.
+METHOD_MODULES = {
+    'Laplacian': 'bionev.OpenNE.lap',
+    'GF': 'bionev.OpenNE.gf',
+    'SVD': 'bionev.SVD.model',
+    'HOPE': 'bionev.OpenNE.hope',
+    'GraRep': 'bionev.OpenNE.grarep',
+    'DeepWalk': 'bionev.OpenNE.node2vec',
+    'node2vec': 'bionev.OpenNE.node2vec',
+    'struc2vec': 'bionev.struc2vec.struc2vec',
+    'LINE': 'bionev.OpenNE.line',
+    'SDNE': 'bionev.OpenNE.sdne',
+    'GAE': 'bionev.GAE.train_model',
+}
+# the methods that can train on a graph built on disk by bionev.edgelist.build_csr
+CSR_METHODS = [method for method, module in METHOD_MODULES.items() if module.startswith('bionev.OpenNE.')]
+
+
+def import_method(method):
+    """Import and return the backend module of an embedding method."""
+    return importlib.import_module(METHOD_MODULES[method])
+
+
+def _training_graph(train_graph_filename, train_graph):
+    return train_graph_filename if train_graph is None else train_graph
+
 
 def embedding_training(
     *,
     method,
-    train_graph_filename,
+    train_graph_filename=None,
+    train_graph=None,
     OPT1=True,
     OPT2=True,
     OPT3=True,
@@ -45,9 +67,10 @@ def embedding_training(
     nu2=1e-4,
     batch_size=200,
 ):
-    if method == 'struct2vec':
+    if method == 'struc2vec':
         model = train_embed_struct2vec(
             train_graph_filename=train_graph_filename,
+            train_graph=train_graph,
             OPT1=OPT1,
             OPT2=OPT2,
             OPT3=OPT3,
@@ -68,21 +91,25 @@ def embedding_training(
             dropout=dropout,
             gae_model_selection=gae_model_selection,
             train_graph_filename=train_graph_filename,
+            train_graph=train_graph,
         )
     elif method == 'SVD':
         model = train_embed_svd(
             weighted=weighted,
             train_graph_filename=train_graph_filename,
+            train_graph=train_graph,
             dimensions=dimensions)
     elif method == 'Laplacian':
         model = train_embed_laplacian(
             train_graph_filename=train_graph_filename,
+            train_graph=train_graph,
             dimensions=dimensions,
             weighted=weighted,
         )
     elif method == 'GF':
         model = train_embed_gf(
             train_graph_filename=train_graph_filename,
+            train_graph=train_graph,
             dimensions=dimensions,
             epochs=epochs,
             learning_rate=learning_rate,
@@ -92,12 +119,14 @@ def embedding_training(
     elif method == 'HOPE':
         model = train_embed_hope(
             train_graph_filename=train_graph_filename,
+            train_graph=train_graph,
             dimensions=dimensions,
             weighted=weighted
         )
     elif method == 'GraRep':
         model = train_embed_grarep(
             train_graph_filename=train_graph_filename,
+            train_graph=train_graph,
             kstep=kstep,
             dimensions=dimensions,
             weighted=weighted
@@ -105,6 +134,7 @@ def embedding_training(
     elif method == 'DeepWalk':
         model = train_embed_deepwalk(
             train_graph_filename=train_graph_filename,
+            train_graph=train_graph,
             walk_length=walk_length,
             number_walks=number_walks,
             dimensions=dimensions,
@@ -115,6 +145,7 @@ def embedding_training(
     elif method == 'node2vec':
         model = train_embed_node2vec(
             train_graph_filename=train_graph_filename,
+            train_graph=train_graph,
             walk_length=walk_length,
             number_walks=number_walks,
             dimensions=dimensions,
@@ -127,6 +158,7 @@ def embedding_training(
     elif method == 'LINE':
         model = train_embed_line(
             train_graph_filename=train_graph_filename,
+            train_graph=train_graph,
             epochs=epochs,
             dimensions=dimensions,
             order=order,
@@ -135,6 +167,7 @@ def embedding_training(
     elif method == 'SDNE':
         model = train_embed_sdne(
             train_graph_filename=train_graph_filename,
+            train_graph=train_graph,
             encoder_list=encoder_list,
             alpha=alpha,
             beta=beta,
@@ -150,7 +183,8 @@ def embedding_training(
 
 def train_embed_struct2vec(
     *,
-    train_graph_filename,
+    train_graph_filename=None,
+    train_graph=None,
     OPT1=True,
     OPT2=True,
     OPT3=True,
@@ -161,7 +195,10 @@ def train_embed_struct2vec(
     dimensions=100,
     window_size=10,
 ):
-    G_ = read_for_struc2vec(train_graph_filename)
+    from gensim.models import Word2Vec
+    from gensim.models.word2vec import LineSentence
+
+    G_ = read_for_struc2vec(_training_graph(train_graph_filename, train_graph))
     logging.basicConfig(filename='./src/struc2vec/struc2vec.log', filemode='w', level=logging.DEBUG,
                         format='%(asctime)s %(message)s')
     if (OPT3):
@@ -169,6 +206,7 @@ def train_embed_struct2vec(
     else:
         until_layer = None
 
+    struc2vec = import_method('struc2vec')
     G = struc2vec.Graph(G_, workers, untilLayer=until_layer)
 
     if (OPT1):
@@ -212,10 +250,12 @@ def train_embed_gae(
     weight_decay=5e-4,
     dropout=0,
     gae_model_selection='gcn_ae',
-    train_graph_filename
+    train_graph_filename=None,
+    train_graph=None,
 ):
-    G_ = read_for_gae(train_graph_filename)
+    G_ = read_for_gae(_training_graph(train_graph_filename, train_graph))
     # initialize necessary parameters
+    gae_model = import_method('GAE').gae_model
     model = gae_model(learning_rate, epochs, hidden, dimensions, weight_decay, dropout, gae_model_selection)
     # input the graph data
     model.train(G_)
@@ -226,36 +266,39 @@ def train_embed_gae(
 def train_embed_svd(
     *,
     weighted=False,
-    train_graph_filename,
+    train_graph_filename=None,
+    train_graph=None,
     dimensions=100
 ):
-    G_ = read_for_SVD(train_graph_filename, weighted=weighted)
-    model = SVD_embedding(G_, size=dimensions)
+    G_ = read_for_SVD(_training_graph(train_graph_filename, train_graph), weighted=weighted)
+    model = import_method('SVD').SVD_embedding(G_, size=dimensions)
     return model
 
 
 def train_embed_laplacian(
     *,
-    train_graph_filename,
+    train_graph_filename=None,
+    train_graph=None,
     dimensions=100,
     weighted=False
 ):
-    G_ = read_for_OpenNE(train_graph_filename, weighted=weighted)
-    model = lap.LaplacianEigenmaps(G_, rep_size=dimensions)
+    G_ = read_for_OpenNE(_training_graph(train_graph_filename, train_graph), weighted=weighted)
+    model = import_method('Laplacian').LaplacianEigenmaps(G_, rep_size=dimensions)
     return model
 
 
 def train_embed_gf(
     *,
-    train_graph_filename,
+    train_graph_filename=None,
+    train_graph=None,
     dimensions=100,
     epochs=5,
     learning_rate=0.01,
     weight_decay=5e-4,
     weighted=False
 ):
-    G_ = read_for_OpenNE(train_graph_filename, weighted=weighted)
-    model = gf.GraphFactorization(
+    G_ = read_for_OpenNE(_training_graph(train_graph_filename, train_graph), weighted=weighted)
+    model = import_method('GF').GraphFactorization(
         G_,
         rep_size=dimensions,
         epoch=epochs,
@@ -266,30 +309,33 @@ def train_embed_gf(
 
 def train_embed_hope(
     *,
-    train_graph_filename,
+    train_graph_filename=None,
+    train_graph=None,
     dimensions=100,
     weighted=False
 ):
-    G_ = read_for_OpenNE(train_graph_filename, weighted=weighted)
-    model = hope.HOPE(graph=G_, d=dimensions)
+    G_ = read_for_OpenNE(_training_graph(train_graph_filename, train_graph), weighted=weighted)
+    model = import_method('HOPE').HOPE(graph=G_, d=dimensions)
     return model
 
 
 def train_embed_grarep(
     *,
-    train_graph_filename,
+    train_graph_filename=None,
+    train_graph=None,
     kstep=4,
     dimensions=100,
     weighted=False
 ):
-    G_ = read_for_OpenNE(train_graph_filename, weighted=weighted)
-    model = grarep.GraRep(graph=G_, Kstep=kstep, dim=dimensions)
+    G_ = read_for_OpenNE(_training_graph(train_graph_filename, train_graph), weighted=weighted)
+    model = import_method('GraRep').GraRep(graph=G_, Kstep=kstep, dim=dimensions)
     return model
 
 
 def train_embed_deepwalk(
     *,
-    train_graph_filename,
+    train_graph_filename=None,
+    train_graph=None,
     walk_length=64,
     number_walks=32,
     dimensions=100,
@@ -297,8 +343,8 @@ def train_embed_deepwalk(
     window_size=10,
     weighted=False
 ):
-    G_ = read_for_OpenNE(train_graph_filename, weighted=weighted)
-    model = node2vec.Node2vec(
+    G_ = read_for_OpenNE(_training_graph(train_graph_filename, train_graph), weighted=weighted)
+    model = import_method('DeepWalk').Node2vec(
         graph=G_,
         path_length=walk_length,
         num_paths=number_walks,
@@ -311,7 +357,8 @@ def train_embed_deepwalk(
 
 def train_embed_node2vec(
     *,
-    train_graph_filename,
+    train_graph_filename=None,
+    train_graph=None,
     walk_length=64,
     number_walks=32,
     dimensions=100,
@@ -321,8 +368,8 @@ def train_embed_node2vec(
     window_size=10,
     weighted=False
 ):
-    G_ = read_for_OpenNE(train_graph_filename, weighted=weighted)
-    model = node2vec.Node2vec(
+    G_ = read_for_OpenNE(_training_graph(train_graph_filename, train_graph), weighted=weighted)
+    model = import_method('node2vec').Node2vec(
         graph=G_,
         path_length=walk_length,
         num_paths=number_walks,
@@ -337,14 +384,15 @@ def train_embed_node2vec(
 
 def train_embed_line(
     *,
-    train_graph_filename,
+    train_graph_filename=None,
+    train_graph=None,
     epochs=5,
     dimensions=100,
     order=2,
     weighted=False
 ):
-    G_ = read_for_OpenNE(train_graph_filename, weighted=weighted)
-    model = line.LINE(
+    G_ = read_for_OpenNE(_training_graph(train_graph_filename, train_graph), weighted=weighted)
+    model = import_method('LINE').LINE(
         G_,
         epoch=epochs,
         rep_size=dimensions,
@@ -354,7 +402,8 @@ def train_embed_line(
 
 def train_embed_sdne(
     *,
-    train_graph_filename,
+    train_graph_filename=None,
+    train_graph=None,
     encoder_list='[1000,128]',
     alpha=0.3,
     beta=0,
@@ -365,9 +414,9 @@ def train_embed_sdne(
     learning_rate=0.01,
     weighted=False
 ):
-    G_ = read_for_OpenNE(train_graph_filename, weighted=weighted)
+    G_ = read_for_OpenNE(_training_graph(train_graph_filename, train_graph), weighted=weighted)
     encoder_layer_list = ast.literal_eval(encoder_list)
-    model = sdne.SDNE(
+    model = import_method('SDNE').SDNE(
         G_,
         encoder_layer_list=encoder_layer_list,
         alpha=alpha,
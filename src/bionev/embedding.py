@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+"""Embedding storage in text or binary form.
+
+The binary format is a float32 ``.npy`` matrix plus a ``.nodes.txt`` file listing the node id of each row. It is
+opened with ``np.load(mmap_mode='r')``, so large embeddings load instantly and their pages are shared between
+processes.
+"""
+
+import os
+from collections.abc import Mapping
+
+import numpy as np
+
+
+class EmbeddingMatrix(Mapping):
+    """Read-only node id -> vector mapping backed by a single matrix.
+
+    It can be used wherever a dict of embeddings is expected. :meth:`take` gathers many rows at once.
+    """
+
+    def __init__(self, nodes, matrix):
+        self.nodes = list(nodes)
+        self.matrix = matrix
+        self.index = {node: i for i, node in enumerate(self.nodes)}
+        if len(self.index) != len(self.nodes) or len(self.nodes) != len(matrix):
+            raise ValueError('Embedding matrix has %d rows for %d distinct node ids'
+                             % (len(matrix), len(self.index)))
+
+    def __getitem__(self, node):
+        return self.matrix[self.index[node]]
+
+    def __contains__(self, node):
+        return node in self.index
+
+    def __iter__(self):
+        return iter(self.nodes)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    @property
+    def dimensions(self):
+        return self.matrix.shape[1]
+
+    def rows(self, nodes):
+        """Row index of each node id."""
+        index = self.index
+        return np.fromiter((index[node] for node in nodes), dtype=np.int64)
+
+    def take(self, nodes):
+        """Embeddings of the given node ids stacked into a matrix."""
+        return self.matrix[self.rows(nodes)]
+
+
+def as_embedding_matrix(vectors, dtype=np.float32):
+    """Wrap a dict of node id -> vector into an :class:`EmbeddingMatrix` (no-op if it already is one)."""
+    if isinstance(vectors, EmbeddingMatrix):
+        return vectors
+    nodes = list(vectors)
+    matrix = np.array([vectors[node] for node in nodes], dtype=dtype)
+    return EmbeddingMatrix(nodes, matrix.reshape(len(nodes), -1))
+
+
+def is_binary(filename):
+    return filename.endswith('.npy')
+
+
+def _nodes_filename(filename):
+    return os.path.splitext(filename)[0] + '.nodes.txt'
+
+
+def save_embeddings(filename, vectors):
+    """Save embeddings, in the binary format if ``filename`` ends with ``.npy`` and as text otherwise."""
+    if is_binary(filename):
+        save_binary_embeddings(filename, vectors)
+    else:
+        save_text_embeddings(filename, vectors)
+
+
+def save_text_embeddings(filename, vectors):
+    """Write the ``node_num dimension`` header and one ``node x1 x2 ...`` line per node."""
+    vectors = vectors.items() if isinstance(vectors, Mapping) else vectors
+    vectors = list(vectors)
+    size = len(vectors[0][1]) if vectors else 0
+    with open(filename, 'w') as fout:
+        fout.write("{} {}\n".format(len(vectors), size))
+        for node, vec in vectors:
+            fout.write("{} {}\n".format(node, ' '.join([str(x) for x in vec])))
+
+
+def save_binary_embeddings(filename, vectors):
+    embeddings = as_embedding_matrix(vectors)
+    np.save(filename, np.asarray(embeddings.matrix, dtype=np.float32))
+    with open(_nodes_filename(filename), 'w') as fout:
+        for node in embeddings.nodes:
+            fout.write("{}\n".format(node))
+
+
+def load_embeddings(filename, mmap_mode='r'):
+    """Load embeddings written by :func:`save_embeddings` as an :class:`EmbeddingMatrix`.
+
+    Binary embeddings are memory-mapped unless ``mmap_mode`` is None. Text embeddings are tokenized in one pass.
+    """
+    if is_binary(filename):
+        matrix = np.load(filename, mmap_mode=mmap_mode)
+        with open(_nodes_filename(filename)) as f:
+            nodes = f.read().split()
+        return EmbeddingMatrix(nodes, matrix)
+    return load_text_embeddings(filename)
+
+
+def load_text_embeddings(filename):
+    with open(filename, 'rb') as f:
+        header = f.readline().split()
+        data = f.read()
+    node_num, size = int(header[0]), int(header[1])
+    tokens = np.array(data.split())
+    if tokens.size != node_num * (size + 1):
+        raise ValueError('%s does not hold %d embeddings of dimension %d' % (filename, node_num, size))
+    tokens = tokens.reshape(node_num, size + 1)
+    nodes = np.char.decode(tokens[:, 0], 'utf-8').tolist() if node_num else []
+    return EmbeddingMatrix(nodes, tokens[:, 1:].astype(np.float32))
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+
+"""Link prediction metrics accumulated chunk by chunk.
+
+:class:`LinkMetrics` keeps the confusion counts at the 0.5 probability threshold and a fixed-bin histogram of the
+log-odds of the positive and negative pairs. Its memory does not depend on the number of evaluated pairs, and
+two accumulators (e.g. of different workers) can be merged. AUC-ROC and AUC-PR are computed from the histograms,
+treating the probabilities within one bin as tied, so they match the exact values up to the bin width.
+
+:func:`bootstrap_link_metrics` computes the same metrics on many bootstrap resamples at once, for confidence
+intervals.
+"""
+
+import numpy as np
+import scipy.sparse as sp
+
+
+# the log-odds of float64 probabilities are within +-745, and log(1 + 745) < 6.62
+LOG_LOGIT_RANGE = 6.62
+
+
+class LinkMetrics(object):
+    """Streaming AUC-ROC, AUC-PR, accuracy, F1 and MCC of link probabilities.
+
+    :param n_bins: number of probability bins of the histograms
+    """
+
+    def __init__(self, n_bins=1 << 16):
+        self.n_bins = n_bins
+        self.pos_hist = np.zeros(n_bins, dtype=np.int64)
+        self.neg_hist = np.zeros(n_bins, dtype=np.int64)
+        self.tp = self.fp = self.tn = self.fn = 0
+
+    def update(self, y_true, y_pred_proba):
+        """Add a chunk of true labels (0/1) and predicted link probabilities."""
+        y_true = np.asarray(y_true).astype(bool)
+        y_pred_proba = np.asarray(y_pred_proba, dtype=np.float64)
+        bins = self.bins(y_pred_proba)
+        self.pos_hist += np.bincount(bins[y_true], minlength=self.n_bins)
+        self.neg_hist += np.bincount(bins[~y_true], minlength=self.n_bins)
+        y_pred = y_pred_proba > 0.5
+        self.tp += int(np.count_nonzero(y_pred & y_true))
+        self.fp += int(np.count_nonzero(y_pred & ~y_true))
+        self.fn += int(np.count_nonzero(~y_pred & y_true))
+        self.tn += int(np.count_nonzero(~y_pred & ~y_true))
+        return self
+
+    def bins(self, y_pred_proba):
+        """Histogram bin of each probability.
+
+        The bins are of equal width in ``sign(l) * log(1 + |l|)`` of the log-odds ``l``, which spans every float64
+        probability, so that confident probabilities close to 0 or 1 are not lumped together.
+        """
+        with np.errstate(divide='ignore'):
+            logits = np.log(y_pred_proba) - np.log1p(-y_pred_proba)
+        scaled = np.clip(np.sign(logits) * np.log1p(np.abs(logits)), -LOG_LOGIT_RANGE, LOG_LOGIT_RANGE)
+        bins = ((scaled + LOG_LOGIT_RANGE) * (self.n_bins / (2 * LOG_LOGIT_RANGE))).astype(np.int64)
+        return np.minimum(bins, self.n_bins - 1)
+
+    def merge(self, other):
+        """Add the counts of another accumulator with the same number of bins."""
+        if other.n_bins != self.n_bins:
+            raise ValueError('Cannot merge metrics of %d and %d bins' % (self.n_bins, other.n_bins))
+        self.pos_hist += other.pos_hist
+        self.neg_hist += other.neg_hist
+        self.tp += other.tp
+        self.fp += other.fp
+        self.tn += other.tn
+        self.fn += other.fn
+        return self
+
+    def __len__(self):
+        return self.tp + self.fp + self.tn + self.fn
+
+    def auc_roc(self):
+        return histogram_auc_roc(self.pos_hist, self.neg_hist)
+
+    def auc_pr(self):
+        """Average precision, with one threshold per bin from the highest down."""
+        return histogram_average_precision(self.pos_hist, self.neg_hist)
+
+    def result(self):
+        """(AUC-ROC, AUC-PR, accuracy, F1, MCC), like :func:`bionev.pipeline.link_prediction_metrics`."""
+        accuracy, f1, mcc = confusion_metrics(self.tp, self.fp, self.fn, self.tn)
+        return self.auc_roc(), self.auc_pr(), float(accuracy), float(f1), float(mcc)
+
+
+def histogram_auc_roc(pos_hist, neg_hist):
+    """AUC-ROC from the score histograms of the positives and negatives, with bins in increasing score order.
+
+    Histograms can be stacked: the bins are along the last axis.
+    """
+    pos_hist = np.asarray(pos_hist, dtype=np.float64)
+    neg_hist = np.asarray(neg_hist, dtype=np.float64)
+    # each positive beats the negatives of lower bins and ties with the ones of its own bin
+    neg_below = np.cumsum(neg_hist, axis=-1) - neg_hist
+    wins = np.sum(pos_hist * (neg_below + 0.5 * neg_hist), axis=-1)
+    pairs = pos_hist.sum(axis=-1) * neg_hist.sum(axis=-1)
+    return np.divide(wins, pairs, out=np.full(np.shape(pairs), np.nan), where=pairs > 0)[()]
+
+
+def histogram_average_precision(pos_hist, neg_hist):
+    """Average precision from score histograms like :func:`histogram_auc_roc`, one threshold per bin."""
+    pos_hist = np.asarray(pos_hist, dtype=np.float64)[..., ::-1]
+    neg_hist = np.asarray(neg_hist, dtype=np.float64)[..., ::-1]
+    tp = np.cumsum(pos_hist, axis=-1)
+    predicted = tp + np.cumsum(neg_hist, axis=-1)
+    precision = np.divide(tp, predicted, out=np.zeros_like(tp), where=predicted > 0)
+    num_pos = pos_hist.sum(axis=-1)
+    return np.divide(np.sum(pos_hist * precision, axis=-1), num_pos, out=np.full(np.shape(num_pos), np.nan),
+                     where=num_pos > 0)[()]
+
+
+def confusion_metrics(tp, fp, fn, tn):
+    """Accuracy, F1 and MCC of (arrays of) binary confusion counts."""
+    tp, fp, fn, tn = (np.asarray(count, dtype=np.float64) for count in (tp, fp, fn, tn))
+    total = tp + fp + fn + tn
+    accuracy = np.divide(tp + tn, total, out=np.full(total.shape, np.nan), where=total > 0)
+    f1 = np.divide(2 * tp, 2 * tp + fp + fn, out=np.zeros(total.shape), where=2 * tp + fp + fn > 0)
+    denominator = np.sqrt((tp + fp) * (tp + fn) * (tn + fp) * (tn + fn))
+    mcc = np.divide(tp * tn - fp * fn, denominator, out=np.zeros(total.shape), where=denominator > 0)
+    return accuracy[()], f1[()], mcc[()]
+
+
+def bootstrap_link_metrics(y_true, y_pred_proba, y_pred=None, n_resamples=1000, random_state=None,
+                           batch_size=None):
+    """Link prediction metrics of ``n_resamples`` bootstrap resamples of the testing pairs.
+
+    The resampled indices of a batch of resamples are drawn as one 2-D array and turned into a matrix of how
+    often each pair was drawn. The score histograms and confusion counts of the whole batch are then matrix
+    products with it, over the distinct scores, so the AUCs are exact.
+
+    :param y_pred: the predicted labels, the probabilities thresholded at 0.5 if None
+    :return: an ``(n_resamples, 5)`` array of (AUC-ROC, AUC-PR, accuracy, F1, MCC)
+    """
+    y_true = np.asarray(y_true).astype(bool)
+    y_pred_proba = np.asarray(y_pred_proba, dtype=np.float64)
+    y_pred = y_pred_proba > 0.5 if y_pred is None else np.asarray(y_pred).astype(bool)
+    n = len(y_true)
+    if n == 0:
+        return np.full((n_resamples, 5), np.nan)
+    _, group = np.unique(y_pred_proba, return_inverse=True)
+    group = group.ravel()
+    num_groups = group.max() + 1
+    rows = np.arange(n)
+    pos_groups = sp.csr_matrix((y_true.astype(np.float64), (rows, group)), shape=(n, num_groups))
+    neg_groups = sp.csr_matrix(((~y_true).astype(np.float64), (rows, group)), shape=(n, num_groups))
+    cells = np.column_stack([y_true & y_pred, ~y_true & y_pred, y_true & ~y_pred, ~y_true & ~y_pred])
+    cells = cells.astype(np.float64)
+    if batch_size is None:
+        # about 16M draws and histogram cells per batch
+        batch_size = max(1, (1 << 24) // max(n, num_groups))
+    rng = random_state if isinstance(random_state, np.random.RandomState) else np.random.RandomState(random_state)
+    results = []
+    for start in range(0, n_resamples, batch_size):
+        size = min(batch_size, n_resamples - start)
+        draws = rng.randint(n, size=(size, n)) + n * np.arange(size)[:, None]
+        counts = np.bincount(draws.ravel(), minlength=size * n).reshape(size, n).astype(np.float64)
+        pos_hist = (pos_groups.T @ counts.T).T
+        neg_hist = (neg_groups.T @ counts.T).T
+        tp, fp, fn, tn = counts.dot(cells).T
+        results.append(np.column_stack([
+            histogram_auc_roc(pos_hist, neg_hist),
+            histogram_average_precision(pos_hist, neg_hist),
+            *confusion_metrics(tp, fp, fn, tn),
+        ]))
+    return np.vstack(results)
+
+
+def confidence_intervals(samples, confidence=0.95):
+    """Percentile intervals of the columns of bootstrap ``samples``, as a ``(2, columns)`` array of bounds."""
+    tail = 50 * (1 - confidence)
+    return np.nanpercentile(samples, [tail, 100 - tail], axis=0)
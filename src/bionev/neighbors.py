@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+
+"""Cosine nearest-neighbour search over node embeddings.
+
+:func:`exact_neighbors` scans every embedding in blocks. :class:`IVFIndex` is an inverted file index: a spherical
+k-means quantizer splits the unit-normalized embeddings into lists, stored contiguously by list, and a query only
+scans the ``n_probe`` lists whose centroids are closest to it. An index is saved as a directory of ``.npy`` files,
+which :func:`load_index` memory-maps.
+"""
+
+import json
+import os
+
+import numpy as np
+
+import bionev.embedding as ebd
+
+INDEX_VERSION = 1
+
+
+def normalize_rows(matrix):
+    """Unit-normalize the rows of ``matrix`` as float32. All-zero rows stay zero."""
+    matrix = np.array(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    matrix /= norms
+    return matrix
+
+
+def merge_top_k(best_scores, best_ids, scores, ids, k):
+    """Merge a block of ``scores`` (one row per query) with the running top ``k`` of each query."""
+    scores = np.hstack([best_scores, scores])
+    ids = np.hstack([best_ids, ids])
+    if scores.shape[1] > k:
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        scores = np.take_along_axis(scores, top, axis=1)
+        ids = np.take_along_axis(ids, top, axis=1)
+    return scores, ids
+
+
+def _empty_top_k(num_queries, k):
+    return np.full((num_queries, k), -np.inf, dtype=np.float32), np.full((num_queries, k), -1, dtype=np.int64)
+
+
+def _sorted_results(nodes, best_scores, best_rows):
+    """Sort the top k of each query, best first, as node ids (None) and similarities (nan) for missing hits."""
+    order = np.argsort(-best_scores, axis=1, kind='stable')
+    best_scores = np.take_along_axis(best_scores, order, axis=1)
+    best_rows = np.take_along_axis(best_rows, order, axis=1)
+    found = np.isfinite(best_scores)
+    neighbors = np.full(best_rows.shape, None, dtype=object)
+    neighbors[found] = nodes[best_rows[found]]
+    similarities = np.where(found, best_scores, np.nan)
+    return neighbors, similarities
+
+
+def exact_neighbors(embeddings, queries=None, k=10, block_size=1024, column_block_size=1 << 16):
+    """Yield the ``k`` most cosine-similar other nodes of each query node, ``block_size`` queries at a time.
+
+    Each item is ``(query_ids, neighbor_ids, similarities)``, with one row per query, best first.
+    """
+    embeddings = ebd.as_embedding_matrix(embeddings)
+    nodes = np.array(embeddings.nodes, dtype=object)
+    query_rows = np.arange(len(nodes)) if queries is None else embeddings.rows(queries)
+    n = len(nodes)
+    k = min(k, max(n - 1, 0))
+    for block_start in range(0, len(query_rows), block_size):
+        rows = query_rows[block_start:block_start + block_size]
+        queries_block = normalize_rows(embeddings.matrix[rows])
+        best_scores, best_rows = _empty_top_k(len(rows), k)
+        for start in range(0, n, column_block_size):
+            stop = min(start + column_block_size, n)
+            scores = queries_block.dot(normalize_rows(embeddings.matrix[start:stop]).T)
+            own = (rows >= start) & (rows < stop)
+            scores[np.flatnonzero(own), rows[own] - start] = -np.inf
+            columns = np.broadcast_to(np.arange(start, stop), scores.shape)
+            best_scores, best_rows = merge_top_k(best_scores, best_rows, scores, columns, k)
+        yield (nodes[rows].tolist(),) + _sorted_results(nodes, best_scores, best_rows)
+
+
+class IVFIndex(object):
+    """Inverted file index for cosine similarity search.
+
+    :param nodes: node ids, in embedding row order
+    :param centroids: unit-normalized list centroids, one row per list
+    :param offsets: list ``i`` holds the entries ``offsets[i]:offsets[i + 1]``
+    :param rows: embedding row of each entry
+    :param vectors: unit-normalized embedding of each entry
+    """
+
+    def __init__(self, nodes, centroids, offsets, rows, vectors):
+        self.nodes = np.array(nodes, dtype=object)
+        self.index = {node: i for i, node in enumerate(self.nodes.tolist())}
+        self.centroids = centroids
+        self.offsets = offsets
+        self.rows = rows
+        self.vectors = vectors
+        # entry of each embedding row
+        self.position = np.empty(len(rows), dtype=np.int64)
+        self.position[rows] = np.arange(len(rows))
+
+    @property
+    def n_lists(self):
+        return len(self.centroids)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def save(self, directory):
+        """Write the index to ``directory`` as ``.npy`` arrays, a node list and ``index.json``."""
+        os.makedirs(directory, exist_ok=True)
+        for name in ('centroids', 'offsets', 'rows', 'vectors'):
+            np.save(os.path.join(directory, name + '.npy'), getattr(self, name))
+        with open(os.path.join(directory, 'nodes.txt'), 'w') as fout:
+            for node in self.nodes.tolist():
+                fout.write("{}\n".format(node))
+        with open(os.path.join(directory, 'index.json'), 'w') as f:
+            json.dump({'version': INDEX_VERSION, 'metric': 'cosine', 'n_lists': self.n_lists,
+                       'dimensions': self.vectors.shape[1]}, f)
+
+    def search(self, vectors, k=10, n_probe=8, exclude=None):
+        """The ``k`` most cosine-similar entries to each row of ``vectors``, scanning ``n_probe`` lists per query.
+
+        :param exclude: an embedding row per query that is never returned (-1 for none), e.g. the query itself
+        :return: ``(similarities, rows)`` arrays with one row per query; missing hits are -inf and -1, in no order
+        """
+        queries = normalize_rows(vectors)
+        n_probe = min(n_probe, self.n_lists)
+        best_scores, best_rows = _empty_top_k(len(queries), k)
+        if len(queries) == 0 or k == 0:
+            return best_scores, best_rows
+
+        probed = queries.dot(self.centroids.T)
+        if n_probe < self.n_lists:
+            probed = np.argpartition(-probed, n_probe - 1, axis=1)[:, :n_probe]
+        else:
+            probed = np.broadcast_to(np.arange(self.n_lists), probed.shape)
+        # group the queries by probed list, so that each list is read once per batch
+        query_of = np.repeat(np.arange(len(queries)), n_probe)
+        lists = probed.ravel()
+        order = np.argsort(lists, kind='stable')
+        query_of, lists = query_of[order], lists[order]
+        bounds = np.flatnonzero(np.diff(lists)) + 1
+        for group in np.split(np.arange(len(lists)), bounds):
+            cell = lists[group[0]]
+            start, stop = self.offsets[cell], self.offsets[cell + 1]
+            if start == stop:
+                continue
+            members = query_of[group]
+            scores = queries[members].dot(np.asarray(self.vectors[start:stop]).T)
+            rows = np.broadcast_to(np.asarray(self.rows[start:stop]), scores.shape)
+            if exclude is not None:
+                scores[rows == exclude[members, None]] = -np.inf
+            best_scores[members], best_rows[members] = merge_top_k(
+                best_scores[members], best_rows[members], scores, rows, k)
+        return best_scores, best_rows
+
+    def neighbors(self, queries=None, k=10, n_probe=8, block_size=1024):
+        """Yield the ``k`` nearest other nodes of each query node, like :func:`exact_neighbors`."""
+        index = self.index
+        if queries is None:
+            query_rows = np.arange(len(self.nodes))
+        else:
+            query_rows = np.fromiter((index[node] for node in queries), dtype=np.int64)
+        k = min(k, max(len(self.nodes) - 1, 0))
+        for block_start in range(0, len(query_rows), block_size):
+            rows = query_rows[block_start:block_start + block_size]
+            vectors = np.asarray(self.vectors[self.position[rows]])
+            best_scores, best_rows = self.search(vectors, k=k, n_probe=n_probe, exclude=rows)
+            yield (self.nodes[rows].tolist(),) + _sorted_results(self.nodes, best_scores, best_rows)
+
+
+def build_index(embeddings, n_lists=None, iterations=10, sample_size=None, block_size=1 << 16, random_state=None):
+    """Build an :class:`IVFIndex` with a spherical k-means quantizer.
+
+    :param n_lists: number of lists, about the square root of the number of nodes by default
+    :param iterations: k-means iterations
+    :param sample_size: number of embeddings the quantizer is trained on, 256 per list by default
+    """
+    embeddings = ebd.as_embedding_matrix(embeddings)
+    n = len(embeddings)
+    if n == 0:
+        raise ValueError('Cannot index empty embeddings')
+    rng = np.random.RandomState(random_state)
+    if n_lists is None:
+        n_lists = int(np.sqrt(n))
+    n_lists = max(1, min(n_lists, n))
+    if sample_size is None:
+        sample_size = 256 * n_lists
+    sample = normalize_rows(embeddings.matrix[np.sort(rng.choice(n, min(sample_size, n), replace=False))])
+
+    centroids = sample[rng.choice(len(sample), n_lists, replace=False)]
+    for _ in range(iterations):
+        assignment = sample.dot(centroids.T).argmax(axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, sample)
+        empty = np.bincount(assignment, minlength=n_lists) == 0
+        # restart empty lists from random sample points
+        sums[empty] = sample[rng.choice(len(sample), empty.sum())]
+        centroids = normalize_rows(sums)
+
+    assignment = np.empty(n, dtype=np.int64)
+    vectors = np.empty((n, embeddings.dimensions), dtype=np.float32)
+    for start in range(0, n, block_size):
+        block = normalize_rows(embeddings.matrix[start:start + block_size])
+        vectors[start:start + len(block)] = block
+        assignment[start:start + len(block)] = block.dot(centroids.T).argmax(axis=1)
+    rows = np.argsort(assignment, kind='stable')
+    offsets = np.zeros(n_lists + 1, dtype=np.int64)
+    np.cumsum(np.bincount(assignment, minlength=n_lists), out=offsets[1:])
+    return IVFIndex(embeddings.nodes, centroids, offsets, rows, vectors[rows])
+
+
+def load_index(directory, mmap_mode='r'):
+    """Load an index saved by :meth:`IVFIndex.save`, memory-mapping its arrays unless ``mmap_mode`` is None."""
+    with open(os.path.join(directory, 'index.json')) as f:
+        meta = json.load(f)
+    if meta.get('version') != INDEX_VERSION:
+        raise ValueError('%s holds an index of version %s, not %d' % (directory, meta.get('version'), INDEX_VERSION))
+    arrays = {
+        name: np.load(os.path.join(directory, name + '.npy'), mmap_mode=mmap_mode)
+        for name in ('centroids', 'offsets', 'rows', 'vectors')
+    }
+    with open(os.path.join(directory, 'nodes.txt')) as f:
+        nodes = f.read().split()
+    # the small arrays are used on every query
+    return IVFIndex(nodes, np.asarray(arrays['centroids']), np.asarray(arrays['offsets']), np.asarray(arrays['rows']),
+                    arrays['vectors'])
@@ -1,81 +1,416 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
 from typing import Optional
 
 import joblib
+import scipy.sparse as sp
 from sklearn.ensemble import RandomForestClassifier
+from sklearn.kernel_approximation import Nystroem
 from sklearn.linear_model import LogisticRegression, LogisticRegressionCV, SGDClassifier
 from sklearn.metrics import accuracy_score, average_precision_score, f1_score, matthews_corrcoef, roc_auc_score
+from sklearn.pipeline import make_pipeline
 from sklearn.svm import LinearSVC, SVC
 
+import bionev.embedding as ebd
+from bionev.OpenNE.classify import TopKRanker
+from bionev.metrics import LinkMetrics, bootstrap_link_metrics, confidence_intervals
+from bionev.ranking import LinkRanker
 from bionev.utils import *
 
+# scikit-learn renamed the logistic loss of SGDClassifier from 'log' to 'log_loss'
+LOG_LOSS = 'log_loss' if 'log_loss' in SGDClassifier.loss_functions else 'log'
 
-def do_link_prediction(
-    *,
-    embeddings,
-    original_graph,
-    train_graph,
-    test_pos_edges,
-    save_model=None,
-    classifier_type: Optional[str] = None,
-):
-    train_neg_edges = generate_neg_edges(original_graph, len(train_graph.edges()))
-    # create a auxiliary graph to ensure that testing negative edges will not used in training
-    g_aux = copy.deepcopy(original_graph)
-    g_aux.add_edges_from(train_neg_edges)
-    test_neg_edges = generate_neg_edges(g_aux, len(test_pos_edges))
 
-    x_train, y_train = get_xy_sets(embeddings, train_graph.edges(), train_neg_edges)
+def get_link_classifier(classifier_type: Optional[str] = None, n_jobs: Optional[int] = None,
+                        svm_features: Optional[int] = None):
     if classifier_type == 'SVM':
-        clf = SVC(gamma='auto', probability=True)
+        if svm_features is not None:
+            return approximate_svm(svm_features)
+        return SVC(gamma='auto', probability=True)
     elif classifier_type == 'RF':
-        clf = RandomForestClassifier(n_estimators=100, max_depth=2)
+        return RandomForestClassifier(n_estimators=100, max_depth=2)
     elif classifier_type == 'EN':
-        clf = SGDClassifier(loss='log', penalty='elasticnet')
+        return SGDClassifier(loss=LOG_LOSS, penalty='elasticnet')
     elif classifier_type == 'ENCV':
         l1_ratios = [0.01, 0.07, 0.11, 0.13, 0.17, 0.19, 0.23, 0.29, 0.31, 0.37, 0.41, 0.43, 0.47, 0.49, 0.53, 0.59,
                      0.61, 0.67, 0.71, 0.73, 0.74, 0.76, 0.77, 0.79, 0.82, 0.83, 0.86, 0.88, 0.89, 0.91, 0.92, 0.94,
                      0.97, 0.98]
-        clf = LogisticRegressionCV(max_iter=1000, penalty='elasticnet', l1_ratios=l1_ratios, solver='saga')
+        # n_jobs spreads the cross-validation over the folds and l1_ratios
+        return LogisticRegressionCV(max_iter=1000, penalty='elasticnet', l1_ratios=l1_ratios, solver='saga',
+                                    n_jobs=n_jobs)
     elif classifier_type is None or classifier_type == 'LR':
-        clf = LogisticRegression(solver='lbfgs')
+        return LogisticRegression(solver='lbfgs')
     else:
         raise ValueError(f'Invalid classifier_type: {classifier_type}')
 
-    clf.fit(x_train, y_train)
-    x_test, y_test = get_xy_sets(embeddings, test_pos_edges, test_neg_edges)
-    y_pred_proba = clf.predict_proba(x_test)[:, 1]
-    y_pred = clf.predict(x_test)
-    auc_roc = roc_auc_score(y_test, y_pred_proba)
-    auc_pr = average_precision_score(y_test, y_pred_proba)
-    accuracy = accuracy_score(y_test, y_pred)
-    f1 = f1_score(y_test, y_pred)
-    mcc = matthews_corrcoef(y_test, y_pred)
+
+def approximate_svm(n_components=1000):
+    """A linear-time stand-in for ``SVC(gamma='auto', probability=True)``.
+
+    A Nystroem map to ``n_components`` dimensions approximates the same RBF kernel, and a linear model with the
+    modified Huber loss (a smoothed hinge loss that also gives probabilities) is trained on the mapped features.
+    """
+    # gamma=None is 1 / n_features, like SVC's gamma='auto'
+    return make_pipeline(Nystroem(kernel='rbf', gamma=None, n_components=n_components),
+                         SGDClassifier(loss='modified_huber'))
+
+
+def streaming_classifier(classifier_type: Optional[str] = None):
+    """An incrementally trainable (``partial_fit``) version of the LR or EN classifier."""
+    if classifier_type == 'EN':
+        return SGDClassifier(loss=LOG_LOSS, penalty='elasticnet')
+    elif classifier_type is None or classifier_type == 'LR':
+        return SGDClassifier(loss=LOG_LOSS, penalty='l2')
+    raise ValueError(f'Streaming training is only available for the LR and EN classifiers, not {classifier_type}')
+
+
+def fit_streaming(clf, embeddings, src, dst, y, *, chunk_size, epochs=5, operator='hadamard', spill_dir=None):
+    """Train ``clf`` with ``partial_fit`` on the features of ``chunk_size`` edges at a time.
+
+    The edge features are recomputed from the embeddings at every epoch unless ``spill_dir`` is given, in which
+    case they are computed once into a memory-mapped float32 file there. Either way, only one chunk of features
+    is held in memory.
+    """
+    if len(y) == 0:
+        raise ValueError('Cannot train a link classifier without training edges')
+    features = None
+    if spill_dir is not None:
+        os.makedirs(spill_dir, exist_ok=True)
+        features = spill_edge_features(
+            embeddings.matrix, src, dst, os.path.join(spill_dir, 'x_train-%d.npy' % os.getpid()), chunk_size,
+            operator=operator,
+        )
+    classes = np.array([0, 1])
+    starts = np.arange(0, len(y), chunk_size)
+    for epoch in range(epochs):
+        for start in np.random.permutation(starts).tolist():
+            stop = start + chunk_size
+            if features is None:
+                x = edge_features(embeddings.matrix, src[start:stop], dst[start:stop], operator)
+            else:
+                x = np.asarray(features[start:stop])
+            clf.partial_fit(x, y[start:stop], classes=classes)
+    if features is not None:
+        filename = features.filename
+        del features
+        os.remove(filename)
+    return clf
+
+
+def evaluate_streaming(clf, embeddings, src, dst, y, chunk_size, operator='hadamard', metrics=None,
+                       y_pred_proba=None):
+    """Link prediction metrics of the edges, computed ``chunk_size`` edges at a time.
+
+    Each chunk goes through the model once: the predicted label is the probability thresholded at 0.5, which is
+    what ``predict`` returns for the LR and EN classifiers. The metrics are accumulated in a
+    :class:`bionev.metrics.LinkMetrics`, so memory does not grow with the number of edges.
+
+    :param y_pred_proba: if given, an array that is filled with the probabilities of the edges
+    :return: (AUC-ROC, AUC-PR, accuracy, F1, MCC)
+    """
+    metrics = LinkMetrics() if metrics is None else metrics
+    for start, x in zip(range(0, len(src), chunk_size),
+                        iter_edge_features(embeddings.matrix, src, dst, chunk_size, operator)):
+        proba = clf.predict_proba(x)[:, 1]
+        metrics.update(y[start:start + len(x)], proba)
+        if y_pred_proba is not None:
+            y_pred_proba[start:start + len(x)] = proba
+    return metrics.result()
+
+
+def do_link_prediction(
+    *,
+    embeddings,
+    original_graph,
+    train_graph,
+    test_pos_edges,
+    train_neg_edges=None,
+    test_neg_edges=None,
+    save_model=None,
+    classifier_type: Optional[str] = None,
+    edge_operator='hadamard',
+    chunk_size: Optional[int] = None,
+    spill_dir: Optional[str] = None,
+    streaming_epochs: int = 5,
+    svm_features: Optional[int] = None,
+    ranking: bool = False,
+    workers: int = 1,
+    bootstrap: int = 0,
+    quick_eval: Optional[float] = None,
+    random_state=None,
+):
+    """Train a link classifier on the training edges and evaluate it on the testing edges.
+
+    The negative edges are sampled from the node pairs that are not in ``original_graph`` unless they are given,
+    e.g. by :func:`bionev.utils.link_prediction_split`. With ``chunk_size``, the LR and EN classifiers are
+    trained for ``streaming_epochs`` epochs and evaluated on ``chunk_size`` edges at a time, see
+    :func:`fit_streaming` and :func:`evaluate_streaming`. With ``svm_features``, the SVM classifier is
+    approximated in that many dimensions, see :func:`approximate_svm`. With ``ranking``, the filtered MRR and
+    Hits@1/10/100 of the testing edges are appended to the returned metrics, see :func:`link_ranking_metrics`.
+
+    With ``bootstrap``, the 95% confidence interval bounds of the five metrics, estimated on that many bootstrap
+    resamples of the testing edges (see :func:`bionev.metrics.bootstrap_link_metrics`), are appended too. With
+    ``quick_eval``, only that fraction of the positive and of the negative testing edges is evaluated, with 200
+    resamples unless ``bootstrap`` says otherwise, for quick screening.
+    """
+    embeddings = ebd.as_embedding_matrix(embeddings)
+    rng = np.random.RandomState(random_state)
+    train_pos, train_neg, test_pos, test_neg = link_prediction_edge_sets(
+        original_graph, train_graph, test_pos_edges, train_neg_edges, test_neg_edges)
+    if quick_eval is not None:
+        test_pos = sample_edges(test_pos, quick_eval, rng)
+        test_neg = sample_edges(test_neg, quick_eval, rng)
+        bootstrap = bootstrap or 200
+    if chunk_size is not None:
+        clf = fit_streaming(
+            streaming_classifier(classifier_type),
+            embeddings,
+            *get_xy_rows(embeddings, train_pos, train_neg),
+            chunk_size=chunk_size,
+            epochs=streaming_epochs,
+            operator=edge_operator,
+            spill_dir=spill_dir,
+        )
+        src, dst, y_test = get_xy_rows(embeddings, test_pos, test_neg)
+        # the predicted labels of streaming evaluation are the probabilities thresholded at 0.5
+        y_pred_proba, y_pred = (np.zeros(len(y_test)) if bootstrap else None), None
+        result = evaluate_streaming(clf, embeddings, src, dst, y_test, chunk_size, operator=edge_operator,
+                                    y_pred_proba=y_pred_proba)
+    else:
+        x_train, y_train = get_xy_sets(embeddings, train_pos, train_neg, operator=edge_operator)
+        x_test, y_test = get_xy_sets(embeddings, test_pos, test_neg, operator=edge_operator)
+        clf = get_link_classifier(classifier_type, n_jobs=workers, svm_features=svm_features)
+        clf.fit(x_train, y_train)
+        y_pred_proba, y_pred = predict_links(clf, x_test)
+        result = link_prediction_metrics(y_test, y_pred_proba, y_pred)
     if save_model is not None:
         joblib.dump(clf, save_model)
+    auc_roc, auc_pr, accuracy, f1, mcc = result
     print('#' * 9 + ' Link Prediction Performance ' + '#' * 9)
+    if quick_eval is not None:
+        print(f'Quick evaluation on {len(y_test)} testing edges')
     print(f'AUC-ROC: {auc_roc:.3f}, AUC-PR: {auc_pr:.3f}, Accuracy: {accuracy:.3f}, F1: {f1:.3f}, MCC: {mcc:.3f}')
+    intervals = None
+    if bootstrap:
+        samples = bootstrap_link_metrics(y_test, y_pred_proba, y_pred, n_resamples=bootstrap, random_state=rng)
+        intervals = confidence_intervals(samples)
+        print('95% CI ' + ', '.join(
+            f'{name}: [{low:.3f}, {high:.3f}]'
+            for name, low, high in zip(['AUC-ROC', 'AUC-PR', 'Accuracy', 'F1', 'MCC'], *intervals)
+        ))
+    if ranking:
+        ranking_result = link_ranking_metrics(
+            embeddings=embeddings,
+            clf=clf,
+            known_edges=original_graph,
+            test_pos_edges=test_pos,
+            edge_operator=edge_operator,
+            workers=workers,
+        )
+        mrr, hits1, hits10, hits100 = ranking_result
+        print(f'MRR: {mrr:.3f}, Hits@1: {hits1:.3f}, Hits@10: {hits10:.3f}, Hits@100: {hits100:.3f}')
+        result = tuple(result) + ranking_result
+    if intervals is not None:
+        # (low, high) of each metric
+        result = tuple(result) + tuple(intervals.T.ravel().tolist())
     print('#' * 50)
+    return result
+
+
+def compare_link_classifiers(
+    *,
+    embeddings,
+    original_graph,
+    train_graph,
+    test_pos_edges,
+    train_neg_edges=None,
+    test_neg_edges=None,
+    classifier_types=('LR', 'EN', 'ENCV', 'RF', 'SVM'),
+    edge_operator='hadamard',
+    workers=1,
+    svm_features: Optional[int] = None,
+):
+    """Evaluate several link classifiers on the same edge features, fitting them in parallel.
+
+    :return: a dict of classifier type -> (AUC-ROC, AUC-PR, accuracy, F1, MCC)
+    """
+    embeddings = ebd.as_embedding_matrix(embeddings)
+    train_pos, train_neg, test_pos, test_neg = link_prediction_edge_sets(
+        original_graph, train_graph, test_pos_edges, train_neg_edges, test_neg_edges)
+    x_train, y_train = get_xy_sets(embeddings, train_pos, train_neg, operator=edge_operator)
+    x_test, y_test = get_xy_sets(embeddings, test_pos, test_neg, operator=edge_operator)
+    # the classifiers are fitted in parallel, so the ENCV cross-validation only gets the workers when it is alone
+    n_jobs = workers if len(classifier_types) == 1 else 1
+    classifiers = {
+        classifier_type: get_link_classifier(classifier_type, n_jobs=n_jobs, svm_features=svm_features)
+        for classifier_type in classifier_types
+    }
+    results = fit_classifiers(classifiers, x_train, y_train, x_test, y_test, link_prediction_scores, workers=workers)
+    print('#' * 9 + ' Link Prediction Performance ' + '#' * 9)
+    print_metrics_table(results, ['AUC-ROC', 'AUC-PR', 'Accuracy', 'F1', 'MCC'])
+    print('#' * 50)
+    return results
+
+
+def link_ranking_metrics(
+    *,
+    embeddings,
+    clf,
+    known_edges,
+    test_pos_edges,
+    edge_operator='hadamard',
+    ks=(1, 10, 100),
+    directed=False,
+    block_size=1024,
+    workers=1,
+):
+    """Filtered ranking metrics of a linear link classifier.
+
+    Each testing edge ``(h, t)`` is ranked among all the candidate tails of ``h``, not counting ``h`` and the
+    ``known_edges`` (normally all the edges of the graph, so that the other true tails do not push it down), and
+    ``(t, h)`` too unless ``directed``. The heads are scored ``block_size`` at a time against all nodes with
+    :meth:`bionev.ranking.LinkRanker.filtered_ranks`, and the head blocks are spread over ``workers`` processes.
+
+    :return: (MRR, Hits@k for each k of ``ks``)
+    """
+    ranker = LinkRanker(embeddings, clf, operator=edge_operator, known_edges=known_edges)
+    heads, tails = edge_rows(test_pos_edges, ranker.embeddings.index)
+    if not directed:
+        heads, tails = np.concatenate([heads, tails]), np.concatenate([tails, heads])
+    order = np.argsort(heads, kind='stable')
+    heads, tails = heads[order], tails[order]
+    _, head_starts = np.unique(heads, return_index=True)
+    bounds = head_starts[block_size::block_size]
+    blocks = zip(np.split(heads, bounds), np.split(tails, bounds))
+    if workers <= 1:
+        ranks = [ranker.filtered_ranks(block_heads, block_tails) for block_heads, block_tails in blocks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_ranker, initargs=(ranker,)) as executor:
+            ranks = list(executor.map(_filtered_ranks, blocks))
+    ranks = np.concatenate(ranks) if ranks else np.zeros(0)
+    return (float(np.mean(1 / ranks)),) + tuple(float(np.mean(ranks <= k)) for k in ks)
+
+
+_ranker = None
+
+
+def _init_ranker(ranker):
+    global _ranker
+    _ranker = ranker
+
+
+def _filtered_ranks(block):
+    return _ranker.filtered_ranks(*block)
+
+
+def link_prediction_edge_sets(original_graph, train_graph, test_pos_edges, train_neg_edges=None,
+                              test_neg_edges=None):
+    """The positive and negative training and testing edges as EdgeLists over the nodes of ``original_graph``.
+
+    The negative edges are sampled unless both are given.
+    """
+    original_edges = load_edges(original_graph)
+    nodes = original_edges.nodes
+    look_up = {node: i for i, node in enumerate(nodes)}
+    train_src, train_dst = edge_rows(train_graph, look_up)
+    test_src, test_dst = edge_rows(test_pos_edges, look_up)
+    if train_neg_edges is None or test_neg_edges is None:
+        train_neg_edges, test_neg_edges = sample_link_prediction_negatives(
+            original_edges, len(train_src), len(test_src))
+    return (
+        EdgeList(nodes, train_src, train_dst, None),
+        EdgeList(nodes, *edge_rows(train_neg_edges, look_up), None),
+        EdgeList(nodes, test_src, test_dst, None),
+        EdgeList(nodes, *edge_rows(test_neg_edges, look_up), None),
+    )
+
+
+def link_prediction_metrics(y_test, y_pred_proba, y_pred):
+    auc_roc = roc_auc_score(y_test, y_pred_proba)
+    auc_pr = average_precision_score(y_test, y_pred_proba)
+    accuracy = accuracy_score(y_test, y_pred)
+    f1 = f1_score(y_test, y_pred)
+    mcc = matthews_corrcoef(y_test, y_pred)
     return auc_roc, auc_pr, accuracy, f1, mcc
 
 
+def predict_links(clf, x):
+    """Link probabilities of the rows of ``x`` and the labels they predict, in a single pass through ``clf``.
+
+    The labels are the probabilities thresholded at 0.5, like the argmax ``predict`` takes of ``predict_proba``.
+    """
+    proba = clf.predict_proba(x)[:, 1]
+    return proba, clf.classes_[(proba > 0.5).astype(np.int64)]
+
+
+def link_prediction_scores(clf, x_test, y_test):
+    return link_prediction_metrics(y_test, *predict_links(clf, x_test))
+
+
+def node_classification_scores(clf, x_test, y_test):
+    y_pred = clf.predict(x_test)
+    accuracy = accuracy_score(y_test, y_pred)
+    mcc = matthews_corrcoef(y_test, y_pred)
+    micro_f1 = f1_score(y_test, y_pred, average="micro")
+    macro_f1 = f1_score(y_test, y_pred, average="macro")
+    return accuracy, micro_f1, macro_f1, mcc
+
+
+def fit_and_score(clf, x_train, y_train, x_test, y_test, score):
+    clf.fit(x_train, y_train)
+    return clf, score(clf, x_test, y_test)
+
+
+def fit_classifiers(classifiers, x_train, y_train, x_test, y_test, score, workers=1):
+    """Fit and score each classifier of a dict of name -> estimator in a pool of ``workers`` processes.
+
+    The feature matrices are handed to the workers as read-only memory maps, so they are shared rather than
+    copied into each process.
+
+    :return: a dict of name -> the scores returned by ``score(clf, x_test, y_test)``
+    """
+    results = joblib.Parallel(n_jobs=min(workers, len(classifiers)), max_nbytes='1M', mmap_mode='r')(
+        joblib.delayed(fit_and_score)(clf, x_train, y_train, x_test, y_test, score)
+        for clf in classifiers.values()
+    )
+    return {name: scores for name, (_, scores) in zip(classifiers, results)}
+
+
+def print_metrics_table(results, columns):
+    print(('%-12s' + ' %9s' * len(columns)) % ('Classifier', *columns))
+    for name, scores in results.items():
+        print(('%-12s' + ' %9.3f' * len(columns)) % (name, *scores))
+
+
 def create_prediction_model(
     *,
     embeddings,
     original_graph,
     save_model=None,
     classifier_type=None,
+    edge_operator='hadamard',
+    chunk_size: Optional[int] = None,
+    spill_dir: Optional[str] = None,
+    streaming_epochs: int = 5,
+    svm_features: Optional[int] = None,
 ):
-    train_neg_edges = generate_neg_edges(original_graph, len(original_graph.edges()))
-    x_train, y_train = get_xy_sets(embeddings, original_graph.edges(), train_neg_edges)
-    if classifier_type == 'SVM':
-        clf = SVC(gamma='auto', probability=True)
-    elif classifier_type == 'RF':
-        clf = RandomForestClassifier(n_estimators=100, max_depth=2)
-    elif classifier_type == 'EN':
-        clf = SGDClassifier(loss="log", penalty="elasticnet")
+    original_edges = unique_edges(load_edges(original_graph))
+    train_neg_edges, _ = sample_link_prediction_negatives(original_edges, len(original_edges.src), 0)
+    if chunk_size is not None:
+        embeddings = ebd.as_embedding_matrix(embeddings)
+        clf = fit_streaming(
+            streaming_classifier(classifier_type),
+            embeddings,
+            *get_xy_rows(embeddings, original_edges, train_neg_edges),
+            chunk_size=chunk_size,
+            epochs=streaming_epochs,
+            operator=edge_operator,
+            spill_dir=spill_dir,
+        )
     else:
-        clf = LogisticRegression(solver='lbfgs')
-    clf.fit(x_train, y_train)
+        x_train, y_train = get_xy_sets(embeddings, original_edges, train_neg_edges, operator=edge_operator)
+        clf = get_link_classifier(classifier_type, svm_features=svm_features)
+        clf.fit(x_train, y_train)
     if save_model is not None:
         joblib.dump(clf, save_model)
 
@@ -88,41 +423,103 @@ def do_node_classification(
     testing_ratio=0.2,
     save_model=None,
     classifier_type=None,
+    workers=1,
 ):
+    """Train a node classifier on the labeled training nodes and evaluate it on the testing nodes.
+
+    ``labels`` holds the label list of each node of ``node_list``, or is a sparse label indicator matrix. If some
+    node has several labels (or no label), one classifier per label is trained in ``workers`` processes, see
+    :func:`multilabel_classification_scores`.
+    """
+    multilabel = is_multilabel(labels)
     x_train, y_train, x_test, y_test = split_train_test_classify(
         embeddings,
         node_list,
-        labels,
+        label_matrix(labels)[0] if multilabel and not sp.issparse(labels) else labels,
         testing_ratio=testing_ratio,
     )
-
-    # binarizer = MultiLabelBinarizer(sparse_output=True)
-    # y_all = np.append(y_train, y_test)
-    # binarizer.fit(y_all)
-    # y_train = binarizer.transform(y_train).todense()
-    # y_test = binarizer.transform(y_test).todense()
-    if classifier_type == 'SVM':
-        clf = LinearSVC()
-    elif classifier_type == 'RF':
-        clf = RandomForestClassifier(n_estimators=100, max_depth=2)
-    elif classifier_type == 'EN':
-        clf = SGDClassifier(loss="log", penalty="elasticnet")
+    if multilabel:
+        clf, score = TopKRanker(get_node_classifier(classifier_type), n_jobs=workers), multilabel_classification_scores
     else:
-        clf = LogisticRegression(solver='lbfgs')
-    clf.fit(x_train, y_train)
-    # y_pred_prob = model.predict_proba(x_test)
-
-    # small trick : we assume that we know how many label to predict
-    # y_pred = get_y_pred(y_test, y_pred_prob)
-    y_pred = clf.predict(x_test)
-    accuracy = accuracy_score(y_test, y_pred)
-    mcc = matthews_corrcoef(y_test, y_pred)
-    micro_f1 = f1_score(y_test, y_pred, average="micro")
-    macro_f1 = f1_score(y_test, y_pred, average="macro")
+        clf, score = get_node_classifier(classifier_type), node_classification_scores
+    clf, result = fit_and_score(clf, x_train, y_train, x_test, y_test, score)
     if save_model is not None:
         joblib.dump(clf, save_model)
 
+    accuracy, micro_f1, macro_f1, mcc = result
     print('#' * 9 + ' Node Classification Performance ' + '#' * 9)
     print(f'Accuracy: {accuracy:.3f}, Micro-F1: {micro_f1:.3f}, Macro-F1: {macro_f1:.3f}, MCC: {mcc:.3f}')
     print('#' * 50)
+    return result
+
+
+def compare_node_classifiers(
+    *,
+    embeddings,
+    node_list,
+    labels,
+    testing_ratio=0.2,
+    classifier_types=('LR', 'EN', 'RF', 'SVM'),
+    workers=1,
+):
+    """Evaluate several node classifiers on the same train/test split, fitting them in parallel.
+
+    :return: a dict of classifier type -> (accuracy, micro-F1, macro-F1, MCC)
+    """
+    multilabel = is_multilabel(labels)
+    x_train, y_train, x_test, y_test = split_train_test_classify(
+        embeddings,
+        node_list,
+        label_matrix(labels)[0] if multilabel and not sp.issparse(labels) else labels,
+        testing_ratio=testing_ratio,
+    )
+    classifiers = {classifier_type: get_node_classifier(classifier_type) for classifier_type in classifier_types}
+    score = node_classification_scores
+    if multilabel:
+        classifiers = {name: TopKRanker(clf) for name, clf in classifiers.items()}
+        score = multilabel_classification_scores
+    results = fit_classifiers(classifiers, x_train, y_train, x_test, y_test, score, workers=workers)
+    print('#' * 9 + ' Node Classification Performance ' + '#' * 9)
+    print_metrics_table(results, ['Accuracy', 'Micro-F1', 'Macro-F1', 'MCC'])
+    print('#' * 50)
+    return results
+
+
+def multilabel_classification_scores(clf, x_test, y_test):
+    """Scores of a :class:`bionev.OpenNE.classify.TopKRanker` on a sparse label indicator matrix."""
+    # small trick : we assume that we know how many label to predict
+    y_pred = clf.predict(x_test, top_k_list=np.diff(y_test.indptr))
+    return multilabel_metrics(y_test, y_pred)
+
+
+def multilabel_metrics(y_true, y_pred):
+    """(Subset accuracy, micro-F1, macro-F1, MCC) of two sparse label indicator matrices.
+
+    The MCC is the one of all (node, label) cells.
+    """
+    y_true = sp.csr_matrix(y_true, dtype=bool)
+    y_pred = sp.csr_matrix(y_pred, dtype=bool)
+    tp = np.asarray(y_true.multiply(y_pred).sum(axis=0), dtype=np.float64).ravel()
+    num_true = np.asarray(y_true.sum(axis=0), dtype=np.float64).ravel()
+    num_pred = np.asarray(y_pred.sum(axis=0), dtype=np.float64).ravel()
+    both = num_true + num_pred
+    micro_f1 = 2 * tp.sum() / both.sum() if both.sum() else 0.0
+    macro_f1 = np.mean(np.divide(2 * tp, both, out=np.zeros_like(tp), where=both > 0)) if len(tp) else 0.0
+    wrong_cells = np.diff((y_true != y_pred).tocsr().indptr)
+    accuracy = np.mean(wrong_cells == 0) if len(wrong_cells) else 0.0
+    tp, fp, fn = tp.sum(), num_pred.sum() - tp.sum(), num_true.sum() - tp.sum()
+    tn = float(y_true.shape[0]) * y_true.shape[1] - tp - fp - fn
+    denominator = np.sqrt((tp + fp) * (tp + fn) * (tn + fp) * (tn + fn))
+    mcc = (tp * tn - fp * fn) / denominator if denominator else 0.0
     return accuracy, micro_f1, macro_f1, mcc
+
+
+def get_node_classifier(classifier_type: Optional[str] = None):
+    if classifier_type == 'SVM':
+        return LinearSVC()
+    elif classifier_type == 'RF':
+        return RandomForestClassifier(n_estimators=100, max_depth=2)
+    elif classifier_type == 'EN':
+        return SGDClassifier(loss=LOG_LOSS, penalty="elasticnet")
+    else:
+        return LogisticRegression(solver='lbfgs')
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+
+"""Exhaustive top-k link ranking with a linear link classifier.
+
+With a linear model on Hadamard edge features, the score of a pair is a weighted inner product
+``w . (e_u * e_v) + b = (e_u * w) . e_v + b``, so scoring a block of queries against all candidates is one matrix
+product. The pair matrix is never materialized: queries are processed in row blocks, candidates in column
+blocks, and only a running top-k per query is kept.
+"""
+
+import numpy as np
+import scipy.sparse as sp
+
+import bionev.embedding as ebd
+from bionev.edgelist import load_edges
+from bionev.utils import edge_rows
+
+# the link classifiers and edge operators whose scores are a matrix product of the embeddings
+RANKING_CLASSIFIERS = ('LR', 'EN', 'ENCV')
+RANKING_OPERATORS = ('hadamard', 'average', 'concat')
+
+
+def linear_weights(clf):
+    """The coefficients and intercept of a fitted linear binary classifier (LR, EN, ENCV)."""
+    if not hasattr(clf, 'coef_'):
+        raise ValueError('Link ranking needs a linear classifier (LR, EN or ENCV), not %s' % type(clf).__name__)
+    return np.asarray(clf.coef_, dtype=np.float32).ravel(), float(np.ravel(clf.intercept_)[0])
+
+
+def known_edge_matrix(edges, embeddings):
+    """Symmetric boolean CSR matrix over the embedding rows marking the edges of ``edges``."""
+    n = len(embeddings)
+    src, dst = edge_rows(load_edges(edges), embeddings.index)
+    known = sp.csr_matrix((np.ones(len(src), dtype=bool), (src, dst)), shape=(n, n))
+    return (known + known.T).tocsr()
+
+
+class LinkRanker(object):
+    """Scores every query node against every candidate node with a linear link classifier.
+
+    :param embeddings: an :class:`bionev.embedding.EmbeddingMatrix` or a dict of node id -> vector
+    :param clf: the fitted linear classifier
+    :param operator: the edge operator the classifier was trained with: hadamard, average or concat
+    :param known_edges: edges (EdgeList, networkx graph or edge list file) never returned, e.g. the training graph
+    :param candidates: node ids that can be returned, all nodes if None
+    """
+
+    def __init__(self, embeddings, clf, operator='hadamard', known_edges=None, candidates=None):
+        self.embeddings = ebd.as_embedding_matrix(embeddings)
+        self.weights, self.intercept = linear_weights(clf)
+        self.operator = operator
+        matrix = self.embeddings.matrix
+        dimensions = self.embeddings.dimensions
+        if operator == 'concat':
+            if len(self.weights) != 2 * dimensions:
+                raise ValueError('The classifier has %d coefficients for %d dimensional embeddings'
+                                 % (len(self.weights), dimensions))
+        elif operator in ('hadamard', 'average'):
+            if len(self.weights) != dimensions:
+                raise ValueError('The classifier has %d coefficients for %d dimensional embeddings'
+                                 % (len(self.weights), dimensions))
+        else:
+            raise ValueError('Link ranking is not available for the %s edge operator' % operator)
+
+        n = len(self.embeddings)
+        if candidates is None:
+            self.candidate_rows = np.arange(n)
+        else:
+            self.candidate_rows = self.embeddings.rows(candidates)
+        self.candidates = np.asarray(matrix[self.candidate_rows], dtype=np.float32)
+        # column of each node in the candidate matrix, -1 if it is not a candidate
+        self.column = np.full(n, -1, dtype=np.int64)
+        self.column[self.candidate_rows] = np.arange(len(self.candidate_rows))
+        self.known = None if known_edges is None else known_edge_matrix(known_edges, self.embeddings)
+
+        # the part of the score that only depends on the candidate
+        if operator == 'average':
+            self.candidate_bias = 0.5 * self.candidates.dot(self.weights)
+        elif operator == 'concat':
+            self.candidate_bias = self.candidates.dot(self.weights[dimensions:])
+        else:
+            self.candidate_bias = None
+
+    def block_scores(self, rows, start, stop):
+        """Decision values of the queries at embedding ``rows`` against candidates ``start:stop``."""
+        queries = np.asarray(self.embeddings.matrix[rows], dtype=np.float32)
+        dimensions = self.embeddings.dimensions
+        if self.operator == 'hadamard':
+            scores = (queries * self.weights).dot(self.candidates[start:stop].T)
+        elif self.operator == 'average':
+            scores = np.add.outer(0.5 * queries.dot(self.weights), self.candidate_bias[start:stop])
+        else:
+            scores = np.add.outer(queries.dot(self.weights[:dimensions]), self.candidate_bias[start:stop])
+        scores += self.intercept
+        return scores
+
+    def pair_scores(self, heads, tails):
+        """Decision values of the pairs of embedding rows ``heads[i]``, ``tails[i]``."""
+        matrix = self.embeddings.matrix
+        dimensions = self.embeddings.dimensions
+        queries = np.asarray(matrix[heads], dtype=np.float32)
+        targets = np.asarray(matrix[tails], dtype=np.float32)
+        if self.operator == 'hadamard':
+            scores = np.einsum('ij,ij->i', queries * self.weights, targets)
+        elif self.operator == 'average':
+            scores = 0.5 * (queries.dot(self.weights) + targets.dot(self.weights))
+        else:
+            scores = queries.dot(self.weights[:dimensions]) + targets.dot(self.weights[dimensions:])
+        return scores + self.intercept
+
+    def filtered_ranks(self, heads, tails, column_block_size=1 << 14):
+        """Filtered rank of each tail among the candidates of its head, given as parallel arrays of embedding rows.
+
+        The rank is one plus the number of candidates scored higher than the tail, not counting the head itself,
+        the known edges and the tail, plus half the number of candidates with the same score.
+        """
+        block_heads, head_of = np.unique(heads, return_inverse=True)
+        head_of = head_of.ravel()
+        target_keys = (head_of.astype(np.uint64) << np.uint64(32)) | _sortable_bits(self.pair_scores(heads, tails))
+        masked_query, masked_column = self._masked_columns(block_heads)
+        tail_columns = self.column[tails]
+        masked_query = np.concatenate([masked_query, head_of[tail_columns >= 0]])
+        masked_column = np.concatenate([masked_column, tail_columns[tail_columns >= 0]])
+
+        greater = np.zeros(len(heads))
+        ties = np.zeros(len(heads))
+        for start in range(0, len(self.candidate_rows), column_block_size):
+            stop = min(start + column_block_size, len(self.candidate_rows))
+            scores = self.block_scores(block_heads, start, stop)
+            in_block = (masked_column >= start) & (masked_column < stop)
+            scores[masked_query[in_block], masked_column[in_block] - start] = -np.inf
+            # with the row in the high bits, the sorted rows form one sorted array of keys
+            keys = np.sort(scores, axis=1)
+            keys = ((np.arange(len(block_heads), dtype=np.uint64) << np.uint64(32))[:, None]
+                    | _sortable_bits(keys)).ravel()
+            left = np.searchsorted(keys, target_keys, side='left')
+            right = np.searchsorted(keys, target_keys, side='right')
+            greater += (head_of + 1) * (stop - start) - right
+            ties += right - left
+        return 1 + greater + ties / 2
+
+    def top_k(self, queries=None, k=10, block_size=1024, column_block_size=1 << 16):
+        """Yield the ``k`` best new links of each query, ``block_size`` queries at a time.
+
+        Self pairs and known edges are skipped. Each item is ``(query_ids, target_ids, scores)`` where
+        ``target_ids`` and ``scores`` have one row per query, best first, and the scores are link probabilities
+        (the logistic function of the decision value). A row is padded with None and nan if it has fewer than
+        ``k`` candidates.
+        """
+        nodes = np.array(self.embeddings.nodes, dtype=object)
+        query_rows = np.arange(len(nodes)) if queries is None else self.embeddings.rows(queries)
+        num_candidates = len(self.candidate_rows)
+        k = min(k, num_candidates)
+        for block_start in range(0, len(query_rows), block_size):
+            rows = query_rows[block_start:block_start + block_size]
+            best_scores = np.full((len(rows), k), -np.inf, dtype=np.float32)
+            best_columns = np.full((len(rows), k), -1, dtype=np.int64)
+            masked = self._masked_columns(rows)
+            for start in range(0, num_candidates, column_block_size):
+                stop = min(start + column_block_size, num_candidates)
+                scores = self.block_scores(rows, start, stop)
+                in_block = (masked[1] >= start) & (masked[1] < stop)
+                scores[masked[0][in_block], masked[1][in_block] - start] = -np.inf
+                # merge the block into the running top k
+                scores = np.hstack([best_scores, scores])
+                columns = np.hstack([best_columns, np.broadcast_to(np.arange(start, stop), (len(rows), stop - start))])
+                top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+                best_scores = np.take_along_axis(scores, top, axis=1)
+                best_columns = np.take_along_axis(columns, top, axis=1)
+
+            order = np.argsort(-best_scores, axis=1, kind='stable')
+            best_scores = np.take_along_axis(best_scores, order, axis=1)
+            best_columns = np.take_along_axis(best_columns, order, axis=1)
+            found = np.isfinite(best_scores)
+            targets = np.full(best_columns.shape, None, dtype=object)
+            targets[found] = nodes[self.candidate_rows[best_columns[found]]]
+            probabilities = np.full(best_scores.shape, np.nan)
+            probabilities[found] = 1.0 / (1.0 + np.exp(-best_scores[found].astype(np.float64)))
+            yield nodes[rows].tolist(), targets, probabilities
+
+    def _masked_columns(self, rows):
+        """(query, candidate column) coordinates of the self pairs and known edges of a query block."""
+        query = [np.arange(len(rows))]
+        column = [self.column[rows]]
+        if self.known is not None:
+            block = self.known[rows].tocoo()
+            query.append(block.row)
+            column.append(self.column[block.col])
+        query, column = np.concatenate(query), np.concatenate(column)
+        keep = column >= 0
+        return query[keep], column[keep]
+
+
+def _sortable_bits(scores):
+    """Map float32 scores to uint64 integers (below 2 ** 32) with the same order."""
+    bits = np.ascontiguousarray(scores, dtype=np.float32).view(np.uint32).astype(np.uint64)
+    return np.where(bits >= 0x80000000, np.uint64(0xFFFFFFFF) - bits, bits | np.uint64(0x80000000))
+
+
+def rank_links(embeddings, clf, queries=None, k=10, operator='hadamard', known_edges=None, candidates=None,
+               block_size=1024):
+    """The ``k`` best new links of each query as a dict of query id -> list of (target id, probability)."""
+    ranker = LinkRanker(embeddings, clf, operator=operator, known_edges=known_edges, candidates=candidates)
+    ranking = {}
+    for query_ids, targets, probabilities in ranker.top_k(queries, k=k, block_size=block_size):
+        for query, row_targets, row_probabilities in zip(query_ids, targets.tolist(), probabilities.tolist()):
+            ranking[query] = [(t, p) for t, p in zip(row_targets, row_probabilities) if t is not None]
+    return ranking
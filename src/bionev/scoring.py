@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+
+"""Scoring of candidate links with a saved link prediction model.
+
+The classifier is the one saved by ``--model-path`` (see :func:`bionev.pipeline.create_prediction_model`) and the
+embeddings are the ones saved by ``--output``, preferably in the binary ``.npy`` form so that every worker process
+memory-maps the same pages.
+"""
+
+import collections
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+
+import bionev.embedding as ebd
+from bionev.edgelist import EdgeList, intern_nodes, iter_chunks, open_edgelist, parse_edgelist_bytes
+from bionev.utils import edge_features
+
+
+class LinkScorer(object):
+    """Probability of a link between two nodes according to a trained link classifier."""
+
+    def __init__(self, clf, embeddings, operator='hadamard'):
+        self.clf = clf
+        self.embeddings = ebd.as_embedding_matrix(embeddings)
+        self.operator = operator
+
+    def score(self, pairs):
+        """Score ``(u, v)`` node id pairs. A pair with a node that has no embedding gets nan."""
+        tokens = np.char.encode(np.asarray(pairs, dtype=str).reshape(-1), 'utf-8')
+        nodes, codes = intern_nodes(tokens)
+        return self.score_edges(EdgeList(nodes, codes[0::2], codes[1::2], None))
+
+    def score_edges(self, edges):
+        """Score the edges of an :class:`bionev.edgelist.EdgeList`, looking each distinct node up once."""
+        index = self.embeddings.index
+        rows = np.fromiter((index.get(node, -1) for node in edges.nodes), dtype=np.int64, count=len(edges.nodes))
+        src, dst = rows[edges.src], rows[edges.dst]
+        known = (src >= 0) & (dst >= 0)
+        scores = np.full(len(src), np.nan)
+        if known.any():
+            x = edge_features(self.embeddings.matrix, src[known], dst[known], self.operator)
+            scores[known] = self.clf.predict_proba(x)[:, 1]
+        return scores
+
+    def score_lines(self, data):
+        """Score a chunk of ``u v`` edge list lines, returning the matching ``u v score`` lines."""
+        edges = parse_edgelist_bytes(data, weighted=False)
+        scores = self.score_edges(edges)
+        nodes = np.array(edges.nodes, dtype=object)
+        return ''.join('%s\t%s\t%.6g\n' % line
+                       for line in zip(nodes[edges.src].tolist(), nodes[edges.dst].tolist(), scores.tolist()))
+
+
+def load_scorer(model_path, embeddings_path, operator='hadamard'):
+    """A :class:`LinkScorer` from a saved classifier and saved (memory-mapped if binary) embeddings."""
+    return LinkScorer(joblib.load(model_path), ebd.load_embeddings(embeddings_path), operator=operator)
+
+
+_scorer = None
+
+
+def _init_worker(model_path, embeddings_path, operator):
+    global _scorer
+    _scorer = load_scorer(model_path, embeddings_path, operator=operator)
+
+
+def _score_lines(data):
+    return _scorer.score_lines(data)
+
+
+def score_file(model_path, embeddings_path, pairs_path, output_path, operator='hadamard', workers=1,
+               chunk_size=1 << 24):
+    """Score every ``u v`` pair of ``pairs_path`` (optionally compressed) into ``u v score`` lines.
+
+    The pairs are read in chunks of ``chunk_size`` bytes that are scored by ``workers`` processes, each loading
+    the model and the embeddings once. At most two chunks per worker are in flight, and the output keeps the
+    order of the input.
+
+    :return: the number of scored pairs
+    """
+    num_pairs = 0
+    with open_edgelist(pairs_path) as f, open(output_path, 'w') as out:
+        chunks = iter_chunks(f, chunk_size)
+        if workers <= 1:
+            scorer = load_scorer(model_path, embeddings_path, operator=operator)
+            for lines in map(scorer.score_lines, chunks):
+                num_pairs += lines.count('\n')
+                out.write(lines)
+            return num_pairs
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(model_path, embeddings_path, operator)) as executor:
+            for lines in _bounded_map(executor, _score_lines, chunks, 2 * workers):
+                num_pairs += lines.count('\n')
+                out.write(lines)
+    return num_pairs
+
+
+def _bounded_map(executor, fn, iterable, depth):
+    """Like ``executor.map``, but only submits ``depth`` items ahead of the result being consumed."""
+    pending = collections.deque()
+    for item in iterable:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= depth:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
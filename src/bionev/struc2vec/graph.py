@@ -10,9 +10,12 @@ from itertools import permutations
 from multiprocessing import cpu_count
 from time import time
 
+import numpy as np
 from six import iterkeys
 from six.moves import range, zip_longest
 
+from bionev.edgelist import read_edgelist
+
 
 class Graph(defaultdict):
     """Efficient basic implementation of nx `Graph' â€“ Undirected graphs with self loops"""
@@ -188,22 +191,30 @@ def load_adjacencylist(file_, undirected=False, chunksize=10000, unchecked=True)
 
 
 def load_edgelist(file_, undirected=True):
+    return from_edges(read_edgelist(file_), undirected=undirected)
+
+
+def from_edges(edges, undirected=True):
+    node_ids = np.array(edges.nodes, dtype=np.int64)
+    src, dst = edges.src, node_ids[edges.dst]
+    has_out_edges = np.bincount(src, minlength=len(node_ids)) > 0
+    isolated = ~has_out_edges & (np.bincount(edges.dst, minlength=len(node_ids)) == 0)
+    if undirected:
+        src, dst = np.concatenate([src, edges.dst]), np.concatenate([dst, node_ids[src]])
+        has_out_edges = has_out_edges | (np.bincount(edges.dst, minlength=len(node_ids)) > 0)
+
+    # sorted, de-duplicated neighbour lists, as make_consistent would leave them
+    order = np.lexsort((dst, src))
+    src, dst = src[order], dst[order]
+    keep = np.ones(len(src), dtype=bool)
+    keep[1:] = (src[1:] != src[:-1]) | (dst[1:] != dst[:-1])
+    src, dst = src[keep], dst[keep]
+    bounds = np.searchsorted(src, np.arange(len(node_ids) + 1)).tolist()
+
     G = Graph()
-    with open(file_) as f:
-        for l in f:
-            if (len(l.strip().split()[:2]) > 1):
-                x, y = l.strip().split()[:2]
-                x = int(x)
-                y = int(y)
-                G[x].append(y)
-                if undirected:
-                    G[y].append(x)
-            else:
-                x = l.strip().split()[:2]
-                x = int(x[0])
-                G[x] = []
-
-    G.make_consistent()
+    for code, node in enumerate(node_ids.tolist()):
+        if has_out_edges[code] or isolated[code]:
+            G[node] = dst[bounds[code]:bounds[code + 1]].tolist()
     return G
 
 
@@ -1,42 +1,54 @@
 # -*- coding: utf-8 -*-
 
-import copy
-import itertools
-import random
+import json
+import os
+from collections import namedtuple
 
 import networkx as nx
 import numpy as np
+import scipy.sparse as sp
 
 import bionev.OpenNE.graph as og
+import bionev.embedding as ebd
 import bionev.struc2vec.graph as sg
+from bionev.edgelist import (
+    CACHE_SUFFIX, EdgeList, content_hash, load_edges, read_edgelist, save_arrays, to_networkx, unique_edges,
+)
 
 
 def read_for_OpenNE(filename, weighted=False):
     graph = og.Graph()
     print("Loading training graph for learning embedding...")
-    graph.read_edgelist(filename=filename, weighted=weighted)
+    if isinstance(filename, str) and os.path.isdir(filename):
+        # a graph built on disk by bionev.edgelist.build_csr, with the weights it was built with
+        graph.read_csr(filename)
+    else:
+        graph.read_edges(load_edges(filename, weighted=weighted))
     print("Graph Loaded...")
     return graph
 
 
 def read_for_struc2vec(filename):
     print("Loading training graph for learning embedding...")
-    graph = sg.load_edgelist(filename, undirected=True)
+    graph = sg.from_edges(load_edges(filename), undirected=True)
     print("Graph Loaded...")
     return graph
 
 
 def read_for_gae(filename, weighted=False):
     print("Loading training graph for learning embedding...")
-    edgelist = np.loadtxt(filename, dtype='float')
+    edges = load_edges(filename, weighted=weighted)
+    node_ids = np.array(edges.nodes, dtype=np.int64)
+    src, dst = node_ids[edges.src], node_ids[edges.dst]
     if weighted:
-        edgelist = [(int(edgelist[idx, 0]), int(edgelist[idx, 1])) for idx in range(edgelist.shape[0]) if
-                    edgelist[idx, 2] > 0]
-    else:
-        edgelist = [(int(edgelist[idx, 0]), int(edgelist[idx, 1])) for idx in range(edgelist.shape[0])]
-    min_idx = min([x[0] for x in edgelist] + [x[1] for x in edgelist])
-    max_idx = max([x[0] for x in edgelist] + [x[1] for x in edgelist])
-    adj = nx.adjacency_matrix(nx.from_edgelist(edgelist), nodelist=list(range(min_idx, max_idx + 1)))
+        src, dst = src[edges.weights > 0], dst[edges.weights > 0]
+    min_idx = min(src.min(), dst.min())
+    max_idx = max(src.max(), dst.max())
+    adj = sp.coo_matrix(
+        (np.ones(2 * len(src)), (np.concatenate([src, dst]) - min_idx, np.concatenate([dst, src]) - min_idx)),
+        shape=(max_idx - min_idx + 1, max_idx - min_idx + 1),
+    ).tocsr()
+    adj.data[:] = 1
     print(adj)
     print("Graph Loaded...")
     print(adj.shape)
@@ -44,87 +56,248 @@ def read_for_gae(filename, weighted=False):
 
 
 def read_for_SVD(filename, weighted=False):
-    if weighted:
-        graph = nx.read_weighted_edgelist(filename)
-    else:
-        graph = nx.read_edgelist(filename)
-    return graph
+    if isinstance(filename, nx.Graph):
+        return filename
+    return to_networkx(load_edges(filename, weighted=weighted))
 
 
 def read_graph(edgelist, weighted=False):
-    if weighted:
-        graph = nx.read_weighted_edgelist(edgelist)
-    else:
-        graph = nx.read_edgelist(edgelist)
-    return graph
+    return to_networkx(read_edgelist(edgelist, weighted=weighted))
 
 
 def train_test_graph(training_edgelist, testing_edgelist, weighted=False):
-    g_train = read_graph(training_edgelist, weighted=weighted)
-    g_test = nx.read_edgelist(testing_edgelist)
-    testing_pos_edges = g_test.edges
-    node_num1, edge_num1 = len(g_train.nodes), len(g_train.edges)
-    print('Training Graph: nodes:', node_num1, 'edges:', edge_num1)
-    return g_train, testing_pos_edges, training_edgelist
-
-
-def split_train_test_graph(*, input_graph, testing_ratio=0.2, weighted=False):
-    node_num1, edge_num1 = len(input_graph.nodes), len(input_graph.edges)
-    print('Original Graph: nodes:', node_num1, 'edges:', edge_num1)
-    testing_edges_num = int(len(input_graph.edges) * testing_ratio)
-    testing_pos_edges = random.sample(input_graph.edges, testing_edges_num)
-    g_train = copy.deepcopy(input_graph)
-    for edge in testing_pos_edges:
-        node_u, node_v = edge
-        if g_train.degree(node_u) > 1 and g_train.degree(node_v) > 1:
-            g_train.remove_edge(node_u, node_v)
-
-    train_graph_filename = 'graph_train.edgelist'
-    if weighted:
-        nx.write_weighted_edgelist(g_train, train_graph_filename)
+    train_edges = unique_edges(read_edgelist(training_edgelist, weighted=weighted))
+    test_edges = unique_edges(read_edgelist(testing_edgelist))
+    print('Training Graph: nodes:', len(train_edges.nodes), 'edges:', len(train_edges.src))
+    return train_edges, test_edges
+
+
+def split_train_test_edges(edges, testing_ratio=0.2, random_state=None):
+    """Split the edges of an undirected graph into training and testing edges.
+
+    A random ``testing_ratio`` of the edges is used for testing. Each of them is also removed from the training
+    edges unless that would leave one of its nodes without edges. The graph is never copied: the split works on
+    the edge index arrays and a degree counter.
+
+    :param edges: the graph, as an :class:`bionev.edgelist.EdgeList` (or anything :func:`load_edges` reads)
+    :param random_state: a :class:`numpy.random.RandomState`, the global numpy generator if None
+    :return: the training and the testing :class:`bionev.edgelist.EdgeList`, both over the full node list
+    """
+    edges = unique_edges(edges if isinstance(edges, EdgeList) else load_edges(edges))
+    print('Original Graph: nodes:', len(edges.nodes), 'edges:', len(edges.src))
+    train_index, test_index = split_edge_index(edges, testing_ratio, random_state=random_state)
+    train_edges, test_edges = take_edges(edges, train_index), take_edges(edges, test_index, weighted=False)
+    print('Training Graph: nodes:', len(edges.nodes), 'edges:', len(train_edges.src))
+    return train_edges, test_edges
+
+
+def split_edge_index(edges, testing_ratio=0.2, random_state=None):
+    """Positions of the training and testing edges in ``edges``, see :func:`split_train_test_edges`."""
+    rng = np.random if random_state is None else random_state
+    n, m = len(edges.nodes), len(edges.src)
+    test = rng.permutation(m)[:int(m * testing_ratio)]
+
+    degree = (np.bincount(edges.src, minlength=n) + np.bincount(edges.dst, minlength=n)).tolist()
+    removed = np.zeros(m, dtype=bool)
+    for i, u, v in zip(test.tolist(), edges.src[test].tolist(), edges.dst[test].tolist()):
+        if degree[u] > 1 and degree[v] > 1:
+            degree[u] -= 1
+            degree[v] -= 1
+            removed[i] = True
+    return np.flatnonzero(~removed), test
+
+
+def take_edges(edges, index, weighted=True):
+    weights = None if edges.weights is None or not weighted else edges.weights[index]
+    return EdgeList(edges.nodes, edges.src[index], edges.dst[index], weights)
+
+
+def sample_edges(edges, fraction, random_state=None):
+    """A uniformly random ``fraction`` (at least one edge) of the edges of an EdgeList, in file order."""
+    rng = random_state if isinstance(random_state, np.random.RandomState) else np.random.RandomState(random_state)
+    num_edges = len(edges.src)
+    size = min(num_edges, max(1, int(round(fraction * num_edges))))
+    return take_edges(edges, np.sort(rng.choice(num_edges, size, replace=False)), weighted=False)
+
+
+def split_train_test_graph(*, input_graph, testing_ratio=0.2):
+    """Like :func:`split_train_test_edges`, for a networkx graph: returns the training graph and testing edges."""
+    train_edges, test_edges = split_train_test_edges(input_graph, testing_ratio=testing_ratio)
+    return to_networkx(train_edges), edge_pairs(test_edges)
+
+
+def edge_pairs(edges):
+    """The ``(u, v)`` node id pairs of an :class:`bionev.edgelist.EdgeList`."""
+    nodes = edges.nodes
+    return [(nodes[u], nodes[v]) for u, v in zip(edges.src.tolist(), edges.dst.tolist())]
+
+
+def edge_rows(edges, look_up):
+    """Source and target rows of ``edges`` (an EdgeList, networkx graph or node id pairs) in ``look_up``."""
+    if isinstance(edges, nx.Graph):
+        edges = load_edges(edges)
+    if isinstance(edges, EdgeList):
+        # only look up the nodes that have edges, the node list may hold nodes unknown to look_up
+        used = np.unique(np.concatenate([edges.src, edges.dst]))
+        nodes = edges.nodes
+        rows = np.zeros(len(nodes), dtype=np.int64)
+        rows[used] = np.fromiter((look_up[nodes[i]] for i in used.tolist()), dtype=np.int64, count=len(used))
+        return rows[edges.src], rows[edges.dst]
+    pairs = np.array([(look_up[u], look_up[v]) for u, v in edges], dtype=np.int64).reshape(-1, 2)
+    return pairs[:, 0], pairs[:, 1]
+
+
+def pair_keys(src, dst, n, directed=False):
+    """Pack node index pairs into int64 keys ``u * n + v``; undirected pairs are ordered so that ``u < v``."""
+    src = np.asarray(src, dtype=np.int64)
+    dst = np.asarray(dst, dtype=np.int64)
+    if not directed:
+        src, dst = np.minimum(src, dst), np.maximum(src, dst)
+    return src * n + dst
+
+
+def sample_neg_pairs(n, edge_keys, m, directed=False, random_state=None):
+    """Draw m distinct node index pairs ``u < v`` whose key is not in the sorted ``edge_keys``.
+
+    Random pairs are drawn in batches and the ones that are edges, self-pairs or already drawn are rejected,
+    so the cost grows with m rather than with the n^2 candidate pairs. With ``directed``, ``edge_keys`` holds
+    the ordered keys ``u * n + v`` and a pair counts as an edge only if ``u -> v`` exists.
+    """
+    rng = np.random if random_state is None else random_state
+    edge_keys = np.unique(np.asarray(edge_keys, dtype=np.int64))
+    if directed:
+        # only u -> v with u < v can reject a candidate pair
+        edge_keys = edge_keys[edge_keys // n < edge_keys % n]
     else:
-        nx.write_edgelist(g_train, train_graph_filename, data=False)
-
-    node_num1, edge_num1 = len(g_train.nodes), len(g_train.edges)
-    print('Training Graph: nodes:', node_num1, 'edges:', edge_num1)
-
-    return input_graph, g_train, testing_pos_edges, train_graph_filename
+        edge_keys = edge_keys[edge_keys // n != edge_keys % n]
+    num_candidates = n * (n - 1) // 2 - len(edge_keys)
+    if m > num_candidates:
+        raise ValueError('Cannot sample %d negative edges, only %d node pairs are not edges' % (m, num_candidates))
+    if m == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    if 2 * m > num_candidates:
+        # most of the candidates are needed: enumerating them is cheaper than rejecting duplicates
+        src, dst = np.triu_indices(n, k=1)
+        keys = np.setdiff1d(src.astype(np.int64) * n + dst, edge_keys, assume_unique=True)
+        keys = rng.permutation(keys)[:m]
+        return keys // n, keys % n
+
+    accept_rate = num_candidates / (n * n / 2.0)
+    keys = np.zeros(0, dtype=np.int64)
+    while len(keys) < m:
+        size = int((m - len(keys)) / accept_rate * 1.1) + 64
+        batch = pair_keys(rng.randint(0, n, size), rng.randint(0, n, size), n)
+        batch = batch[batch // n != batch % n]
+        if len(edge_keys):
+            pos = np.searchsorted(edge_keys, batch)
+            pos[pos == len(edge_keys)] = 0
+            batch = batch[edge_keys[pos] != batch]
+        keys = np.concatenate([keys, batch])
+        # drop repeated pairs, keeping the first draw so the order stays random
+        _, first = np.unique(keys, return_index=True)
+        keys = keys[np.sort(first)]
+    keys = keys[:m]
+    return keys // n, keys % n
 
 
 def generate_neg_edges(graph: nx.Graph, m: int):
     """Get m samples from the edges in the graph that don't exist."""
-    negative_edges = [
-        (source, target)
-        for source, target in itertools.combinations(graph, 2)
-        if not graph.has_edge(source, target)
-    ]
-
-    return random.sample(negative_edges, m)
+    nodes = list(graph)
+    look_up = {node: i for i, node in enumerate(nodes)}
+    directed = graph.is_directed()
+    edge_keys = pair_keys(*edge_rows(graph.edges(), look_up), len(nodes), directed=directed)
+    src, dst = sample_neg_pairs(len(nodes), edge_keys, m, directed=directed)
+    return [(nodes[u], nodes[v]) for u, v in zip(src.tolist(), dst.tolist())]
+
+
+LinkPredictionSplit = namedtuple(
+    'LinkPredictionSplit', ['train_edges', 'test_edges', 'train_neg_edges', 'test_neg_edges'])
+
+SPLIT_CACHE_VERSION = 1
+
+
+def sample_link_prediction_negatives(edges, num_train, num_test, random_state=None):
+    """Negative training and testing edges of an undirected graph, with no pair used for both."""
+    n = len(edges.nodes)
+    edge_keys = pair_keys(edges.src, edges.dst, n)
+    train_src, train_dst = sample_neg_pairs(n, edge_keys, num_train, random_state=random_state)
+    # add the training negative edges to the known edges to ensure that they will not be used for testing
+    aux_keys = np.concatenate([edge_keys, pair_keys(train_src, train_dst, n)])
+    test_src, test_dst = sample_neg_pairs(n, aux_keys, num_test, random_state=random_state)
+    return EdgeList(edges.nodes, train_src, train_dst, None), EdgeList(edges.nodes, test_src, test_dst, None)
+
+
+def link_prediction_split(input_edgelist, testing_ratio=0.2, seed=None, weighted=False, cache=True):
+    """Training and testing edges, positive and negative, for evaluating link prediction on an edge list.
+
+    The split only depends on the content of the file, ``testing_ratio`` and ``seed``. With ``cache`` it is
+    kept in the graph cache of the file (see :func:`bionev.edgelist.read_edgelist`), so that every method
+    evaluated on the same input and seed gets the same edges without recomputing them.
+
+    :return: a :class:`LinkPredictionSplit` of :class:`bionev.edgelist.EdgeList` over the input nodes
+    """
+    edges = unique_edges(read_edgelist(input_edgelist, weighted=weighted))
+    cache_dir = os.path.join(
+        input_edgelist + CACHE_SUFFIX, 'splits', 'link-prediction-%r-%s' % (testing_ratio, seed))
+    fingerprint = None
+    if cache and seed is not None:
+        fingerprint = dict(
+            version=SPLIT_CACHE_VERSION,
+            sha1=content_hash(input_edgelist),
+            testing_ratio=testing_ratio,
+            seed=seed,
+        )
+        split = _load_split_cache(cache_dir, fingerprint, edges)
+        if split is not None:
+            print('Loaded link prediction split from', cache_dir)
+            return split
+
+    random_state = None if seed is None else np.random.RandomState(seed)
+    print('Original Graph: nodes:', len(edges.nodes), 'edges:', len(edges.src))
+    train_index, test_index = split_edge_index(edges, testing_ratio, random_state=random_state)
+    train_neg_edges, test_neg_edges = sample_link_prediction_negatives(
+        edges, len(train_index), len(test_index), random_state=random_state)
+    print('Training Graph: nodes:', len(edges.nodes), 'edges:', len(train_index))
+
+    if fingerprint is not None:
+        arrays = dict(
+            train_index=train_index.astype(np.int64),
+            test_index=test_index.astype(np.int64),
+            train_neg=np.stack([train_neg_edges.src, train_neg_edges.dst]).astype(np.int32),
+            test_neg=np.stack([test_neg_edges.src, test_neg_edges.dst]).astype(np.int32),
+        )
+        save_arrays(cache_dir, arrays, fingerprint)
+    return LinkPredictionSplit(
+        take_edges(edges, train_index), take_edges(edges, test_index, weighted=False), train_neg_edges,
+        test_neg_edges)
+
+
+def _load_split_cache(cache_dir, fingerprint, edges):
+    try:
+        with open(os.path.join(cache_dir, 'fingerprint.json')) as f:
+            if json.load(f) != fingerprint:
+                return None
+        arrays = {
+            name: np.load(os.path.join(cache_dir, name + '.npy'), mmap_mode='r')
+            for name in ('train_index', 'test_index', 'train_neg', 'test_neg')
+        }
+    except (OSError, ValueError):
+        return None
+    train_neg, test_neg = arrays['train_neg'], arrays['test_neg']
+    return LinkPredictionSplit(
+        take_edges(edges, arrays['train_index']),
+        take_edges(edges, arrays['test_index'], weighted=False),
+        EdgeList(edges.nodes, train_neg[0], train_neg[1], None),
+        EdgeList(edges.nodes, test_neg[0], test_neg[1], None),
+    )
 
 
 def load_embedding(embedding_file_name, node_list=None):
-    with open(embedding_file_name) as f:
-        node_num, _ = f.readline().split()
-        embedding_look_up = {}
-        if node_list:
-            for line in f:
-                vec = line.strip().split()
-                node_id = vec[0]
-                if node_id in node_list:
-                    emb = [float(x) for x in vec[1:]]
-                    embedding_look_up[node_id] = list(emb)
-
-            assert len(node_list) == len(embedding_look_up)
-        else:
-            for line in f:
-                vec = line.strip().split()
-                node_id = vec[0]
-                emb = [float(x) for x in vec[1:]]
-                embedding_look_up[node_id] = list(emb)
-
-            assert int(node_num) == len(embedding_look_up)
-        f.close()
-        return embedding_look_up
+    embedding_look_up = ebd.load_embeddings(embedding_file_name)
+    if node_list:
+        assert all(node_id in embedding_look_up for node_id in node_list)
+    return embedding_look_up
 
 
 def read_node_labels(filename):
@@ -143,18 +316,57 @@ def read_node_labels(filename):
     return node_list, labels
 
 
+def read_node_label_matrix(filename):
+    """Read a ``node label1 label2 ...`` file into a sparse label indicator matrix.
+
+    :return: the node ids, a CSR matrix with one row per node and one column per label, and the label names
+    """
+    node_list, labels = read_node_labels(filename)
+    y, label_names = label_matrix(labels)
+    return node_list, y, label_names
+
+
+def label_matrix(labels):
+    """CSR label indicator matrix of a list of label lists, and the sorted label names of its columns."""
+    counts = np.fromiter((len(node_labels) for node_labels in labels), dtype=np.int64, count=len(labels))
+    flat = np.array([label for node_labels in labels for label in node_labels], dtype=str)
+    label_names, columns = np.unique(flat, return_inverse=True)
+    indptr = np.zeros(len(labels) + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    y = sp.csr_matrix((np.ones(len(flat), dtype=np.int64), columns.ravel(), indptr),
+                      shape=(len(labels), len(label_names)))
+    # a label repeated on one line counts once
+    y.sum_duplicates()
+    y.data[:] = 1
+    return y, label_names
+
+
+def is_multilabel(labels):
+    """Whether labels need the multi-label path: an indicator matrix, or label lists not all of length one."""
+    if sp.issparse(labels):
+        return True
+    return any(len(node_labels) != 1 for node_labels in labels)
+
+
 def split_train_test_classify(embedding_look_up, x, y, testing_ratio: float = 0.2):
+    """Split the embeddings of the nodes ``x`` and their labels ``y`` into training and testing sets.
+
+    ``y`` is a list of one label per node, or a sparse label indicator matrix for multi-label classification,
+    in which case the label sets are sparse matrices too.
+    """
     training_ratio = 1 - testing_ratio
     training_size = int(training_ratio * len(x))
     shuffle_indices = np.random.permutation(np.arange(len(x)))
-    x_train = [embedding_look_up[x[shuffle_indices[i]]] for i in range(training_size)]
+    embeddings = ebd.as_embedding_matrix(embedding_look_up)
+    x_train = np.asarray(embeddings.take([x[i] for i in shuffle_indices[:training_size]]))
+    x_test = np.asarray(embeddings.take([x[i] for i in shuffle_indices[training_size:]]))
+    if sp.issparse(y):
+        y = y.tocsr()
+        return x_train, y[shuffle_indices[:training_size]], x_test, y[shuffle_indices[training_size:]]
+
     y_train = [y[shuffle_indices[i]] for i in range(training_size)]
-    x_test = [embedding_look_up[x[shuffle_indices[i]]] for i in range(training_size, len(x))]
     y_test = [y[shuffle_indices[i]] for i in range(training_size, len(x))]
-
-    x_train = np.array(x_train).ravel()
     y_train = np.array(y_train).ravel()
-    x_test = np.array(x_test).ravel()
     y_test = np.array(y_test).ravel()
 
     return x_train, y_train, x_test, y_test
@@ -170,25 +382,88 @@ def get_y_pred(y_test, y_pred_prob):
     return y_pred
 
 
-def get_xy_sets(embeddings, graph_edges, neg_edges):
-    x = []
-    y = []
-    for edge in graph_edges:
-        node_u_emb = np.array(embeddings[edge[0]])
-        node_v_emb = np.array(embeddings[edge[1]])
-        feature_vector = node_u_emb * node_v_emb
-        x.append(feature_vector.tolist())
-        y.append(1)
-    for edge in neg_edges:
-        node_u_emb = np.array(embeddings[edge[0]])
-        node_v_emb = np.array(embeddings[edge[1]])
-        feature_vector = node_u_emb * node_v_emb
-        x.append(feature_vector.tolist())
-        y.append(0)
-
-    c = list(zip(x, y))
-    random.shuffle(c)
-    x, y = zip(*c)
-    x = np.array(x)
-    y = np.array(y)
+def _hadamard(u, v):
+    return np.multiply(u, v, out=u)
+
+
+def _average(u, v):
+    u += v
+    u *= 0.5
+    return u
+
+
+def _l1(u, v):
+    u -= v
+    return np.abs(u, out=u)
+
+
+def _l2(u, v):
+    u -= v
+    return np.square(u, out=u)
+
+
+def _concat(u, v):
+    return np.hstack([u, v])
+
+
+EDGE_OPERATORS = {
+    'hadamard': _hadamard,
+    'average': _average,
+    'l1': _l1,
+    'l2': _l2,
+    'concat': _concat,
+}
+
+
+def edge_features(matrix, src, dst, operator='hadamard'):
+    """Features of the edges from rows ``src`` to rows ``dst`` of an embedding matrix, as a float32 matrix.
+
+    :param operator: how the two node embeddings are combined, one of :data:`EDGE_OPERATORS`
+    """
+    if operator not in EDGE_OPERATORS:
+        raise ValueError('Invalid edge operator: %s' % operator)
+    u = np.asarray(matrix[src], dtype=np.float32)
+    v = np.asarray(matrix[dst], dtype=np.float32)
+    return EDGE_OPERATORS[operator](u, v)
+
+
+def get_xy_sets(embeddings, graph_edges, neg_edges, operator='hadamard'):
+    """Shuffled edge features and labels (1 for ``graph_edges``, 0 for ``neg_edges``).
+
+    The edges can be EdgeLists, networkx graphs or lists of node id pairs.
+    """
+    embeddings = ebd.as_embedding_matrix(embeddings)
+    src, dst, y = get_xy_rows(embeddings, graph_edges, neg_edges)
+    x = edge_features(embeddings.matrix, src, dst, operator=operator)
     return x, y
+
+
+def get_xy_rows(embeddings, graph_edges, neg_edges):
+    """Like :func:`get_xy_sets`, but returns the embedding rows of the edge ends instead of their features."""
+    pos_src, pos_dst = edge_rows(graph_edges, embeddings.index)
+    neg_src, neg_dst = edge_rows(neg_edges, embeddings.index)
+    y = np.concatenate([np.ones(len(pos_src), dtype=np.int64), np.zeros(len(neg_src), dtype=np.int64)])
+    shuffle_indices = np.random.permutation(len(y))
+    src = np.concatenate([pos_src, neg_src])[shuffle_indices]
+    dst = np.concatenate([pos_dst, neg_dst])[shuffle_indices]
+    return src, dst, y[shuffle_indices]
+
+
+def iter_edge_features(matrix, src, dst, chunk_size, operator='hadamard'):
+    """Yield the features of ``chunk_size`` edges at a time, so that only one chunk is in memory."""
+    for start in range(0, len(src), chunk_size):
+        yield edge_features(matrix, src[start:start + chunk_size], dst[start:start + chunk_size], operator)
+
+
+def spill_edge_features(matrix, src, dst, filename, chunk_size, operator='hadamard'):
+    """Write the edge features chunk by chunk to a float32 ``.npy`` file and return it memory-mapped."""
+    features = None
+    for start, x in zip(range(0, len(src), chunk_size), iter_edge_features(matrix, src, dst, chunk_size, operator)):
+        if features is None:
+            features = np.lib.format.open_memmap(filename, mode='w+', dtype=np.float32, shape=(len(src), x.shape[1]))
+        features[start:start + len(x)] = x
+    if features is None:
+        return np.zeros((0, matrix.shape[1]), dtype=np.float32)
+    features.flush()
+    del features
+    return np.load(filename, mmap_mode='r')
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the sparse multi-label node classification."""
+
+import unittest
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, f1_score, matthews_corrcoef
+from sklearn.svm import LinearSVC
+
+from bionev.OpenNE.classify import TopKRanker
+from bionev.pipeline import multilabel_classification_scores, multilabel_metrics
+from bionev.utils import is_multilabel, label_matrix
+
+
+class TestLabelMatrix(unittest.TestCase):
+
+    def test_label_matrix(self):
+        y, label_names = label_matrix([['b', 'a'], [], ['c', 'c'], ['a']])
+        self.assertTrue(sp.isspmatrix_csr(y))
+        self.assertEqual(['a', 'b', 'c'], label_names.tolist())
+        np.testing.assert_array_equal([[1, 1, 0], [0, 0, 0], [0, 0, 1], [1, 0, 0]], y.toarray())
+
+    def test_is_multilabel(self):
+        self.assertFalse(is_multilabel([['a'], ['b']]))
+        self.assertTrue(is_multilabel([['a'], ['a', 'b']]))
+        self.assertTrue(is_multilabel(sp.csr_matrix((2, 2))))
+
+
+class TestTopKRanker(unittest.TestCase):
+
+    def setUp(self):
+        random_state = np.random.RandomState(0)
+        self.x = random_state.normal(size=(120, 6))
+        # 5 labels, each a linear function of the features, so that the probabilities differ
+        self.y = sp.csr_matrix((self.x.dot(random_state.normal(size=(6, 5))) > 0.5).astype(np.int64))
+        self.top_k = np.array([0, 1, 2, 3, 5, 9] * 20)
+
+    def assert_top_k(self, clf, scores):
+        y_pred = clf.predict(self.x, top_k_list=self.top_k)
+        self.assertTrue(sp.isspmatrix_csr(y_pred))
+        self.assertEqual(self.y.shape, y_pred.shape)
+        expected = np.zeros(self.y.shape, dtype=np.int64)
+        for i, k in enumerate(self.top_k):
+            expected[i, np.argsort(-scores[i], kind='stable')[:k]] = 1
+        np.testing.assert_array_equal(expected, y_pred.toarray())
+
+    def test_probabilities(self):
+        clf = TopKRanker(LogisticRegression()).fit(self.x, self.y)
+        self.assert_top_k(clf, clf.predict_proba(self.x))
+
+    def test_decision_function(self):
+        clf = TopKRanker(LinearSVC()).fit(self.x, self.y)
+        self.assert_top_k(clf, clf.decision_function(self.x))
+
+    def test_no_labels(self):
+        clf = TopKRanker(LogisticRegression()).fit(self.x, self.y)
+        self.assertEqual(0, clf.predict(self.x[:3], top_k_list=[0, 0, 0]).nnz)
+
+
+class TestMultilabelMetrics(unittest.TestCase):
+
+    def test_against_sklearn(self):
+        random_state = np.random.RandomState(1)
+        y_true = (random_state.rand(50, 7) < 0.3).astype(np.int64)
+        y_pred = (random_state.rand(50, 7) < 0.3).astype(np.int64)
+        # the last label is never used, and some rows are predicted exactly
+        y_true[:, -1] = y_pred[:, -1] = 0
+        y_pred[:5] = y_true[:5]
+        accuracy, micro_f1, macro_f1, mcc = multilabel_metrics(sp.csr_matrix(y_true), sp.csr_matrix(y_pred))
+        self.assertAlmostEqual(accuracy_score(y_true, y_pred), accuracy)
+        self.assertAlmostEqual(f1_score(y_true, y_pred, average='micro'), micro_f1)
+        self.assertAlmostEqual(f1_score(y_true, y_pred, average='macro', zero_division=0), macro_f1)
+        self.assertAlmostEqual(matthews_corrcoef(y_true.ravel(), y_pred.ravel()), mcc)
+
+    def test_classification_scores(self):
+        y = sp.csr_matrix(np.eye(4, dtype=np.int64)[[0, 1, 2, 3] * 10] + np.eye(4, dtype=np.int64)[[1, 2, 3, 0] * 10])
+        x = y.toarray() + 0.1 * np.random.RandomState(2).normal(size=y.shape)
+        clf = TopKRanker(LogisticRegression()).fit(x, y)
+        self.assertEqual((1.0, 1.0, 1.0, 1.0), multilabel_classification_scores(clf, x, y))
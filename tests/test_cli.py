@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the commands that use a saved model or saved embeddings."""
+
+import gzip
+import os
+import tempfile
+import unittest
+
+import joblib
+import numpy as np
+from click.testing import CliRunner
+from sklearn.linear_model import LogisticRegression
+
+from bionev.cli import more_main
+from bionev.embedding import EmbeddingMatrix, save_embeddings
+from bionev.utils import edge_features
+
+
+def _read_lines(filename):
+    with open(filename) as f:
+        return [line.split('\t') for line in f.read().splitlines()]
+
+
+class CommandTestCase(unittest.TestCase):
+    """Saved embeddings of 40 nodes and a link classifier trained on their Hadamard edge features."""
+
+    n = 40
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        random_state = np.random.RandomState(0)
+        self.embeddings = EmbeddingMatrix(['g%d' % i for i in range(self.n)],
+                                          random_state.normal(size=(self.n, 6)).astype(np.float32))
+        self.embeddings_path = self.path('embeddings.npy')
+        save_embeddings(self.embeddings_path, self.embeddings)
+        src, dst = random_state.randint(self.n, size=(2, 300))
+        self.clf = LogisticRegression().fit(edge_features(self.embeddings.matrix, src, dst),
+                                            random_state.randint(2, size=300))
+        self.model_path = self.path('model.pkl')
+        joblib.dump(self.clf, self.model_path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def invoke(self, *args):
+        result = CliRunner().invoke(more_main, list(args))
+        self.assertEqual(0, result.exit_code, result.output + repr(result.exception))
+        return result
+
+    def probability(self, u, v):
+        x = edge_features(self.embeddings.matrix, self.embeddings.rows([u]), self.embeddings.rows([v]))
+        return self.clf.predict_proba(x)[0, 1]
+
+
+class TestScore(CommandTestCase):
+
+    def test_score(self):
+        pairs = [('g0', 'g1'), ('g5', 'g3'), ('g7', 'unknown'), ('g39', 'g39')] * 50
+        pairs_path = self.path('pairs.txt.gz')
+        with gzip.open(pairs_path, 'wt') as f:
+            f.write(''.join('%s %s\n' % pair for pair in pairs))
+        for workers in ('1', '2'):
+            output = self.path('scores-%s.tsv' % workers)
+            result = self.invoke('score', '--model', self.model_path, '--embeddings', self.embeddings_path,
+                                 '--pairs', pairs_path, '--output', output, '--workers', workers,
+                                 '--chunk-size', '100')
+            self.assertIn('Scored 200 pairs', result.output)
+            lines = _read_lines(output)
+            self.assertEqual(pairs, [(u, v) for u, v, _ in lines])
+            for u, v, score in lines:
+                if v == 'unknown':
+                    self.assertEqual('nan', score)
+                else:
+                    self.assertAlmostEqual(self.probability(u, v), float(score), places=5)
+
+
+class TestRank(CommandTestCase):
+
+    def test_rank(self):
+        known_edges = self.path('known.edgelist')
+        with open(known_edges, 'w') as f:
+            f.write('g0 g1\ng2 g0\ng3 g4\n')
+        queries = self.path('queries.txt')
+        with open(queries, 'w') as f:
+            f.write('g0\ng3\n')
+        output = self.path('ranking.tsv')
+        self.invoke('rank', '--model', self.model_path, '--embeddings', self.embeddings_path,
+                    '--known-edges', known_edges, '--queries', queries, '--top-k', '5', '--output', output)
+        lines = _read_lines(output)
+        self.assertEqual(['g0'] * 5 + ['g3'] * 5, [query for query, _, _ in lines])
+        for query, excluded in [('g0', {'g0', 'g1', 'g2'}), ('g3', {'g3', 'g4'})]:
+            candidates = [node for node in self.embeddings.nodes if node not in excluded]
+            probabilities = {node: self.probability(query, node) for node in candidates}
+            expected = sorted(candidates, key=lambda node: -probabilities[node])[:5]
+            found = [(target, float(score)) for q, target, score in lines if q == query]
+            self.assertEqual(expected, [target for target, _ in found])
+            for target, score in found:
+                self.assertAlmostEqual(probabilities[target], score, places=5)
+
+    def test_rejects_other_operators(self):
+        result = CliRunner().invoke(more_main, ['rank', '--model', self.model_path, '--embeddings',
+                                                self.embeddings_path, '--output', self.path('ranking.tsv'),
+                                                '--edge-operator', 'l1'])
+        self.assertEqual(2, result.exit_code)
+
+
+class TestNeighbors(CommandTestCase):
+
+    def expected(self, query, k):
+        unit = self.embeddings.matrix / np.linalg.norm(self.embeddings.matrix, axis=1, keepdims=True)
+        similarities = unit.dot(unit[self.embeddings.index[query]])
+        order = [i for i in np.argsort(-similarities, kind='stable') if self.embeddings.nodes[i] != query][:k]
+        return [self.embeddings.nodes[i] for i in order], similarities[order]
+
+    def assert_neighbors(self, output, queries, k):
+        lines = _read_lines(output)
+        self.assertEqual([query for query in queries for _ in range(k)], [query for query, _, _ in lines])
+        for query in queries:
+            nodes, similarities = self.expected(query, k)
+            found = [(neighbor, float(similarity)) for q, neighbor, similarity in lines if q == query]
+            self.assertEqual(nodes, [neighbor for neighbor, _ in found])
+            np.testing.assert_allclose(similarities, [similarity for _, similarity in found], atol=1e-5)
+
+    def test_exact(self):
+        queries = self.path('queries.txt')
+        with open(queries, 'w') as f:
+            f.write('g1\ng0\n')
+        output = self.path('neighbors.tsv')
+        self.invoke('neighbors', '--embeddings', self.embeddings_path, '--queries', queries, '--top-k', '3',
+                    '--exact', '--output', output)
+        self.assert_neighbors(output, ['g1', 'g0'], 3)
+
+    def test_index(self):
+        # with every list probed the index search is exact
+        index_dir = self.path('index')
+        output = self.path('neighbors.tsv')
+        result = self.invoke('neighbors', '--embeddings', self.embeddings_path, '--index', index_dir,
+                             '--n-lists', '4', '--n-probe', '4', '--top-k', '4', '--output', output)
+        self.assertIn('Built an index of 4 lists', result.output)
+        self.assert_neighbors(output, self.embeddings.nodes, 4)
+
+        # the saved index is used without the embeddings
+        output = self.path('neighbors-loaded.tsv')
+        result = self.invoke('neighbors', '--index', index_dir, '--n-probe', '4', '--top-k', '4', '--output', output)
+        self.assertNotIn('Built an index', result.output)
+        self.assert_neighbors(output, self.embeddings.nodes, 4)
+
+    def test_needs_embeddings(self):
+        result = CliRunner().invoke(more_main, ['neighbors', '--index', self.path('missing'),
+                                                '--output', self.path('neighbors.tsv')])
+        self.assertEqual(2, result.exit_code)
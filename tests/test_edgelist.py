@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the bulk edge list parser."""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+import bionev.edgelist
+from bionev.OpenNE.graph import Graph
+from bionev.edgelist import CACHE_SUFFIX, build_csr, load_csr, read_edgelist
+from bionev.utils import read_for_OpenNE
+
+
+def _edges(edges):
+    return [(edges.nodes[u], edges.nodes[v]) for u, v in zip(edges.src.tolist(), edges.dst.tolist())]
+
+
+class EdgelistTestCase(unittest.TestCase):
+    """Writes edge lists to a temporary directory."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, text):
+        filename = os.path.join(self.directory.name, 'graph.edgelist')
+        with open(filename, 'w') as f:
+            f.write(text)
+        return filename
+
+
+class TestRaggedEdgelist(EdgelistTestCase):
+    """Lines with different numbers of columns must not be reshaped into edges that are not in the file."""
+
+    def test_single_node_lines(self):
+        filename = self.write('a b\nc\nd\ne f\n')
+        for cache in (False, True, True):
+            edges = read_edgelist(filename, cache=cache)
+            self.assertEqual(['a', 'b', 'c', 'd', 'e', 'f'], edges.nodes)
+            self.assertEqual([('a', 'b'), ('e', 'f')], _edges(edges))
+
+    def test_mixed_columns(self):
+        filename = self.write('1 2 0.5\n3 4\n5 6 7 8\n')
+        edges = read_edgelist(filename, weighted=None, cache=False)
+        self.assertEqual([('1', '2'), ('3', '4'), ('5', '6')], _edges(edges))
+        self.assertIsNone(edges.weights)
+        with self.assertRaises((TypeError, ValueError)):
+            read_edgelist(filename, weighted=True, cache=False)
+
+    def test_ragged_weights(self):
+        filename = self.write('1 2 0.5\n3\n4 5 2 x\n')
+        edges = read_edgelist(filename, weighted=True)
+        self.assertEqual([('1', '2'), ('4', '5')], _edges(edges))
+        np.testing.assert_array_equal([0.5, 2.0], edges.weights)
+
+    def test_build_csr(self):
+        filename = self.write('a b\nc\nd\ne f\n')
+        csr_dir = os.path.join(self.directory.name, 'csr')
+        build_csr(filename, csr_dir, directed=True)
+        nodes, indptr, indices, _ = load_csr(csr_dir)
+        pairs = [(nodes[u], nodes[v]) for u in range(len(nodes)) for v in indices[indptr[u]:indptr[u + 1]].tolist()]
+        self.assertEqual([('a', 'b'), ('e', 'f')], pairs)
+
+
+class TestGraphCache(EdgelistTestCase):
+
+    def test_cache_round_trip(self):
+        filename = self.write('a b 0.5\nb c 2\n')
+        parsed = read_edgelist(filename, weighted=True, cache=False)
+        read_edgelist(filename, weighted=True)
+        self.assertTrue(os.path.isdir(filename + CACHE_SUFFIX))
+        cached = read_edgelist(filename, weighted=True)
+        self.assertIsInstance(cached.src, np.memmap)
+        self.assertEqual(parsed.nodes, cached.nodes)
+        self.assertEqual(_edges(parsed), _edges(cached))
+        np.testing.assert_array_equal(parsed.weights, cached.weights)
+        self.assertIsNone(read_edgelist(filename).weights)
+
+    def test_cache_turned_off(self):
+        filename = self.write('a b\nb c\n')
+        with mock.patch.object(bionev.edgelist, 'GRAPH_CACHE', False):
+            edges = read_edgelist(filename)
+        self.assertEqual([('a', 'b'), ('b', 'c')], _edges(edges))
+        self.assertFalse(os.path.exists(filename + CACHE_SUFFIX))
+
+    def test_read_only_directory(self):
+        filename = self.write('a b 0.5\nb c 2\n')
+        with mock.patch('os.access', return_value=False):
+            edges = read_edgelist(filename, weighted=True)
+        np.testing.assert_array_equal([0.5, 2.0], edges.weights)
+        self.assertEqual([], [name for name in os.listdir(self.directory.name) if name != 'graph.edgelist'])
+
+
+class TestBuildCsr(EdgelistTestCase):
+    """The on-disk CSR must hold the same graph as the one :meth:`Graph.build` makes in memory."""
+
+    # repeated edges (the last weight wins), an edge repeated in reverse, self-loops and an isolated node
+    text = 'a b 1\nb c 2\na b 3\nc c 4\nd\nc b 5\ne a 6\ne e 7\ne e 8\n'
+
+    def assert_same_graph(self, weighted, directed, chunk_size=1 << 26):
+        filename = self.write(self.text)
+        expected = Graph()
+        expected.read_edges(read_edgelist(filename, weighted=weighted, cache=False), directed=directed)
+        csr_dir = os.path.join(self.directory.name, 'csr')
+        build_csr(filename, csr_dir, weighted=weighted, directed=directed, chunk_size=chunk_size)
+        graph = Graph()
+        graph.read_csr(csr_dir)
+        self.assertEqual(expected.look_back_list, graph.look_back_list)
+        np.testing.assert_array_equal(expected.indptr, graph.indptr)
+        np.testing.assert_array_equal(expected.indices, graph.indices)
+        np.testing.assert_array_equal(expected.weights, graph.weights)
+
+    def test_undirected(self):
+        self.assert_same_graph(weighted=False, directed=False)
+
+    def test_undirected_weighted(self):
+        self.assert_same_graph(weighted=True, directed=False)
+
+    def test_directed_weighted(self):
+        self.assert_same_graph(weighted=True, directed=True)
+
+    def test_small_chunks(self):
+        self.assert_same_graph(weighted=True, directed=False, chunk_size=8)
+
+    def test_read_for_openne(self):
+        filename = self.write(self.text)
+        csr_dir = os.path.join(self.directory.name, 'csr')
+        build_csr(filename, csr_dir, weighted=True)
+        expected = read_for_OpenNE(filename, weighted=True)
+        graph = read_for_OpenNE(csr_dir)
+        np.testing.assert_array_equal(expected.indices, graph.indices)
+        np.testing.assert_array_equal(expected.weights, graph.weights)
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the text and binary embedding formats."""
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from bionev.embedding import EmbeddingMatrix, as_embedding_matrix, load_embeddings, save_embeddings
+
+
+class TestEmbeddingMatrix(unittest.TestCase):
+
+    def test_mapping(self):
+        embeddings = EmbeddingMatrix(['b', 'a', 'c'], np.arange(6, dtype=np.float32).reshape(3, 2))
+        self.assertEqual(['b', 'a', 'c'], list(embeddings))
+        self.assertEqual(3, len(embeddings))
+        self.assertEqual(2, embeddings.dimensions)
+        self.assertIn('a', embeddings)
+        self.assertNotIn('d', embeddings)
+        np.testing.assert_array_equal([2, 3], embeddings['a'])
+        np.testing.assert_array_equal([[4, 5], [0, 1]], embeddings.take(['c', 'b']))
+        self.assertIs(embeddings, as_embedding_matrix(embeddings))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            EmbeddingMatrix(['a', 'a'], np.zeros((2, 2)))
+        with self.assertRaises(ValueError):
+            EmbeddingMatrix(['a', 'b'], np.zeros((3, 2)))
+
+    def test_from_dict(self):
+        embeddings = as_embedding_matrix({'x': [1.5, 2], 'y': np.array([3, 4.25])})
+        self.assertEqual(['x', 'y'], embeddings.nodes)
+        self.assertEqual(np.float32, embeddings.matrix.dtype)
+        np.testing.assert_array_equal([[1.5, 2], [3, 4.25]], embeddings.matrix)
+
+
+class TestEmbeddingFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        random_state = np.random.RandomState(0)
+        self.nodes = ['n%d' % i for i in range(20)] + ['MESH:D000']
+        self.matrix = random_state.normal(size=(len(self.nodes), 5)).astype(np.float32)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def round_trip(self, name, vectors, **kwargs):
+        filename = os.path.join(self.directory.name, name)
+        save_embeddings(filename, vectors)
+        embeddings = load_embeddings(filename, **kwargs)
+        self.assertEqual(self.nodes, embeddings.nodes)
+        np.testing.assert_array_equal(self.matrix, embeddings.matrix)
+        return embeddings
+
+    def test_text(self):
+        for vectors in (EmbeddingMatrix(self.nodes, self.matrix), dict(zip(self.nodes, self.matrix))):
+            embeddings = self.round_trip('embeddings.txt', vectors)
+            self.assertEqual(np.float32, embeddings.matrix.dtype)
+
+    def test_text_header(self):
+        filename = os.path.join(self.directory.name, 'embeddings.txt')
+        save_embeddings(filename, EmbeddingMatrix(self.nodes, self.matrix))
+        with open(filename) as f:
+            self.assertEqual('21 5', f.readline().strip())
+        with open(filename, 'a') as f:
+            f.write('extra 1 2 3 4 5\n')
+        with self.assertRaises(ValueError):
+            load_embeddings(filename)
+
+    def test_binary(self):
+        embeddings = self.round_trip('embeddings.npy', dict(zip(self.nodes, self.matrix)))
+        self.assertIsInstance(embeddings.matrix, np.memmap)
+        self.assertTrue(os.path.exists(os.path.join(self.directory.name, 'embeddings.nodes.txt')))
+        del embeddings
+        embeddings = self.round_trip('embeddings.npy', EmbeddingMatrix(self.nodes, self.matrix), mmap_mode=None)
+        self.assertNotIsInstance(embeddings.matrix, np.memmap)
+
+    def test_text_to_binary(self):
+        text = self.round_trip('embeddings.txt', EmbeddingMatrix(self.nodes, self.matrix))
+        self.round_trip('embeddings.npy', text)
+
+    def test_empty(self):
+        filename = os.path.join(self.directory.name, 'embeddings.txt')
+        save_embeddings(filename, {})
+        self.assertEqual(0, len(load_embeddings(filename)))
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the streaming and bootstrap link prediction metrics."""
+
+import unittest
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, average_precision_score, f1_score, matthews_corrcoef, roc_auc_score
+
+from bionev.metrics import LinkMetrics, bootstrap_link_metrics, confidence_intervals
+from bionev.pipeline import predict_links
+
+
+def _sklearn_metrics(y_true, y_pred_proba, y_pred=None):
+    y_pred = y_pred_proba > 0.5 if y_pred is None else y_pred
+    return (
+        roc_auc_score(y_true, y_pred_proba),
+        average_precision_score(y_true, y_pred_proba),
+        accuracy_score(y_true, y_pred),
+        f1_score(y_true, y_pred),
+        matthews_corrcoef(y_true, y_pred),
+    )
+
+
+class MetricsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        random_state = np.random.RandomState(0)
+        self.y_true = random_state.randint(2, size=500)
+        # informative probabilities with ties, some of them very confident
+        logits = 2 * self.y_true - 1 + random_state.normal(size=500)
+        self.y_pred_proba = np.round(1 / (1 + np.exp(-logits)), 2)
+        self.y_pred_proba[:10] = [0, 1, 1e-12, 1 - 1e-12, 0.5, 0.5, 1e-300, 0.999999, 0.25, 0.75]
+
+
+class TestLinkMetrics(MetricsTestCase):
+
+    def test_against_sklearn(self):
+        metrics = LinkMetrics().update(self.y_true, self.y_pred_proba)
+        self.assertEqual(500, len(metrics))
+        np.testing.assert_allclose(_sklearn_metrics(self.y_true, self.y_pred_proba), metrics.result())
+
+    def test_chunks_and_merge(self):
+        expected = LinkMetrics().update(self.y_true, self.y_pred_proba).result()
+        chunked = LinkMetrics()
+        for start in range(0, 500, 64):
+            chunked.update(self.y_true[start:start + 64], self.y_pred_proba[start:start + 64])
+        self.assertEqual(expected, chunked.result())
+        merged = LinkMetrics().update(self.y_true[:200], self.y_pred_proba[:200])
+        merged.merge(LinkMetrics().update(self.y_true[200:], self.y_pred_proba[200:]))
+        self.assertEqual(expected, merged.result())
+        with self.assertRaises(ValueError):
+            merged.merge(LinkMetrics(n_bins=16))
+
+    def test_coarse_bins(self):
+        # with fewer bins the scores within a bin are tied, so the AUCs are close but not exact
+        auc_roc, auc_pr = LinkMetrics(n_bins=256).update(self.y_true, self.y_pred_proba).result()[:2]
+        self.assertAlmostEqual(roc_auc_score(self.y_true, self.y_pred_proba), auc_roc, places=2)
+        self.assertAlmostEqual(average_precision_score(self.y_true, self.y_pred_proba), auc_pr, places=2)
+
+    def test_predict_links(self):
+        random_state = np.random.RandomState(1)
+        x = random_state.normal(size=(100, 4))
+        clf = LogisticRegression().fit(x, x[:, 0] + random_state.normal(size=100) > 0)
+        proba, y_pred = predict_links(clf, x)
+        np.testing.assert_array_equal(clf.predict_proba(x)[:, 1], proba)
+        np.testing.assert_array_equal(clf.predict(x), y_pred)
+
+
+class TestBootstrap(MetricsTestCase):
+
+    def test_against_sklearn(self):
+        samples = bootstrap_link_metrics(self.y_true, self.y_pred_proba, n_resamples=20, random_state=3)
+        self.assertEqual((20, 5), samples.shape)
+        # the resamples are the rows of one draw of indices
+        indices = np.random.RandomState(3).randint(500, size=(20, 500))
+        for sample, index in zip(samples, indices):
+            np.testing.assert_allclose(_sklearn_metrics(self.y_true[index], self.y_pred_proba[index]), sample)
+
+    def test_predicted_labels(self):
+        y_pred = self.y_pred_proba > 0.3
+        samples = bootstrap_link_metrics(self.y_true, self.y_pred_proba, y_pred=y_pred, n_resamples=5,
+                                         random_state=4)
+        indices = np.random.RandomState(4).randint(500, size=(5, 500))
+        for sample, index in zip(samples, indices):
+            np.testing.assert_allclose(
+                _sklearn_metrics(self.y_true[index], self.y_pred_proba[index], y_pred[index]), sample)
+
+    def test_batches(self):
+        expected = bootstrap_link_metrics(self.y_true, self.y_pred_proba, n_resamples=10, random_state=5)
+        batched = bootstrap_link_metrics(self.y_true, self.y_pred_proba, n_resamples=10, random_state=5,
+                                         batch_size=3)
+        np.testing.assert_allclose(expected, batched)
+
+    def test_empty(self):
+        self.assertTrue(np.all(np.isnan(bootstrap_link_metrics([], [], n_resamples=3))))
+
+    def test_confidence_intervals(self):
+        samples = bootstrap_link_metrics(self.y_true, self.y_pred_proba, n_resamples=200, random_state=6)
+        intervals = confidence_intervals(samples)
+        self.assertEqual((2, 5), intervals.shape)
+        self.assertTrue(np.all(intervals[0] <= intervals[1]))
+        narrow = confidence_intervals(samples, confidence=0.5)
+        self.assertTrue(np.all(intervals[0] <= narrow[0]) and np.all(narrow[1] <= intervals[1]))
+        # the metrics of the full testing set lie within the intervals
+        expected = _sklearn_metrics(self.y_true, self.y_pred_proba)
+        self.assertTrue(np.all((intervals[0] <= expected) & (expected <= intervals[1])))
+        # the lower and upper quartiles of each column
+        np.testing.assert_array_equal([[0.75, 2.75], [3.25, 5.25]],
+                                      confidence_intervals(np.array([[0, 2], [1, 3], [3, 5], [4, 6]]), 0.5))
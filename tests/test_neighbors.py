@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the nearest-neighbour search over embeddings."""
+
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from bionev.embedding import EmbeddingMatrix
+from bionev.neighbors import build_index, exact_neighbors, load_index
+
+
+def _results(items):
+    """Concatenate the blocks of a neighbour search into (query ids, neighbour id rows, similarity rows)."""
+    query_ids, neighbor_ids, similarities = [], [], []
+    for block_queries, block_neighbors, block_similarities in items:
+        query_ids += block_queries
+        neighbor_ids.append(block_neighbors)
+        similarities.append(block_similarities)
+    return query_ids, np.concatenate(neighbor_ids), np.concatenate(similarities)
+
+
+class NeighborsTestCase(unittest.TestCase):
+    n = 200
+
+    def setUp(self):
+        # clustered embeddings, so that the lists of the index are meaningful
+        random_state = np.random.RandomState(0)
+        centers = random_state.normal(size=(8, 16))
+        matrix = centers[random_state.randint(8, size=self.n)] + 0.3 * random_state.normal(size=(self.n, 16))
+        self.embeddings = EmbeddingMatrix(['n%d' % i for i in range(self.n)], matrix)
+        unit = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+        self.similarities = unit.dot(unit.T)
+        np.fill_diagonal(self.similarities, -np.inf)
+
+    def brute_force(self, k):
+        rows = np.argsort(-self.similarities, axis=1, kind='stable')[:, :k]
+        return rows, np.take_along_axis(self.similarities, rows, axis=1)
+
+    def assert_exact(self, query_ids, neighbor_ids, similarities, k):
+        rows, expected = self.brute_force(k)
+        self.assertEqual(self.embeddings.nodes, query_ids)
+        np.testing.assert_allclose(expected, similarities.astype(np.float64), atol=1e-5)
+        expected_ids = np.array(self.embeddings.nodes, dtype=object)[rows]
+        self.assertTrue(np.mean(expected_ids == neighbor_ids) > 0.99, 'only near-ties may be swapped')
+
+    def recall(self, neighbor_ids, k):
+        rows, _ = self.brute_force(k)
+        nodes = np.array(self.embeddings.nodes, dtype=object)
+        hits = sum(len(set(found) & set(nodes[expected])) for found, expected in zip(neighbor_ids.tolist(), rows))
+        return hits / (self.n * k)
+
+
+class TestExactNeighbors(NeighborsTestCase):
+
+    def test_blocks(self):
+        results = _results(exact_neighbors(self.embeddings, k=5, block_size=30, column_block_size=17))
+        self.assert_exact(*results, k=5)
+
+    def test_queries(self):
+        query_ids, neighbor_ids, _ = _results(exact_neighbors(self.embeddings, ['n3', 'n0'], k=1000))
+        self.assertEqual(['n3', 'n0'], query_ids)
+        self.assertEqual((2, self.n - 1), neighbor_ids.shape)
+        self.assertNotIn('n3', neighbor_ids[0].tolist())
+
+
+class TestIVFIndex(NeighborsTestCase):
+
+    def test_all_lists_are_exact(self):
+        index = build_index(self.embeddings, n_lists=8, random_state=0)
+        self.assertEqual(self.n, len(index))
+        results = _results(index.neighbors(k=5, n_probe=8, block_size=64))
+        self.assert_exact(*results, k=5)
+
+    def test_recall(self):
+        index = build_index(self.embeddings, n_lists=8, random_state=0)
+        one = self.recall(_results(index.neighbors(k=10, n_probe=1))[1], 10)
+        three = self.recall(_results(index.neighbors(k=10, n_probe=3))[1], 10)
+        self.assertGreaterEqual(three, one)
+        self.assertGreater(three, 0.9)
+
+    def test_save_load(self):
+        index = build_index(self.embeddings, n_lists=8, random_state=0)
+        expected = _results(index.neighbors(k=5, n_probe=2))
+        with tempfile.TemporaryDirectory() as directory:
+            index.save(directory)
+            loaded = load_index(directory)
+            self.assertIsInstance(loaded.vectors, np.memmap)
+            query_ids, neighbor_ids, similarities = _results(loaded.neighbors(k=5, n_probe=2))
+            self.assertEqual(expected[0], query_ids)
+            np.testing.assert_array_equal(expected[1], neighbor_ids)
+            np.testing.assert_array_equal(expected[2], similarities)
+            del loaded, similarities
+
+            with open(os.path.join(directory, 'index.json'), 'w') as f:
+                json.dump({'version': 0}, f)
+            with self.assertRaises(ValueError):
+                load_index(directory)
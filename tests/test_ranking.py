@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the blocked link ranking."""
+
+import unittest
+
+import networkx as nx
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+
+from bionev.embedding import EmbeddingMatrix
+from bionev.pipeline import link_ranking_metrics
+from bionev.ranking import RANKING_OPERATORS, LinkRanker, rank_links
+from bionev.utils import edge_features
+
+
+class RankingTestCase(unittest.TestCase):
+    """A random embedding, a classifier fitted for each operator and a few known edges."""
+
+    n = 30
+    known_edges = [('0', '1'), ('2', '0'), ('3', '4'), ('5', '6'), ('7', '5')]
+
+    def setUp(self):
+        random_state = np.random.RandomState(0)
+        self.embeddings = EmbeddingMatrix([str(i) for i in range(self.n)], random_state.normal(size=(self.n, 8)))
+        src, dst = random_state.randint(self.n, size=(2, 200))
+        self.classifiers = {}
+        for operator in RANKING_OPERATORS:
+            x = edge_features(self.embeddings.matrix, src, dst, operator)
+            self.classifiers[operator] = LogisticRegression().fit(x, random_state.randint(2, size=200))
+
+    def brute_force_scores(self, operator, head, known_edges=None):
+        """Decision values of ``head`` against every node, -inf for itself and its known neighbours."""
+        x = edge_features(self.embeddings.matrix, np.full(self.n, head), np.arange(self.n), operator)
+        scores = self.classifiers[operator].decision_function(x)
+        scores[head] = -np.inf
+        for u, v in self.known_edges if known_edges is None else known_edges:
+            if int(u) == head:
+                scores[int(v)] = -np.inf
+            elif int(v) == head:
+                scores[int(u)] = -np.inf
+        return scores
+
+
+    def brute_force_rank(self, operator, head, tail, known_edges):
+        """Filtered rank of ``tail`` among the candidates of ``head``, counting ties as half."""
+        scores = self.brute_force_scores(operator, head, known_edges)
+        x = edge_features(self.embeddings.matrix, np.array([head]), np.array([tail]), operator)
+        score = self.classifiers[operator].decision_function(x)[0]
+        scores[tail] = -np.inf
+        return 1 + np.sum(scores > score) + np.sum(scores == score) / 2
+
+
+class TestTopK(RankingTestCase):
+
+    def test_top_k(self):
+        for operator in RANKING_OPERATORS:
+            ranker = LinkRanker(self.embeddings, self.classifiers[operator], operator, known_edges=nx.Graph(self.known_edges))
+            results = list(ranker.top_k(k=5, block_size=7, column_block_size=4))
+            self.assertEqual(5, len(results))
+            for query_ids, targets, probabilities in results:
+                for query, row_targets, row_probabilities in zip(query_ids, targets, probabilities):
+                    scores = self.brute_force_scores(operator, int(query))
+                    best = np.argsort(-scores, kind='stable')[:5]
+                    self.assertEqual([str(i) for i in best], row_targets.tolist(), operator)
+                    np.testing.assert_allclose(1 / (1 + np.exp(-scores[best])), row_probabilities, rtol=1e-4)
+
+    def test_rank_links(self):
+        clf = self.classifiers['hadamard']
+        ranking = rank_links(self.embeddings, clf, queries=['0', '5'], k=3, known_edges=nx.Graph(self.known_edges),
+                             candidates=['1', '2', '5', '6', '8'])
+        self.assertEqual(['0', '5'], sorted(ranking))
+        for query, candidates in [('0', ['5', '6', '8']), ('5', ['1', '2', '8'])]:
+            scores = self.brute_force_scores('hadamard', int(query))
+            expected = sorted(candidates, key=lambda c: -scores[int(c)])
+            self.assertEqual(expected, [target for target, _ in ranking[query]])
+
+    def test_padding(self):
+        ranking = rank_links(self.embeddings, self.classifiers['average'], queries=['0'], k=4,
+                             known_edges=nx.Graph(self.known_edges), candidates=['0', '1', '2', '9'])
+        self.assertEqual(['9'], [target for target, _ in ranking['0']])
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            LinkRanker(self.embeddings, self.classifiers['hadamard'], 'l1')
+        with self.assertRaises(ValueError):
+            LinkRanker(self.embeddings, self.classifiers['hadamard'], 'concat')
+
+
+class TestFilteredRanks(RankingTestCase):
+    # the testing edges are part of the known edges, as in the full graph
+    test_edges = [('0', '1'), ('3', '4'), ('7', '5'), ('8', '9'), ('8', '20')]
+
+    def test_filtered_ranks(self):
+        graph = nx.Graph(self.known_edges + self.test_edges)
+        heads = np.array([0, 3, 7, 8, 8, 5])
+        tails = np.array([1, 4, 5, 9, 20, 7])
+        for operator in RANKING_OPERATORS:
+            ranker = LinkRanker(self.embeddings, self.classifiers[operator], operator, known_edges=graph)
+            expected = [self.brute_force_rank(operator, h, t, graph.edges) for h, t in zip(heads, tails)]
+            np.testing.assert_allclose(expected, ranker.filtered_ranks(heads, tails, column_block_size=7), rtol=1e-6)
+
+    def test_ties(self):
+        # with zero coefficients every pair has the same score
+        clf = LogisticRegression().fit(np.zeros((2, 8)), [0, 1])
+        clf.coef_[:] = 0
+        ranker = LinkRanker(self.embeddings, clf, 'average', known_edges=nx.Graph(self.known_edges))
+        # all 30 nodes but the head, its two known neighbours and the tail tie with the tail
+        np.testing.assert_array_equal([1 + 26 / 2], ranker.filtered_ranks(np.array([0]), np.array([5])))
+
+    def test_link_ranking_metrics(self):
+        graph = nx.Graph(self.known_edges + self.test_edges)
+        ranks = []
+        for u, v in self.test_edges:
+            ranks.append(self.brute_force_rank('hadamard', int(u), int(v), graph.edges))
+            ranks.append(self.brute_force_rank('hadamard', int(v), int(u), graph.edges))
+        ranks = np.array(ranks)
+        expected = (np.mean(1 / ranks), np.mean(ranks <= 1), np.mean(ranks <= 10))
+        for block_size, workers in [(1024, 1), (2, 1), (2, 2)]:
+            metrics = link_ranking_metrics(
+                embeddings=self.embeddings, clf=self.classifiers['hadamard'], known_edges=graph,
+                test_pos_edges=nx.Graph(self.test_edges), ks=(1, 10), block_size=block_size, workers=workers)
+            np.testing.assert_allclose(expected, metrics, rtol=1e-6)
+
+    def test_directed(self):
+        graph = nx.Graph(self.known_edges + self.test_edges)
+        ranks = np.array([self.brute_force_rank('hadamard', int(u), int(v), graph.edges) for u, v in self.test_edges])
+        metrics = link_ranking_metrics(
+            embeddings=self.embeddings, clf=self.classifiers['hadamard'], known_edges=graph,
+            test_pos_edges=nx.DiGraph(self.test_edges), ks=(5,), directed=True)
+        np.testing.assert_allclose((np.mean(1 / ranks), np.mean(ranks <= 5)), metrics, rtol=1e-6)
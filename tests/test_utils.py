@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the edge sampling, splitting and feature helpers."""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from bionev.edgelist import CACHE_SUFFIX, EdgeList
+from bionev.embedding import EmbeddingMatrix
+from bionev.utils import (
+    EDGE_OPERATORS, edge_features, edge_pairs, get_xy_sets, iter_edge_features, link_prediction_split, pair_keys,
+    sample_link_prediction_negatives, sample_neg_pairs, spill_edge_features, split_edge_index,
+    split_train_test_edges,
+)
+
+
+def _ring(n, chords=()):
+    """An undirected ring over nodes 0..n-1, plus the given chords."""
+    src = list(range(n)) + [u for u, _ in chords]
+    dst = [(i + 1) % n for i in range(n)] + [v for _, v in chords]
+    return EdgeList([str(i) for i in range(n)], np.array(src), np.array(dst), None)
+
+
+class TestSampleNegPairs(unittest.TestCase):
+
+    def assert_negatives(self, n, edge_keys, src, dst, m, directed=False):
+        self.assertEqual(m, len(src))
+        self.assertTrue(np.all(src < dst))
+        keys = pair_keys(src, dst, n, directed=directed)
+        self.assertEqual(m, len(np.unique(keys)), 'repeated pairs')
+        self.assertFalse(np.isin(keys, edge_keys).any(), 'sampled an edge')
+
+    def test_rejection_sampling(self):
+        edges = _ring(200)
+        edge_keys = np.sort(pair_keys(edges.src, edges.dst, 200))
+        src, dst = sample_neg_pairs(200, edge_keys, 500, random_state=np.random.RandomState(0))
+        self.assert_negatives(200, edge_keys, src, dst, 500)
+
+    def test_enumeration_of_dense_graph(self):
+        # 45 pairs, 10 edges: more than half the 35 non-edges are asked for
+        edges = _ring(10)
+        edge_keys = np.sort(pair_keys(edges.src, edges.dst, 10))
+        src, dst = sample_neg_pairs(10, edge_keys, 35, random_state=np.random.RandomState(0))
+        self.assert_negatives(10, edge_keys, src, dst, 35)
+
+    def test_too_many(self):
+        edges = _ring(10)
+        with self.assertRaises(ValueError):
+            sample_neg_pairs(10, pair_keys(edges.src, edges.dst, 10), 36)
+
+    def test_directed(self):
+        # 0 -> 1 is an edge, 1 -> 0 is not, so the unordered pair (0, 1) can only be sampled when undirected
+        edge_keys = pair_keys([1], [0], 3, directed=True)
+        src, dst = sample_neg_pairs(3, edge_keys, 3, directed=True, random_state=np.random.RandomState(0))
+        self.assertEqual({(0, 1), (0, 2), (1, 2)}, set(zip(src.tolist(), dst.tolist())))
+        with self.assertRaises(ValueError):
+            sample_neg_pairs(3, pair_keys([1], [0], 3), 3)
+
+    def test_seeded(self):
+        edges = _ring(100)
+        edge_keys = pair_keys(edges.src, edges.dst, 100)
+        first = sample_neg_pairs(100, edge_keys, 50, random_state=np.random.RandomState(3))
+        second = sample_neg_pairs(100, edge_keys, 50, random_state=np.random.RandomState(3))
+        np.testing.assert_array_equal(first, second)
+
+    def test_link_prediction_negatives_are_disjoint(self):
+        edges = _ring(30, chords=[(0, 15), (5, 20)])
+        train, test = sample_link_prediction_negatives(edges, 100, 100, random_state=np.random.RandomState(0))
+        train_keys = pair_keys(train.src, train.dst, 30)
+        test_keys = pair_keys(test.src, test.dst, 30)
+        edge_keys = pair_keys(edges.src, edges.dst, 30)
+        self.assertFalse(np.isin(test_keys, train_keys).any())
+        self.assertFalse(np.isin(np.concatenate([train_keys, test_keys]), edge_keys).any())
+
+
+class TestSplitTrainTestEdges(unittest.TestCase):
+
+    def test_split_index(self):
+        # a star around node 0 and a ring: the leaves of the star can never lose their only edge
+        n = 40
+        src = np.concatenate([np.zeros(10, dtype=np.int64), np.arange(10, n)])
+        dst = np.concatenate([np.arange(1, 11), np.r_[np.arange(11, n), 10]])
+        edges = EdgeList([str(i) for i in range(n)], src, dst, None)
+        train, test = split_edge_index(edges, 0.5, random_state=np.random.RandomState(0))
+        self.assertEqual(len(src) // 2, len(test))
+        self.assertEqual(len(test), len(np.unique(test)))
+        # the testing edges kept for training are the ones whose removal would isolate a node
+        kept = np.intersect1d(train, test)
+        self.assertTrue(np.all(np.isin(np.arange(len(src)), np.union1d(train, test))))
+        degree = np.bincount(src[train], minlength=n) + np.bincount(dst[train], minlength=n)
+        self.assertTrue(np.all(degree[1:] > 0), 'a node lost all its edges')
+        for i in kept.tolist():
+            without = train[train != i]
+            degree = np.bincount(src[without], minlength=n) + np.bincount(dst[without], minlength=n)
+            self.assertTrue(degree[src[i]] == 0 or degree[dst[i]] == 0)
+
+    def test_split_edges(self):
+        edges = _ring(20, chords=[(0, 10), (10, 0), (3, 7)])
+        train, test = split_train_test_edges(edges, 0.25, random_state=np.random.RandomState(1))
+        self.assertEqual(edges.nodes, train.nodes)
+        # the repeated chord is dropped first
+        self.assertEqual(22, len(train.src) + len(test.src) - len(np.intersect1d(
+            pair_keys(train.src, train.dst, 20), pair_keys(test.src, test.dst, 20))))
+        self.assertIsNone(test.weights)
+
+    def test_seeded(self):
+        edges = _ring(50, chords=[(0, 25), (10, 30)])
+        first = split_edge_index(edges, 0.3, random_state=np.random.RandomState(7))
+        second = split_edge_index(edges, 0.3, random_state=np.random.RandomState(7))
+        for a, b in zip(first, second):
+            np.testing.assert_array_equal(a, b)
+
+
+class TestLinkPredictionSplitCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, 'graph.edgelist')
+        self.write(60)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, n):
+        with open(self.filename, 'w') as f:
+            for i in range(n):
+                f.write('%d %d\n%d %d\n' % (i, (i + 1) % n, i, (i + 7) % n))
+
+    def split(self, seed=3, testing_ratio=0.2, **kwargs):
+        return [edge_pairs(edges) for edges in link_prediction_split(
+            self.filename, testing_ratio=testing_ratio, seed=seed, **kwargs)]
+
+    def test_cached_split_is_reused(self):
+        first = self.split()
+        self.assertTrue(os.path.isdir(os.path.join(
+            self.filename + CACHE_SUFFIX, 'splits', 'link-prediction-0.2-3')))
+        with mock.patch('bionev.utils.split_edge_index') as split_edge_index:
+            second = self.split()
+        split_edge_index.assert_not_called()
+        self.assertEqual(first, second)
+        self.assertEqual(first, self.split(cache=False))
+
+    def test_key(self):
+        first = self.split()
+        self.assertNotEqual(first, self.split(seed=4))
+        self.assertNotEqual(len(first[1]), len(self.split(testing_ratio=0.3)[1]))
+        self.assertEqual(first, self.split())
+        self.assertEqual(3, len(os.listdir(os.path.join(self.filename + CACHE_SUFFIX, 'splits'))))
+
+    def test_changed_input_invalidates(self):
+        self.split()
+        self.write(80)
+        train, test, train_neg, test_neg = self.split()
+        self.assertEqual(160, len(set(train) | set(test)))
+        self.assertEqual(self.split(cache=False), [train, test, train_neg, test_neg])
+
+    def test_no_seed_no_cache(self):
+        self.split(seed=None)
+        self.assertFalse(os.path.exists(os.path.join(self.filename + CACHE_SUFFIX, 'splits')))
+
+
+class TestEdgeFeatures(unittest.TestCase):
+    matrix = np.random.RandomState(0).normal(size=(6, 4))
+    src = np.array([0, 2, 5, 5, 1])
+    dst = np.array([1, 3, 0, 5, 4])
+
+    def test_operators(self):
+        u, v = self.matrix[self.src], self.matrix[self.dst]
+        expected = {
+            'hadamard': u * v,
+            'average': (u + v) / 2,
+            'l1': np.abs(u - v),
+            'l2': (u - v) ** 2,
+            'concat': np.hstack([u, v]),
+        }
+        self.assertEqual(set(expected), set(EDGE_OPERATORS))
+        original = self.matrix.copy()
+        for operator, value in expected.items():
+            x = edge_features(self.matrix, self.src, self.dst, operator)
+            self.assertEqual(np.float32, x.dtype)
+            np.testing.assert_allclose(value, x, rtol=1e-6, err_msg=operator)
+        np.testing.assert_array_equal(original, self.matrix)
+
+    def test_float32_matrix_is_not_modified(self):
+        matrix = self.matrix.astype(np.float32)
+        original = matrix.copy()
+        for operator in EDGE_OPERATORS:
+            edge_features(matrix, self.src, self.dst, operator)
+        np.testing.assert_array_equal(original, matrix)
+
+    def test_invalid_operator(self):
+        with self.assertRaises(ValueError):
+            edge_features(self.matrix, self.src, self.dst, 'product')
+
+    def test_chunks(self):
+        expected = edge_features(self.matrix, self.src, self.dst, 'l2')
+        chunks = list(iter_edge_features(self.matrix, self.src, self.dst, 2, 'l2'))
+        self.assertEqual([2, 2, 1], [len(x) for x in chunks])
+        np.testing.assert_array_equal(expected, np.concatenate(chunks))
+        with tempfile.TemporaryDirectory() as directory:
+            x = spill_edge_features(self.matrix, self.src, self.dst, os.path.join(directory, 'x.npy'), 2, 'l2')
+            np.testing.assert_array_equal(expected, x)
+            del x
+
+    def test_xy_sets(self):
+        embeddings = EmbeddingMatrix(['a', 'b', 'c', 'd', 'e', 'f'], self.matrix)
+        np.random.seed(0)
+        x, y = get_xy_sets(embeddings, [('a', 'b'), ('c', 'd')], [('f', 'a')], 'average')
+        self.assertEqual([1, 1, 0], sorted(y.tolist(), reverse=True))
+        rows = {'a': 0, 'b': 1, 'c': 2, 'd': 3, 'f': 5}
+        for pair, label in [(('a', 'b'), 1), (('c', 'd'), 1), (('f', 'a'), 0)]:
+            feature = (self.matrix[rows[pair[0]]] + self.matrix[rows[pair[1]]]) / 2
+            match = np.flatnonzero(np.all(np.isclose(x, feature, rtol=1e-6), axis=1))
+            self.assertEqual(1, len(match))
+            self.assertEqual(label, y[match[0]])
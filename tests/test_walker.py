@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the node2vec alias tables saved next to a model."""
+
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from bionev.OpenNE.graph import Graph
+from bionev.OpenNE.walker import Walker, load_alias_edges, save_alias_edges
+
+
+def _graph(nodes, edges):
+    look_up = {node: i for i, node in enumerate(nodes)}
+    graph = Graph()
+    graph.build(nodes, [look_up[u] for u, _ in edges], [look_up[v] for _, v in edges])
+    return graph
+
+
+class TestAliasEdges(unittest.TestCase):
+    edges = [('a', 'b'), ('b', 'c'), ('c', 'a'), ('c', 'd')]
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, 'alias_edges.json')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip_by_node_id(self):
+        graph = _graph(['a', 'b', 'c', 'd'], self.edges)
+        walker = Walker(graph, p=0.5, q=2.0, update=False, workers=1)
+        walker.preprocess_transition_probs()
+        save_alias_edges(self.filename, walker)
+
+        # the same nodes in another row order, plus a node the saved graph does not have
+        other = _graph(['e', 'd', 'c', 'b', 'a'], self.edges + [('e', 'a')])
+        loaded = load_alias_edges(self.filename, other.look_up_dict)
+        self.assertEqual(len(walker.alias_edges), len(loaded))
+        look_back = graph.look_back_list
+        for (src, dst), (J, q) in walker.alias_edges.items():
+            other_J, other_q = loaded[other.look_up_dict[look_back[src]], other.look_up_dict[look_back[dst]]]
+            np.testing.assert_array_equal(J, other_J)
+            np.testing.assert_array_equal(q, other_q)
+
+    def test_missing_nodes_are_dropped(self):
+        walker = Walker(_graph(['a', 'b', 'c', 'd'], self.edges), p=1.0, q=1.0, update=False, workers=1)
+        walker.preprocess_transition_probs()
+        save_alias_edges(self.filename, walker)
+        loaded = load_alias_edges(self.filename, {'a': 0, 'b': 1})
+        self.assertEqual({(0, 1), (1, 0)}, set(loaded))
+
+    def test_rejects_row_keyed_format(self):
+        with open(self.filename, 'w') as f:
+            json.dump({'(0, 1)': [[0], [1.0]]}, f)
+        with self.assertRaises(ValueError):
+            load_alias_edges(self.filename, {'a': 0, 'b': 1})